@@ -0,0 +1,305 @@
+# analiseRespostas.py
+"""Análise vetorizada (NumPy) das pontuações do questionário
+
+Mantém em memória arrays compactos com pontuação (int16), perfil (código
+uint8) e data (segundos UTC, uint32) de cada resposta, ~7 bytes por linha.
+A carga é incremental: só as linhas com id_resp acima da marca d'água são
+lidas, e nada é consultado enquanto a versão dos dados não mudar. Exclusões
+e alterações de linhas já carregadas (inclusive limpar_respostas, que reinicia
+o AUTOINCREMENT) incrementam a versão 'UserRespostas' de VersaoTabelas; quando
+ela muda, os arrays são recarregados do zero.
+
+Como as pontuações são inteiros numa faixa curta, um único bincount sobre
+(perfil × pontuação) dá o histograma de cada perfil; percentis, médias,
+desvios, mínimos e máximos saem desses histogramas sem ordenar os dados.
+
+O NumPy é importado só na primeira análise; sem ele a análise fica
+indisponível (AnaliseIndisponivel) e o resto da aplicação funciona normalmente.
+"""
+import threading
+import time
+from datetime import datetime, timezone
+
+PERCENTIS_PADRAO = (5, 25, 50, 75, 95)
+SEGUNDOS_DIA = 86400
+
+# Limites dos parâmetros das análises
+BINS_MAXIMO = 200
+DIAS_MAXIMO = 3660
+
+# Linhas lidas do banco por lote na carga incremental
+TAMANHO_LOTE_CARGA = 50000
+
+class AnaliseIndisponivel(Exception):
+    """NumPy não instalado ou dados indisponíveis"""
+
+_np = None
+
+def _numpy():
+    """Importa o NumPy sob demanda; levanta AnaliseIndisponivel se não estiver instalado"""
+    global _np
+    if _np is None:
+        try:
+            import numpy
+            _np = numpy
+        except ImportError:
+            _np = False
+    if not _np:
+        raise AnaliseIndisponivel("NumPy não está instalado")
+    return _np
+
+def _percentis_de_contagens(np, contagens, minimo, percentis):
+    """Percentis (interpolação linear, como np.percentile) a partir de um histograma de inteiros"""
+    total = int(contagens.sum())
+    if total == 0:
+        return {p: None for p in percentis}
+    acumulado = np.cumsum(contagens)
+    posicoes = np.asarray(percentis, dtype=np.float64) / 100 * (total - 1)
+    baixo = np.floor(posicoes)
+    # Valor da k-ésima menor pontuação: primeiro bin cujo acumulado passa de k
+    valor_baixo = np.searchsorted(acumulado, baixo, side='right') + minimo
+    valor_alto = np.searchsorted(acumulado, np.ceil(posicoes), side='right') + minimo
+    valores = valor_baixo + (valor_alto - valor_baixo) * (posicoes - baixo)
+    return {p: round(float(v), 2) for p, v in zip(percentis, valores)}
+
+def _resumo_de_contagens(np, contagens, minimo, percentis):
+    """Total, média, desvio, mínimo, máximo e percentis de um histograma de inteiros"""
+    total = int(contagens.sum())
+    if total == 0:
+        return {'total': 0, 'media': None, 'desvio_padrao': None,
+                'minima': None, 'maxima': None, 'percentis': {}}
+    valores = np.arange(minimo, minimo + len(contagens), dtype=np.float64)
+    media = float((contagens * valores).sum() / total)
+    variancia = float((contagens * (valores - media) ** 2).sum() / total)
+    ocupados = np.flatnonzero(contagens)
+    return {
+        'total': total,
+        'media': round(media, 4),
+        'desvio_padrao': round(variancia ** 0.5, 4),
+        'minima': int(ocupados[0] + minimo),
+        'maxima': int(ocupados[-1] + minimo),
+        'percentis': _percentis_de_contagens(np, contagens, minimo, percentis)
+    }
+
+class AnaliseRespostas:
+    def __init__(self, db):
+        self.db = db
+        self._lock = threading.Lock()
+        self._versao = None
+        self._geracao = None
+        self._marca_dagua = 0
+        self._n = 0
+        self._pontuacoes = None
+        self._perfis = None
+        self._datas = None
+        self.nomes_perfis = []
+        self._codigos_perfis = {}
+        self.metricas = {'cargas_completas': 0, 'cargas_incrementais': 0,
+                         'linhas_carregadas': 0, 'tempo_ultima_carga': 0.0}
+
+    # ---------- carga ----------
+
+    def atualizar(self):
+        """Carrega as respostas novas (id_resp acima da marca d'água) se os dados mudaram"""
+        np = _numpy()
+        with self._lock:
+            versao = self.db.obter_versao_respostas()
+            if versao is not None and versao == self._versao:
+                return self._n
+
+            inicio = time.perf_counter()
+            # Exclusões e UPDATEs não aparecem na marca d'água: se a geração
+            # de reescritas mudou, descarta os arrays e recarrega tudo
+            geracao = self.db.obter_geracao_respostas()
+            if geracao != self._geracao:
+                self._reiniciar()
+            novas = self._carregar_novas(np)
+            completa = novas == self._n
+
+            self._versao = versao
+            self._geracao = geracao
+            self.metricas['cargas_completas' if completa else 'cargas_incrementais'] += 1
+            self.metricas['linhas_carregadas'] += novas
+            self.metricas['tempo_ultima_carga'] = time.perf_counter() - inicio
+            if novas:
+                print(f"📈 Análise: {novas} respostas carregadas ({self._n} no total)")
+            return self._n
+
+    def _reiniciar(self):
+        self._marca_dagua = 0
+        self._n = 0
+        self._pontuacoes = None
+        self._perfis = None
+        self._datas = None
+
+    def _codigo_perfil(self, perfil):
+        codigo = self._codigos_perfis.get(perfil)
+        if codigo is None:
+            codigo = len(self.nomes_perfis)
+            self._codigos_perfis[perfil] = codigo
+            self.nomes_perfis.append(perfil)
+        return codigo
+
+    def _carregar_novas(self, np):
+        """Lê as linhas novas em lotes e acrescenta aos arrays; retorna quantas foram lidas"""
+        cursor = self.db.connection.cursor()
+        try:
+            cursor.execute('''
+                SELECT id_resp, CAST(strftime('%s', data_resp) AS INTEGER), somaTotal_resp, perfil_resp
+                FROM UserRespostas
+                WHERE id_resp > ?
+                ORDER BY id_resp
+            ''', (self._marca_dagua,))
+            novas = 0
+            while True:
+                linhas = cursor.fetchmany(TAMANHO_LOTE_CARGA)
+                if not linhas:
+                    break
+                ids, datas, pontuacoes, perfis = zip(*linhas)
+                codigos = [self._codigo_perfil(perfil) for perfil in perfis]
+                self._acrescentar(
+                    np,
+                    np.array(pontuacoes, dtype=np.int16),
+                    np.array(codigos, dtype=np.uint8),
+                    np.array([d or 0 for d in datas], dtype=np.uint32)
+                )
+                self._marca_dagua = ids[-1]
+                novas += len(linhas)
+            return novas
+        finally:
+            cursor.close()
+
+    def _acrescentar(self, np, pontuacoes, perfis, datas):
+        """Acrescenta aos arrays, dobrando a capacidade quando necessário"""
+        necessario = self._n + len(pontuacoes)
+        capacidade = 0 if self._pontuacoes is None else len(self._pontuacoes)
+        if necessario > capacidade:
+            nova = max(necessario, capacidade * 2, 1024)
+            for nome, dtype in (('_pontuacoes', np.int16), ('_perfis', np.uint8), ('_datas', np.uint32)):
+                array = np.empty(nova, dtype=dtype)
+                atual = getattr(self, nome)
+                if atual is not None:
+                    array[:self._n] = atual[:self._n]
+                setattr(self, nome, array)
+        self._pontuacoes[self._n:necessario] = pontuacoes
+        self._perfis[self._n:necessario] = perfis
+        self._datas[self._n:necessario] = datas
+        self._n = necessario
+
+    def _dados(self):
+        """Atualiza e retorna visões (somente leitura) dos arrays carregados"""
+        np = _numpy()
+        self.atualizar()
+        with self._lock:
+            n = self._n
+            if n == 0:
+                vazio = np.empty(0, dtype=np.int16)
+                return np, vazio, vazio.astype(np.uint8), vazio.astype(np.uint32), list(self.nomes_perfis)
+            return (np, self._pontuacoes[:n], self._perfis[:n], self._datas[:n], list(self.nomes_perfis))
+
+    # ---------- análises ----------
+
+    def histograma(self, bins=None):
+        """Histograma das pontuações: uma barra por pontuação ou 'bins' faixas iguais"""
+        np, pontuacoes, _, _, _ = self._dados()
+        if len(pontuacoes) == 0:
+            return []
+        if bins is not None:
+            bins = int(bins)
+            if not 1 <= bins <= BINS_MAXIMO:
+                raise ValueError(f'bins deve estar entre 1 e {BINS_MAXIMO}')
+            contagens, bordas = np.histogram(pontuacoes, bins=bins)
+            return [{'de': round(float(bordas[i]), 2), 'ate': round(float(bordas[i + 1]), 2),
+                     'quantidade': int(contagens[i])} for i in range(len(contagens))]
+        minimo = int(pontuacoes.min())
+        contagens = np.bincount(pontuacoes - minimo)
+        return [{'pontuacao': minimo + i, 'quantidade': int(q)} for i, q in enumerate(contagens) if q]
+
+    def estatisticas(self, percentis=PERCENTIS_PADRAO):
+        """Resumo geral e por perfil (total, média, desvio, mín., máx., percentis)"""
+        np, pontuacoes, perfis, _, nomes = self._dados()
+        if len(pontuacoes) == 0:
+            return {'geral': _resumo_de_contagens(np, np.zeros(1), 0, percentis), 'perfis': []}
+
+        minimo = int(pontuacoes.min())
+        largura = int(pontuacoes.max()) - minimo + 1
+        # Um único bincount sobre (perfil, pontuação) dá o histograma de cada perfil
+        indices = perfis.astype(np.int64) * largura + (pontuacoes - minimo)
+        por_perfil = np.bincount(indices, minlength=len(nomes) * largura).reshape(len(nomes), largura)
+
+        resumo_perfis = []
+        for codigo, nome in enumerate(nomes):
+            resumo = _resumo_de_contagens(np, por_perfil[codigo], minimo, percentis)
+            if resumo['total']:
+                resumo_perfis.append(dict(resumo, perfil_resp=nome))
+        resumo_perfis.sort(key=lambda perfil: perfil['total'], reverse=True)
+        return {
+            'geral': _resumo_de_contagens(np, por_perfil.sum(axis=0), minimo, percentis),
+            'perfis': resumo_perfis
+        }
+
+    def medias_moveis(self, dias=90, janela=7):
+        """Respostas e média diária dos últimos 'dias' dias, com média móvel de 'janela' dias
+
+        A média móvel pondera pelas respostas (soma das pontuações da janela
+        dividida pelo número de respostas da janela).
+        """
+        dias, janela = int(dias), int(janela)
+        if not 1 <= dias <= DIAS_MAXIMO or not 1 <= janela <= dias:
+            raise ValueError(f'dias deve estar entre 1 e {DIAS_MAXIMO} e janela entre 1 e dias')
+        np, pontuacoes, _, datas, _ = self._dados()
+        hoje = int(time.time()) // SEGUNDOS_DIA
+        primeiro = hoje - dias + 1
+
+        dia = datas.astype(np.int64) // SEGUNDOS_DIA
+        no_periodo = (dia >= primeiro) & (dia <= hoje)
+        posicao = dia[no_periodo] - primeiro
+        quantidades = np.bincount(posicao, minlength=dias)[:dias]
+        somas = np.bincount(posicao, weights=pontuacoes[no_periodo], minlength=dias)[:dias]
+
+        # Somas acumuladas: janela i = acumulado[i] - acumulado[i - janela]
+        qtd_acumulada = np.concatenate(([0], np.cumsum(quantidades)))
+        soma_acumulada = np.concatenate(([0.0], np.cumsum(somas)))
+        fim = np.arange(1, dias + 1)
+        ini = np.maximum(fim - janela, 0)
+        qtd_janela = qtd_acumulada[fim] - qtd_acumulada[ini]
+        soma_janela = soma_acumulada[fim] - soma_acumulada[ini]
+
+        serie = []
+        for i in range(dias):
+            data = datetime.fromtimestamp((primeiro + i) * SEGUNDOS_DIA, tz=timezone.utc).date()
+            serie.append({
+                'data': data.isoformat(),
+                'respostas': int(quantidades[i]),
+                'media': round(float(somas[i] / quantidades[i]), 4) if quantidades[i] else None,
+                'media_movel': round(float(soma_janela[i] / qtd_janela[i]), 4) if qtd_janela[i] else None
+            })
+        return serie
+
+    def estado(self):
+        """Tamanho dos arrays e contadores de carga"""
+        with self._lock:
+            metricas = dict(self.metricas)
+            metricas['respostas'] = self._n
+            metricas['marca_dagua'] = self._marca_dagua
+            metricas['bytes'] = sum(a.nbytes for a in (self._pontuacoes, self._perfis, self._datas) if a is not None)
+        return metricas
+
+# Instância global, criada na primeira análise
+_analise = None
+_lock_instancia = threading.Lock()
+
+def get_analise(db=None):
+    """Retorna a instância global da análise das respostas
+
+    'db' só é usado na criação da instância; por padrão, o singleton do formDB.
+    """
+    global _analise
+    if _analise is None:
+        with _lock_instancia:
+            if _analise is None:
+                if db is None:
+                    from formDB import get_db
+                    db = get_db()
+                _analise = AnaliseRespostas(db)
+    return _analise
@@ -1,35 +1,144 @@
 # app.py
-from flask import Flask, render_template, request, jsonify
-from formDB import get_db as get_form_db
-from cadDB import get_db as get_cad_db
-from perfilGrafico import grafico_manager
+import os
+import threading
+from datetime import datetime, timedelta, timezone
+from inicializacao import relatorio_inicializacao
+
+# Imports medidos para o relatório de inicialização. O perfilGrafico (e o
+# matplotlib) só é carregado na primeira requisição de gráfico.
+with relatorio_inicializacao.medir('flask'):
+    from flask import Flask, render_template, request, jsonify, Response, send_file, url_for
+with relatorio_inicializacao.medir('formDB'):
+    from formDB import get_db as get_form_db
+with relatorio_inicializacao.medir('cadDB'):
+    from cadDB import get_db as get_cad_db, LIMITE_PADRAO_PAGINA
+with relatorio_inicializacao.medir('motorPontuacao'):
+    from motorPontuacao import obter_motor, ERRO_QUESTIONARIO_INDISPONIVEL
+with relatorio_inicializacao.medir('respostaStreaming'):
+    from respostaStreaming import formato_pedido, resposta_streaming
+with relatorio_inicializacao.medir('filaGravacao'):
+    from filaGravacao import criar_fila_gravacao
+with relatorio_inicializacao.medir('ativosEstaticos'):
+    from ativosEstaticos import get_ativos, CACHE_CONTROL_IMUTAVEL
+with relatorio_inicializacao.medir('compressaoRespostas'):
+    from compressaoRespostas import registrar_compressao, estatisticas as estatisticas_compressao
+with relatorio_inicializacao.medir('cacheFragmentos'):
+    from cacheFragmentos import ExtensaoCache
+with relatorio_inicializacao.medir('cacheHttp'):
+    from cacheHttp import get_condicional, dia_atual, estatisticas as estatisticas_cache_http
 
 app = Flask(__name__)
+# {% cache chaves %} ... {% endcache %} nos templates (ver cacheFragmentos.py)
+app.jinja_env.add_extension(ExtensaoCache)
+
+# Compressão gzip/brotli das respostas dinâmicas (HTML, JSON, streaming)
+registrar_compressao(app)
+
+# Bancos, ativos e fila de gravação são criados por create_app(), não na
+# importação: os workers 'spawn' do pool de gráficos reimportam este módulo
+# (como __mp_main__ quando a aplicação roda com python app.py) e não devem
+# abrir bancos, rodar migrações nem iniciar threads
+form_db = None          # Sistema de bullying
+cad_db = None           # Sistema de escolas
+ativos_estaticos = None
+fila_gravacao = None    # None também quando FORM_GRAVACAO_MODO=direto
+_app_criada = False
+_lock_app = threading.Lock()
+
+def create_app(form_db_inicial=None, cad_db_inicial=None):
+    """Inicializa bancos, ativos estáticos e fila de gravação (uma única vez)
+
+    Por padrão usa os singletons do formDB e do cadDB; bancos em outros
+    caminhos podem ser passados já criados (ex.: benchmark_rotas.py).
+    """
+    global form_db, cad_db, ativos_estaticos, fila_gravacao, _app_criada
+    if _app_criada:
+        return app
+    with _lock_app:
+        if _app_criada:
+            return app
+        form_db = form_db_inicial if form_db_inicial is not None else get_form_db()
+        cad_db = cad_db_inicial if cad_db_inicial is not None else get_cad_db()
+        # Ativos estáticos com hash no nome (refaz o build se static/ mudou)
+        ativos_estaticos = get_ativos()
+        fila_gravacao = criar_fila_gravacao(form_db)
+        _app_criada = True
+
+    relatorio_inicializacao.marcar_app_pronto()
+    # Aquecimento opcional dos gráficos em segundo plano (GRAFICO_AQUECER=1)
+    if os.environ.get('GRAFICO_AQUECER') == '1':
+        threading.Thread(target=aquecer_graficos, name='aquecimento-graficos', daemon=True).start()
+    return app
+
+@app.before_request
+def garantir_app_criada():
+    """Servidores que importam 'app:app' diretamente inicializam na primeira requisição"""
+    if not _app_criada:
+        create_app()
+
+@app.context_processor
+def helpers_templates():
+    """Disponibiliza ativo('style/...css') nos templates"""
+    def ativo(caminho):
+        nome = ativos_estaticos.url(caminho)
+        if nome is None:
+            return url_for('static', filename=caminho.lstrip('/'))
+        return url_for('servir_ativo', nome=nome)
+    return {'ativo': ativo}
+
+def gravar_resposta(soma_total, perfil):
+    """Grava pela fila de gravação, se configurada, ou direto no banco"""
+    if fila_gravacao is not None:
+        return fila_gravacao.salvar_resposta(soma_total, perfil)
+    return form_db.salvar_resposta_usuario(soma_total, perfil)
+
+def versao_cad(*tabelas):
+    """Fonte de versão (cacheHttp) com as tabelas do cadDB usadas pela rota"""
+    return lambda: cad_db.versao_cache(*tabelas)
+
+def versao_form():
+    """Fonte de versão (cacheHttp) das respostas do formDB"""
+    return form_db.versao_cache()
+
+_grafico_manager = None
+_lock_grafico_manager = threading.Lock()
+
+def obter_grafico_manager():
+    """Carrega o gerenciador de gráficos na primeira vez que for necessário"""
+    global _grafico_manager
+    if _grafico_manager is None:
+        with _lock_grafico_manager:
+            if _grafico_manager is None:
+                with relatorio_inicializacao.medir('perfilGrafico', sob_demanda=True):
+                    from perfilGrafico import get_grafico_manager
+                    _grafico_manager = get_grafico_manager(form_db)
+    return _grafico_manager
 
-# Inicializa ambos os bancos de dados
-form_db = get_form_db()  # Sistema de bullying
-cad_db = get_cad_db()    # Sistema de escolas
+def aquecer_graficos():
+    """Carrega o gerenciador e o matplotlib antes da primeira requisição"""
+    with relatorio_inicializacao.medir('aquecimento_graficos', sob_demanda=True):
+        obter_grafico_manager().aquecer()
+
+@app.after_request
+def registrar_primeira_resposta(response):
+    relatorio_inicializacao.registrar_resposta(request.path)
+    return response
 
 @app.route('/')
 def index():
     """Página inicial"""
     try:
-        # Estatísticas do sistema de escolas
-        escolas = cad_db.buscar_escolas()
-        usuarios = cad_db.buscar_usuarios()
-        publicacoes = cad_db.buscar_publicacoes()
+        # Totais e últimas publicações do sistema de escolas (contadores + LIMIT 5)
+        resumo = cad_db.buscar_resumo_painel()
         
         # Estatísticas do sistema de bullying
         stats_bullying = form_db.buscar_estatisticas()
         
-        # Últimas publicações
-        ultimas_publicacoes = publicacoes[:5] if publicacoes else []
-        
         return render_template('estatico/index.html', 
-                             total_escolas=len(escolas),
-                             total_usuarios=len(usuarios),
-                             total_publicacoes=len(publicacoes),
-                             ultimas_publicacoes=ultimas_publicacoes,
+                             total_escolas=resumo['total_escolas'],
+                             total_usuarios=resumo['total_usuarios'],
+                             total_publicacoes=resumo['total_publicacoes'],
+                             ultimas_publicacoes=resumo['ultimas_publicacoes'],
                              stats_bullying=stats_bullying)
     except Exception as e:
         print(f"❌ Erro na página inicial: {e}")
@@ -41,9 +150,10 @@ def index():
 def formulario():
     """Formulário com perguntas do banco"""
     try:
-        perguntas = form_db.buscar_perguntas()
-        print(f"✅ Carregadas {len(perguntas)} perguntas do banco")
-        return render_template('variavel/formulario/formulario.html', perguntas=perguntas)
+        versao, perguntas = form_db.obter_questionario_versionado()
+        return render_template('variavel/formulario/formulario.html',
+                             perguntas=perguntas,
+                             versao_questionario=versao)
     except Exception as e:
         print(f"❌ Erro ao carregar perguntas: {e}")
         return "Erro ao carregar o formulário", 500
@@ -75,32 +185,32 @@ def salvar_resposta():
     """Salva as respostas do questionário no banco"""
     try:
         dados = request.get_json()
-        respostas = dados.get('respostas', [])
-        
-        print(f"📝 Respostas recebidas: {respostas}")
+        motor = obter_motor(form_db)
+        if not motor.disponivel:
+            return jsonify({'success': False, 'error': ERRO_QUESTIONARIO_INDISPONIVEL}), 503
         
-        # Calcular soma total
-        soma_total = sum(respostas)
-        print(f"🧮 Soma total: {soma_total}")
-        
-        # Determinar perfil baseado na nova classificação
-        if 10 <= soma_total <= 16:
-            perfil = 'Alheio à Problemática'
-            descricao = 'Você talvez não tenha vivenciado ou percebido o bullying de forma próxima. É importante se informar mais sobre o tema para ajudar a criar ambientes mais seguros.'
-        elif 17 <= soma_total <= 23:
-            perfil = 'Consciente mas Cauteloso'
-            descricao = 'Você reconhece o bullying como um problema, mas pode hesitar em agir. Sua experiência é moderada, e há potencial para se tornar um aliado ativo.'
-        elif 24 <= soma_total <= 30:
-            perfil = 'Atuante na Causa'
-            descricao = 'Você já vivenciou ou testemunhou bullying e tem uma postura proativa contra isso. Sua empatia e engajamento são fundamentais para mudanças.'
-        else:
-            perfil = 'Fora da faixa'
-            descricao = 'Sua pontuação está fora da faixa esperada. Por favor, revise suas respostas.'
+        # Pontuar no servidor a partir dos IDs das opções escolhidas
+        try:
+            if 'opcoes' not in dados and 'respostas' in dados:
+                # Compatibilidade: formulario.js antigo (em cache) envia a pontuação
+                # de cada pergunta; os valores são validados contra as opções
+                print("⚠️ Envio no formato antigo ('respostas'), convertendo para opções")
+                opcoes = motor.opcoes_por_pontuacoes(dados['respostas'])
+            else:
+                opcoes = dados.get('opcoes', [])
+            print(f"📝 Opções recebidas: {opcoes}")
+            resultado = motor.pontuar(opcoes)
+        except ValueError as e:
+            print(f"❌ Respostas inválidas: {e}")
+            return jsonify({'success': False, 'error': str(e)})
         
-        print(f"🎯 Perfil determinado: {perfil}")
+        soma_total = resultado.pontuacao
+        perfil = resultado.perfil
+        descricao = resultado.descricao
+        print(f"🎯 Perfil determinado: {perfil} ({soma_total} pontos)")
         
         # Salvar no banco
-        if form_db.salvar_resposta_usuario(soma_total, perfil):
+        if gravar_resposta(soma_total, perfil):
             print("✅ Resposta salva no banco com sucesso!")
             return jsonify({
                 'success': True,
@@ -116,6 +226,104 @@ def salvar_resposta():
         print(f"❌ Erro geral: {e}")
         return jsonify({'success': False, 'error': str(e)})
 
+# Limite de envios por requisição de lote
+MAX_ENVIOS_LOTE = 5000
+# Datas aceitas nos envios: até JANELA_ENVIO_DIAS no passado e, no futuro,
+# só a diferença de relógio tolerada
+JANELA_ENVIO_DIAS = 365
+TOLERANCIA_FUTURO_ENVIO = timedelta(minutes=5)
+
+def _normalizar_data_envio(valor, agora):
+    """Converte a data informada pelo cliente para UTC no formato do banco
+    
+    Datas com fuso são convertidas para UTC; sem fuso, são tratadas como UTC
+    (como o CURRENT_TIMESTAMP). Levanta ValueError para datas inválidas, no
+    futuro ou fora da janela de envio. 'agora' é o horário UTC sem fuso.
+    """
+    if valor in (None, ''):
+        return None
+    try:
+        data = datetime.fromisoformat(str(valor))
+    except ValueError:
+        raise ValueError('Data de envio inválida')
+    if data.tzinfo is not None:
+        data = data.astimezone(timezone.utc).replace(tzinfo=None)
+    if data > agora + TOLERANCIA_FUTURO_ENVIO:
+        raise ValueError('Data de envio no futuro')
+    if data < agora - timedelta(days=JANELA_ENVIO_DIAS):
+        raise ValueError(f'Data de envio com mais de {JANELA_ENVIO_DIAS} dias')
+    return data.strftime('%Y-%m-%d %H:%M:%S')
+
+@app.route('/salvar-respostas-lote', methods=['POST'])
+def salvar_respostas_lote():
+    """Salva um lote de questionários (laboratórios, quiosques offline)
+    
+    Corpo: {"envios": [{"opcoes": [id_opcao, ...], "data_resp": "opcional"}, ...]}
+    Os envios válidos são gravados numa única transação; a resposta traz um
+    resultado por envio, na mesma ordem. data_resp é ISO 8601 (sem fuso = UTC);
+    se alguma data for inválida, no futuro ou mais antiga que a janela, o lote
+    inteiro é recusado com 400 e nada é gravado.
+    """
+    try:
+        dados = request.get_json()
+        envios = dados.get('envios', []) if isinstance(dados, dict) else []
+        
+        if not isinstance(envios, list) or not envios:
+            return jsonify({'success': False, 'error': 'Nenhum envio recebido'})
+        if len(envios) > MAX_ENVIOS_LOTE:
+            return jsonify({'success': False, 'error': f'Máximo de {MAX_ENVIOS_LOTE} envios por lote'})
+        
+        print(f"📦 Lote recebido: {len(envios)} envios")
+        
+        # Datas validadas antes de gravar qualquer envio
+        agora = datetime.now(timezone.utc).replace(tzinfo=None)
+        datas = []
+        datas_invalidas = []
+        for indice, envio in enumerate(envios):
+            try:
+                datas.append(_normalizar_data_envio(envio.get('data_resp'), agora) if isinstance(envio, dict) else None)
+            except ValueError as e:
+                datas_invalidas.append({'indice': indice, 'error': str(e)})
+        if datas_invalidas:
+            return jsonify({'success': False, 'error': 'Datas de envio inválidas', 'envios': datas_invalidas}), 400
+        
+        motor = obter_motor(form_db)
+        if not motor.disponivel:
+            return jsonify({'success': False, 'error': ERRO_QUESTIONARIO_INDISPONIVEL}), 503
+        
+        # Pontuar todos os envios de uma vez
+        lote_opcoes = [envio.get('opcoes') if isinstance(envio, dict) else None for envio in envios]
+        pontuados = motor.pontuar_lote(lote_opcoes)
+        
+        resultados = []
+        registros = []
+        for data_resp, pontuado in zip(datas, pontuados):
+            if pontuado.erro:
+                resultados.append({'success': False, 'error': pontuado.erro})
+                continue
+            registros.append((pontuado.pontuacao, pontuado.perfil, data_resp))
+            resultados.append({
+                'success': True,
+                'perfil': pontuado.perfil,
+                'pontuacao': pontuado.pontuacao
+            })
+        
+        # Salvar todos os válidos numa única transação
+        if not form_db.salvar_respostas_lote(registros):
+            return jsonify({'success': False, 'error': 'Erro ao salvar no banco de dados'})
+        
+        print(f"✅ Lote salvo: {len(registros)} de {len(envios)} envios")
+        return jsonify({
+            'success': True,
+            'salvos': len(registros),
+            'rejeitados': len(envios) - len(registros),
+            'resultados': resultados
+        })
+    
+    except Exception as e:
+        print(f"❌ Erro ao salvar lote: {e}")
+        return jsonify({'success': False, 'error': str(e)})
+
 @app.route('/estatisticas-bullying')
 def estatisticas_bullying():
     """Página de estatísticas do sistema de bullying"""
@@ -146,16 +354,16 @@ def detalhes_escola(id):
         if not escola:
             return "Escola não encontrada", 404
             
+        # Só os dados desta escola, filtrados no SQL pelos índices por escola
         publicacoes = cad_db.buscar_publicacoes_por_escola(id)
-        usuarios = cad_db.buscar_usuarios()  # Filtraremos por escola no template ou criaremos método específico
-        
-        # Filtrar usuários por escola
-        usuarios_escola = [u for u in usuarios if u['id_escola'] == id]
+        usuarios_escola = cad_db.buscar_usuarios_por_escola(id)
+        resumo = cad_db.buscar_resumo_escola(id)
         
         return render_template('variavel/escolas/detalhes_escola.html', 
                              escola=escola, 
                              publicacoes=publicacoes,
-                             usuarios=usuarios_escola)
+                             usuarios=usuarios_escola,
+                             resumo=resumo)
     except Exception as e:
         print(f"❌ Erro ao carregar escola: {e}")
         return "Escola não encontrada", 404
@@ -245,11 +453,13 @@ def detalhes_publicacao(id):
         if not publicacao:
             return "Publicação não encontrada", 404
             
-        comentarios = cad_db.buscar_comentarios_por_publicacao(id)
+        # Só a primeira página; as seguintes vêm de /api/comentarios/<id>?after=
+        pagina = cad_db.buscar_comentarios_pagina(id)
         
         return render_template('variavel/publicacoes/detalhes_publicacao.html', 
                              publicacao=publicacao, 
-                             comentarios=comentarios)
+                             comentarios=pagina['itens'],
+                             proximo_cursor=pagina['next_cursor'])
     except Exception as e:
         print(f"❌ Erro ao carregar publicação: {e}")
         return "Publicação não encontrada", 404
@@ -287,34 +497,79 @@ def grafico_perfis():
 
 # ========== API REST ENDPOINTS ==========
 
+def parametro_inteiro(nome, padrao, minimo, maximo=None):
+    """Lê um inteiro da query string; ValueError se não for inteiro ou estiver fora de [minimo, maximo]
+
+    Use no lugar de request.args.get(..., type=int), que troca valores
+    inválidos por None e faz a rota ignorar o filtro em vez de responder 400.
+    """
+    valor = request.args.get(nome)
+    if valor is None or valor == '':
+        return padrao
+    try:
+        valor = int(valor)
+    except ValueError:
+        raise ValueError(f'Parâmetro {nome} deve ser inteiro')
+    if valor < minimo or (maximo is not None and valor > maximo):
+        if maximo is None:
+            raise ValueError(f'Parâmetro {nome} deve ser maior ou igual a {minimo}')
+        raise ValueError(f'Parâmetro {nome} deve estar entre {minimo} e {maximo}')
+    return valor
+
+def parametros_pagina():
+    """Lê limit e after da query string para os métodos *_pagina do cadDB"""
+    return {
+        'limite': request.args.get('limit', LIMITE_PADRAO_PAGINA),
+        'apos': request.args.get('after') or None
+    }
+
 @app.route('/api/escolas')
+@get_condicional(versao_cad('escola'))
 def api_escolas():
-    """API para listar escolas"""
+    """API para listar escolas (paginada: ?limit=&after=<next_cursor>; completa: ?stream=json|ndjson)"""
     try:
-        escolas = cad_db.buscar_escolas()
-        return jsonify(escolas)
+        formato = formato_pedido(request)
+        if formato:
+            return resposta_streaming(cad_db.iterar_escolas(), formato)
+        pagina = cad_db.buscar_escolas_pagina(**parametros_pagina())
+        return jsonify(pagina)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/usuarios')
+@get_condicional(versao_cad('usuario', 'escola'))
 def api_usuarios():
-    """API para listar usuários"""
+    """API para listar usuários (paginada: ?limit=&after=<next_cursor>; completa: ?stream=json|ndjson)"""
     try:
-        usuarios = cad_db.buscar_usuarios()
-        return jsonify(usuarios)
+        formato = formato_pedido(request)
+        if formato:
+            return resposta_streaming(cad_db.iterar_usuarios(), formato)
+        pagina = cad_db.buscar_usuarios_pagina(**parametros_pagina())
+        return jsonify(pagina)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/publicacoes')
+@get_condicional(versao_cad('publicacao', 'usuario', 'escola'))
 def api_publicacoes():
-    """API para listar publicações"""
+    """API para listar publicações (paginada: ?limit=&after=<next_cursor>; completa: ?stream=json|ndjson)"""
     try:
-        publicacoes = cad_db.buscar_publicacoes()
-        return jsonify(publicacoes)
+        formato = formato_pedido(request)
+        if formato:
+            return resposta_streaming(cad_db.iterar_publicacoes(), formato)
+        pagina = cad_db.buscar_publicacoes_pagina(**parametros_pagina())
+        return jsonify(pagina)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/estatisticas-bullying')
+@get_condicional(versao_form)
 def api_estatisticas_bullying():
     """API para estatísticas do sistema de bullying"""
     try:
@@ -323,21 +578,138 @@ def api_estatisticas_bullying():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/evolucao-respostas')
+@get_condicional(versao_form)
+def api_evolucao_respostas():
+    """API da evolução temporal das respostas (?granularidade=dia|hora&limite=30)"""
+    try:
+        granularidade = request.args.get('granularidade', 'dia')
+        limite = parametro_inteiro('limite', 30, 1, 1000)
+        return jsonify(form_db.buscar_evolucao_temporal(granularidade, limite))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/api/comentarios/<int:id_publicacao>')
+@get_condicional(versao_cad('comentario', 'usuario'))
 def api_comentarios(id_publicacao):
-    """API para listar comentários de uma publicação"""
+    """API para listar comentários de uma publicação (paginada: ?limit=&after=<next_cursor>; completa: ?stream=json|ndjson)"""
     try:
-        comentarios = cad_db.buscar_comentarios_por_publicacao(id_publicacao)
-        return jsonify(comentarios)
+        formato = formato_pedido(request)
+        if formato:
+            return resposta_streaming(cad_db.iterar_comentarios_por_publicacao(id_publicacao), formato)
+        pagina = cad_db.buscar_comentarios_pagina(id_publicacao, **parametros_pagina())
+        return jsonify(pagina)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/escola/<int:id>/publicacoes')
+@get_condicional(versao_cad('publicacao', 'usuario'))
 def api_publicacoes_escola(id):
     """API para listar publicações de uma escola específica"""
     try:
+        formato = formato_pedido(request)
+        if formato:
+            return resposta_streaming(cad_db.iterar_publicacoes_por_escola(id), formato)
         publicacoes = cad_db.buscar_publicacoes_por_escola(id)
         return jsonify(publicacoes)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/exportar/respostas')
+def api_exportar_respostas():
+    """Exporta UserRespostas em streaming (CSV ou NDJSON, gzip opcional)
+    
+    Parâmetros: formato (csv|ndjson), desde e ate (AAAA-MM-DD, inclusivas),
+    apos_id (retoma após este id_resp) e gzip=1.
+    """
+    from exportacaoRespostas import FORMATOS_EXPORTACAO, gerar_exportacao, nome_arquivo
+    try:
+        formato = request.args.get('formato', 'csv')
+        gzip = request.args.get('gzip') == '1'
+        pedacos = gerar_exportacao(
+            form_db, formato,
+            desde=request.args.get('desde'),
+            ate=request.args.get('ate'),
+            apos_id=request.args.get('apos_id', 0),
+            gzip=gzip
+        )
+        resposta = Response(pedacos, mimetype='application/gzip' if gzip else FORMATOS_EXPORTACAO[formato])
+        resposta.headers['Content-Disposition'] = f'attachment; filename="{nome_arquivo(formato, gzip)}"'
+        return resposta
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/analise/pontuacao')
+@get_condicional(versao_form, dia_atual)
+def api_analise_pontuacao():
+    """Análise das pontuações: percentis, histograma, médias móveis e estatísticas por perfil
+    
+    Parâmetros: percentis (ex.: 10,50,90), bins, dias e janela.
+    """
+    from analiseRespostas import (get_analise, AnaliseIndisponivel, PERCENTIS_PADRAO,
+                                  BINS_MAXIMO, DIAS_MAXIMO)
+    try:
+        percentis = request.args.get('percentis')
+        percentis = tuple(float(p) for p in percentis.split(',')) if percentis else PERCENTIS_PADRAO
+        if any(not 0 <= p <= 100 for p in percentis):
+            raise ValueError('Percentis devem estar entre 0 e 100')
+        bins = parametro_inteiro('bins', None, 1, BINS_MAXIMO)
+        dias = parametro_inteiro('dias', 90, 1, DIAS_MAXIMO)
+        janela = parametro_inteiro('janela', 7, 1, dias)
+        
+        analise = get_analise(form_db)
+        return jsonify({
+            'estatisticas': analise.estatisticas(percentis),
+            'histograma': analise.histograma(bins),
+            'medias_moveis': analise.medias_moveis(dias, janela),
+            'carga': analise.estado()
+        })
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except AnaliseIndisponivel as e:
+        return jsonify({'error': str(e)}), 503
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/busca')
+@get_condicional(versao_cad('publicacao', 'comentario', 'usuario', 'escola'))
+def api_busca():
+    """Busca textual em publicações ou comentários
+    
+    Parâmetros: q, tipo (publicacoes|comentarios), escola, desde, ate
+    (AAAA-MM-DD), limit e after (next_cursor da página anterior).
+    """
+    try:
+        pagina = cad_db.buscar_texto(
+            request.args.get('q', ''),
+            tipo=request.args.get('tipo', 'publicacoes'),
+            id_escola=parametro_inteiro('escola', None, 1),
+            desde=request.args.get('desde'),
+            ate=request.args.get('ate'),
+            **parametros_pagina()
+        )
+        return jsonify(pagina)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/escola/<int:id>/resumo')
+@get_condicional(versao_cad('escola', 'usuario', 'publicacao', 'comentario'))
+def api_resumo_escola(id):
+    """API com os totais e a última atividade de uma escola"""
+    try:
+        if not cad_db.buscar_escola_por_id(id):
+            return jsonify({'error': 'Escola não encontrada'}), 404
+        return jsonify(cad_db.buscar_resumo_escola(id))
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -345,7 +717,7 @@ def api_publicacoes_escola(id):
 def api_grafico_barras():
     """API para obter gráfico de barras"""
     try:
-        graph_url = grafico_manager.gerar_grafico_perfis()
+        graph_url = obter_grafico_manager().gerar_grafico_perfis()
         if graph_url:
             return jsonify({'success': True, 'graph_url': graph_url})
         else:
@@ -358,7 +730,7 @@ def api_grafico_barras():
 def api_grafico_pizza():
     """API para obter gráfico de pizza"""
     try:
-        graph_url = grafico_manager.gerar_grafico_pizza()
+        graph_url = obter_grafico_manager().gerar_grafico_pizza()
         if graph_url:
             return jsonify({'success': True, 'graph_url': graph_url})
         else:
@@ -367,5 +739,91 @@ def api_grafico_pizza():
         print(f"❌ Erro na API gráfico pizza: {e}")
         return jsonify({'success': False, 'error': str(e)})
 
+@app.route('/grafico/<tipo>.png')
+def grafico_png(tipo):
+    """Gráfico em PNG binário com ETag forte (responde 304 se não mudou)"""
+    from perfilGrafico import GraficoIndisponivel
+    try:
+        resultado = obter_grafico_manager().obter_grafico_png(tipo)
+    except ValueError:
+        return "Gráfico não encontrado", 404
+    except GraficoIndisponivel as e:
+        print(f"⏳ Gráfico PNG ({tipo}) indisponível: {e}")
+        return "Gráfico temporariamente indisponível", 503, {'Retry-After': '5'}
+    except Exception as e:
+        print(f"❌ Erro no gráfico PNG ({tipo}): {e}")
+        return "Erro ao gerar gráfico", 500
+
+    if not resultado:
+        return "Erro ao gerar gráfico", 500
+
+    png, etag = resultado
+    if request.if_none_match.contains(etag):
+        resposta = Response(status=304)
+    else:
+        resposta = Response(png, mimetype='image/png')
+    resposta.set_etag(etag)
+    # Sempre revalida: o gráfico muda quando chegam novas respostas
+    resposta.headers['Cache-Control'] = 'public, no-cache'
+    return resposta
+
+@app.route('/ativos/<path:nome>')
+def servir_ativo(nome):
+    """Ativo estático com hash no nome: cache de um ano, gzip/brotli pré-comprimidos"""
+    arquivo = ativos_estaticos.localizar(nome, lambda codificacao: request.accept_encodings[codificacao] > 0)
+    if arquivo is None:
+        return "Arquivo não encontrado", 404
+    
+    caminho, tipo, codificacao = arquivo
+    resposta = send_file(caminho, mimetype=tipo, conditional=True, etag=True)
+    if codificacao:
+        resposta.headers['Content-Encoding'] = codificacao
+    resposta.vary.add('Accept-Encoding')
+    resposta.headers['Cache-Control'] = CACHE_CONTROL_IMUTAVEL
+    return resposta
+
+@app.route('/api/grafico/cache')
+def api_grafico_cache():
+    """API para inspecionar os contadores do cache de gráficos"""
+    try:
+        return jsonify(obter_grafico_manager().estatisticas_cache())
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/cache-http')
+def api_cache_http():
+    """API com as respostas 304 e completas das rotas com GET condicional"""
+    return jsonify(estatisticas_cache_http())
+
+@app.route('/api/compressao')
+def api_compressao():
+    """API com os contadores e a taxa da compressão de respostas"""
+    return jsonify(estatisticas_compressao())
+
+@app.route('/api/cache-fragmentos')
+def api_cache_fragmentos():
+    """API com a ocupação e os acertos do cache de fragmentos de template"""
+    return jsonify(app.jinja_env.cache_fragmentos.estatisticas())
+
+@app.route('/api/gravacao/fila')
+def api_gravacao_fila():
+    """API com a profundidade da fila e o tamanho dos grupos de commit"""
+    if fila_gravacao is None:
+        return jsonify({'modo': 'direto'})
+    return jsonify(fila_gravacao.estatisticas())
+
+@app.route('/api/banco/conexoes')
+def api_banco_conexoes():
+    """API com o estado dos pools de conexões dos dois bancos"""
+    return jsonify({
+        'formDB': form_db.pool.estatisticas(),
+        'cadDB': cad_db.pool.estatisticas()
+    })
+
+@app.route('/api/inicializacao')
+def api_inicializacao():
+    """API com o relatório de tempo de inicialização"""
+    return jsonify(relatorio_inicializacao.relatorio())
+
 if __name__ == '__main__':
-    app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
+    create_app().run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
@@ -0,0 +1,179 @@
+# ativosEstaticos.py
+"""Ativos estáticos com impressão digital (hash do conteúdo) e pré-comprimidos
+
+O build copia cada arquivo de static/ para static/dist/ com o hash do
+conteúdo no nome (style/estatico/index.3f2a9c1b5d7e.css) e grava ao lado
+as versões .gz e, se o pacote brotli estiver instalado, .br. O manifesto
+(static/dist/manifesto.json) liga o caminho original ao arquivo gerado.
+
+Como o nome muda sempre que o conteúdo muda, os arquivos são servidos com
+Cache-Control de um ano e immutable: visitantes que voltam não fazem
+nenhuma requisição de estáticos. Os templates usam {{ ativo('caminho') }}.
+
+O build roda sozinho na inicialização quando algum arquivo de static/ mudou
+desde o último manifesto, ou manualmente:
+
+    python ativosEstaticos.py
+"""
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import threading
+
+PASTA_STATIC = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
+SUBPASTA_DIST = 'dist'
+ARQUIVO_MANIFESTO = 'manifesto.json'
+
+CACHE_CONTROL_IMUTAVEL = 'public, max-age=31536000, immutable'
+
+# Só guarda a versão comprimida se ela economizar pelo menos 10%
+# (imagens PNG/JPG já são comprimidas e ficam só com o original)
+ECONOMIA_MINIMA = 0.9
+NIVEL_GZIP = 9
+QUALIDADE_BROTLI = 11
+
+# Codificações na ordem de preferência: (Content-Encoding, extensão)
+CODIFICACOES = (('br', '.br'), ('gzip', '.gz'))
+
+def _brotli():
+    """Importa o brotli se estiver instalado (opcional)"""
+    try:
+        import brotli
+        return brotli
+    except ImportError:
+        return None
+
+def _arquivos_origem(pasta_static):
+    """Caminhos relativos (com /) dos arquivos de static/, fora de static/dist/"""
+    for raiz, pastas, arquivos in os.walk(pasta_static):
+        if raiz == pasta_static and SUBPASTA_DIST in pastas:
+            pastas.remove(SUBPASTA_DIST)
+        for arquivo in arquivos:
+            caminho = os.path.relpath(os.path.join(raiz, arquivo), pasta_static)
+            yield caminho.replace(os.sep, '/')
+
+def _assinatura(pasta_static):
+    """(tamanho, mtime) de cada arquivo de origem, para saber se o build está desatualizado"""
+    assinatura = {}
+    for caminho in _arquivos_origem(pasta_static):
+        info = os.stat(os.path.join(pasta_static, caminho))
+        assinatura[caminho] = [info.st_size, info.st_mtime_ns]
+    return assinatura
+
+def _gravar(destino, conteudo):
+    os.makedirs(os.path.dirname(destino), exist_ok=True)
+    temporario = destino + '.tmp'
+    with open(temporario, 'wb') as arquivo:
+        arquivo.write(conteudo)
+    os.replace(temporario, destino)
+
+def construir(pasta_static=PASTA_STATIC):
+    """Gera static/dist/ (arquivos com hash, .gz e .br) e o manifesto; retorna o manifesto"""
+    pasta_dist = os.path.join(pasta_static, SUBPASTA_DIST)
+    brotli = _brotli()
+    ativos = {}
+    economia = 0
+
+    for caminho in sorted(_arquivos_origem(pasta_static)):
+        with open(os.path.join(pasta_static, caminho), 'rb') as arquivo:
+            conteudo = arquivo.read()
+        impressao = hashlib.sha256(conteudo).hexdigest()[:12]
+        base, extensao = os.path.splitext(caminho)
+        nome = f"{base}.{impressao}{extensao}"
+        destino = os.path.join(pasta_dist, nome)
+        if not os.path.exists(destino):
+            _gravar(destino, conteudo)
+
+        variantes = {'gzip': gzip.compress(conteudo, NIVEL_GZIP, mtime=0)}
+        if brotli is not None:
+            variantes['br'] = brotli.compress(conteudo, quality=QUALIDADE_BROTLI)
+
+        codificacoes = []
+        for codificacao, sufixo in CODIFICACOES:
+            comprimido = variantes.get(codificacao)
+            if comprimido is None or len(comprimido) > len(conteudo) * ECONOMIA_MINIMA:
+                continue
+            if not os.path.exists(destino + sufixo):
+                _gravar(destino + sufixo, comprimido)
+            codificacoes.append(codificacao)
+        if codificacoes:
+            economia += len(conteudo) - len(variantes[codificacoes[0]])
+
+        ativos[caminho] = {'arquivo': nome, 'tamanho': len(conteudo), 'codificacoes': codificacoes}
+
+    manifesto = {'ativos': ativos, 'origem': _assinatura(pasta_static)}
+    _gravar(os.path.join(pasta_dist, ARQUIVO_MANIFESTO),
+            json.dumps(manifesto, indent=2, ensure_ascii=False).encode('utf-8'))
+    print(f"📦 {len(ativos)} ativos estáticos gerados em {pasta_dist} "
+          f"({economia / 1024:.1f} KB a menos com compressão{'' if brotli else '; brotli não instalado'})")
+    return manifesto
+
+class AtivosEstaticos:
+    def __init__(self, pasta_static=PASTA_STATIC):
+        self.pasta_static = pasta_static
+        self.pasta_dist = os.path.join(pasta_static, SUBPASTA_DIST)
+        self._lock = threading.Lock()
+        self.ativos = {}
+        # Nome com hash -> informações do ativo (só estes nomes são servidos)
+        self._por_arquivo = {}
+        self.carregar()
+
+    def carregar(self):
+        """Lê o manifesto, refazendo o build se algum arquivo de static/ mudou"""
+        manifesto = None
+        try:
+            with open(os.path.join(self.pasta_dist, ARQUIVO_MANIFESTO), encoding='utf-8') as arquivo:
+                manifesto = json.load(arquivo)
+        except (OSError, ValueError):
+            pass
+
+        try:
+            if manifesto is None or manifesto.get('origem') != _assinatura(self.pasta_static):
+                manifesto = construir(self.pasta_static)
+        except Exception as e:
+            print(f"❌ Erro ao gerar ativos estáticos: {e}")
+            manifesto = manifesto or {'ativos': {}}
+
+        with self._lock:
+            self.ativos = manifesto['ativos']
+            self._por_arquivo = {info['arquivo']: info for info in self.ativos.values()}
+
+    def url(self, caminho):
+        """Caminho com hash para o template, ou None se o arquivo não estiver no manifesto"""
+        info = self.ativos.get(caminho.lstrip('/'))
+        return info['arquivo'] if info else None
+
+    def localizar(self, nome, aceita):
+        """Escolhe o arquivo a servir para o nome com hash
+
+        aceita(codificacao) diz se o cliente aceita a codificação. Retorna
+        (caminho no disco, Content-Type, Content-Encoding ou None) ou None se
+        o nome não for um ativo conhecido.
+        """
+        info = self._por_arquivo.get(nome)
+        if info is None:
+            return None
+        caminho = os.path.join(self.pasta_dist, *nome.split('/'))
+        tipo = mimetypes.guess_type(nome)[0] or 'application/octet-stream'
+        for codificacao, sufixo in CODIFICACOES:
+            if codificacao in info['codificacoes'] and aceita(codificacao):
+                return caminho + sufixo, tipo, codificacao
+        return caminho, tipo, None
+
+# Instância global, criada na primeira chamada
+_ativos = None
+_lock_instancia = threading.Lock()
+
+def get_ativos():
+    """Retorna a instância global dos ativos estáticos"""
+    global _ativos
+    if _ativos is None:
+        with _lock_instancia:
+            if _ativos is None:
+                _ativos = AtivosEstaticos()
+    return _ativos
+
+if __name__ == "__main__":
+    construir()
@@ -0,0 +1,644 @@
+# benchmark_rotas.py
+"""Benchmark das rotas e dos métodos de banco com dados sintéticos em várias escalas
+
+Para cada escala (número de respostas e de comentários) o script cria um
+form.db e um cad.db descartáveis numa pasta temporária, preenche com dados
+sintéticos e mede:
+
+- todas as rotas e APIs, pelo test client do Flask (com Accept-Encoding: gzip);
+- os métodos de leitura de formDB/cadDB e as análises, chamados diretamente.
+
+Para cada operação são registrados o tempo da primeira chamada, os
+percentis de latência (p50/p90/p99) das repetições, o número de comandos
+SQL (leituras e escritas, incluindo os passos dos gatilhos), o pico de
+memória alocada (tracemalloc) e o status HTTP. Cada escala roda num processo separado, então
+o pico de memória residente (rss_max_mb) também é por escala.
+
+Volumes por escala N: N respostas, N comentários, N/10 publicações,
+N/20 usuários e N/2000 escolas (mínimo de 10 de cada). 10% dos comentários
+vão para a publicação 1, para medir uma discussão grande.
+
+Uso:
+    python benchmark_rotas.py                                  # escalas 1000,100000,1000000
+    python benchmark_rotas.py --escalas 1000,100000 -o base.json
+    python benchmark_rotas.py --escalas 1000,100000 -o novo.json --comparar base.json
+    python benchmark_rotas.py --comparar base.json novo.json --limite 0.2 --falhar-regressao
+
+Métodos que carregam a tabela inteira (buscar_todas_respostas,
+buscar_publicacoes, ...) são pulados acima de LIMITE_MATERIALIZAR linhas,
+a não ser com --incluir-completos.
+"""
+import argparse
+import contextlib
+import json
+import os
+import platform
+import random
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+FORMATO_RESULTADO = 1
+ESCALAS_PADRAO = (1000, 100000, 1000000)
+REPETICOES_PADRAO = 30
+# Tempo máximo das repetições de uma operação (sempre pelo menos MINIMO_REPETICOES)
+TEMPO_MAXIMO_OPERACAO = 5.0
+MINIMO_REPETICOES = 3
+# Acima deste número de linhas os métodos que materializam a tabela inteira são pulados
+LIMITE_MATERIALIZAR = 200000
+# Variação do p50 considerada regressão na comparação (0.25 = 25% mais lento)
+LIMITE_REGRESSAO = 0.25
+# Diferenças abaixo disto (ms) são ruído e não contam como regressão
+RUIDO_MINIMO_MS = 0.05
+
+TAMANHO_LOTE_INSERCAO = 10000
+DIAS_HISTORICO = 365
+FRACAO_PUBLICACAO_VIRAL = 0.1
+
+PALAVRAS = (
+    'escola', 'aluno', 'professor', 'turma', 'intervalo', 'bullying', 'respeito',
+    'conversa', 'apoio', 'amizade', 'recreio', 'sala', 'projeto', 'família',
+    'direção', 'denúncia', 'grupo', 'mensagem', 'internet', 'ajuda', 'colega',
+    'campanha', 'palestra', 'empatia', 'acolhimento', 'diálogo', 'cuidado'
+)
+UFS = ('SP', 'RJ', 'MG', 'RS', 'PR', 'BA', 'PE', 'CE', 'SC', 'GO')
+
+# ---------- dados sintéticos ----------
+
+def volumes(escala):
+    """Linhas geradas por tabela para a escala"""
+    return {
+        'respostas': escala,
+        'comentarios': escala,
+        'publicacoes': max(escala // 10, 10),
+        'usuarios': max(escala // 20, 10),
+        'escolas': max(escala // 2000, 10),
+    }
+
+def _texto(aleatorio, minimo, maximo):
+    return ' '.join(aleatorio.choices(PALAVRAS, k=aleatorio.randint(minimo, maximo)))
+
+def _data(aleatorio, agora):
+    return (agora - timedelta(seconds=aleatorio.randrange(DIAS_HISTORICO * 86400))).strftime('%Y-%m-%d %H:%M:%S')
+
+def _inserir_em_lotes(db, sql, linhas):
+    """executemany em transações de TAMANHO_LOTE_INSERCAO linhas (os gatilhos mantêm os agregados)"""
+    lote = []
+    for linha in linhas:
+        lote.append(linha)
+        if len(lote) >= TAMANHO_LOTE_INSERCAO:
+            with db.pool.escrita() as conexao:
+                conexao.executemany(sql, lote)
+            lote = []
+    if lote:
+        with db.pool.escrita() as conexao:
+            conexao.executemany(sql, lote)
+
+def _contar_linhas(db, tabela):
+    return db.connection.execute(f'SELECT COUNT(*) FROM {tabela}').fetchone()[0]
+
+def gerar_dados(form_db, cad_db, escala, semente=42):
+    """Preenche os bancos com os volumes da escala; retorna as contagens finais"""
+    from motorPontuacao import classificar
+    aleatorio = random.Random(semente)
+    agora = datetime.now(timezone.utc).replace(tzinfo=None)
+    alvo = volumes(escala)
+
+    def respostas():
+        for _ in range(alvo['respostas']):
+            pontuacao = aleatorio.randint(10, 30)
+            yield _data(aleatorio, agora), pontuacao, classificar(pontuacao)[0]
+    _inserir_em_lotes(form_db, 'INSERT INTO UserRespostas (data_resp, somaTotal_resp, perfil_resp) VALUES (?, ?, ?)',
+                      respostas())
+
+    escolas_existentes = _contar_linhas(cad_db, 'escola')
+    def escolas():
+        for i in range(escolas_existentes, alvo['escolas']):
+            yield (f"Escola {' '.join(aleatorio.choices(PALAVRAS, k=2)).title()} {i}",
+                   aleatorio.choice(('publica', 'privada')), aleatorio.choice(UFS), f"Bairro {i % 97}")
+    _inserir_em_lotes(cad_db, 'INSERT INTO escola (nome_escola, categoria_escola, uf_escola, bairro_escola) VALUES (?, ?, ?, ?)',
+                      escolas())
+    total_escolas = _contar_linhas(cad_db, 'escola')
+
+    usuarios_existentes = _contar_linhas(cad_db, 'usuario')
+    def usuarios():
+        for i in range(usuarios_existentes, alvo['usuarios']):
+            yield (aleatorio.randint(1, total_escolas), f"Usuário {i}", f"usuario_bench_{i}", f"usuario_bench_{i}@example.com")
+    _inserir_em_lotes(cad_db, 'INSERT INTO usuario (id_escola, nome_user, username_user, email_user) VALUES (?, ?, ?, ?)',
+                      usuarios())
+    total_usuarios = _contar_linhas(cad_db, 'usuario')
+
+    publicacoes_existentes = _contar_linhas(cad_db, 'publicacao')
+    def publicacoes():
+        for _ in range(publicacoes_existentes, alvo['publicacoes']):
+            yield (aleatorio.randint(1, total_usuarios), aleatorio.randint(1, total_escolas),
+                   _texto(aleatorio, 3, 8).capitalize(), _texto(aleatorio, 20, 60), _data(aleatorio, agora))
+    _inserir_em_lotes(cad_db, 'INSERT INTO publicacao (id_user, id_escola, titulo_publi, texto_publi, data_publi) '
+                              'VALUES (?, ?, ?, ?, ?)', publicacoes())
+    total_publicacoes = _contar_linhas(cad_db, 'publicacao')
+
+    def comentarios():
+        for _ in range(alvo['comentarios']):
+            viral = aleatorio.random() < FRACAO_PUBLICACAO_VIRAL
+            yield (1 if viral else aleatorio.randint(1, total_publicacoes), aleatorio.randint(1, total_usuarios),
+                   _texto(aleatorio, 4, 25), _data(aleatorio, agora))
+    _inserir_em_lotes(cad_db, 'INSERT INTO comentario (id_publi, id_user, texto_coment, data_coment) VALUES (?, ?, ?, ?)',
+                      comentarios())
+
+    # Estatísticas para o planejador de consultas, como num banco em uso
+    for db in (form_db, cad_db):
+        with db.pool.escrita() as conexao:
+            conexao.execute('ANALYZE')
+
+    return {
+        'respostas': _contar_linhas(form_db, 'UserRespostas'),
+        'escolas': total_escolas,
+        'usuarios': total_usuarios,
+        'publicacoes': total_publicacoes,
+        'comentarios': _contar_linhas(cad_db, 'comentario'),
+    }
+
+# ---------- medição ----------
+
+def percentil(ordenados, p):
+    """Percentil com interpolação linear (como numpy.percentile) de uma lista ordenada"""
+    if not ordenados:
+        return None
+    posicao = (len(ordenados) - 1) * p / 100
+    baixo = int(posicao)
+    alto = min(baixo + 1, len(ordenados) - 1)
+    return ordenados[baixo] + (ordenados[alto] - ordenados[baixo]) * (posicao - baixo)
+
+class ContadorConsultas:
+    """Conta os comandos SQL enviados pelas conexões desta thread (set_trace_callback)"""
+    def __init__(self, *dbs):
+        self.dbs = dbs
+        self.comandos = []
+
+    def __enter__(self):
+        self.comandos = []
+        for db in self.dbs:
+            db.connection.set_trace_callback(self.comandos.append)
+        return self
+
+    def __exit__(self, *exc):
+        for db in self.dbs:
+            db.connection.set_trace_callback(None)
+        return False
+
+    def resumo(self):
+        """Leituras, escritas e comandos internos; BEGIN/COMMIT não contam
+        
+        O SQLite reporta cada passo executado por gatilhos repetindo o comando
+        que os disparou (então 'escritas' inclui a manutenção dos agregados) e
+        os comandos internos, como os do FTS5, com o prefixo "-- ".
+        """
+        consultas = escritas = internos = 0
+        for sql in self.comandos:
+            if sql.startswith('--'):
+                internos += 1
+                continue
+            comando = sql.split(None, 1)[0].upper() if sql.strip() else ''
+            if comando in ('SELECT', 'WITH', 'PRAGMA'):
+                consultas += 1
+            elif comando not in ('BEGIN', 'COMMIT', 'ROLLBACK', 'SAVEPOINT', 'RELEASE', ''):
+                escritas += 1
+        return {'consultas': consultas, 'escritas': escritas, 'internos': internos}
+
+def medir(operacao, dbs, repeticoes, tempo_maximo):
+    """Mede uma operação: primeira chamada, repetições, consultas e pico de memória"""
+    executar = operacao['executar']
+    preparar = operacao.get('preparar')
+
+    if preparar:
+        preparar()
+    inicio = time.perf_counter()
+    resultado = executar()
+    primeira = (time.perf_counter() - inicio) * 1000
+
+    # Consultas e memória numa chamada separada, fora das medições de tempo
+    if preparar:
+        preparar()
+    contador = ContadorConsultas(*dbs)
+    with contador:
+        executar()
+    if preparar:
+        preparar()
+    tracemalloc.start()
+    try:
+        executar()
+        pico_memoria = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    tempos = []
+    limite = time.perf_counter() + tempo_maximo
+    while len(tempos) < repeticoes and (len(tempos) < MINIMO_REPETICOES or time.perf_counter() < limite):
+        if preparar:
+            preparar()
+        inicio = time.perf_counter()
+        executar()
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    tempos.sort()
+
+    medicao = {
+        'primeira_ms': round(primeira, 3),
+        'repeticoes': len(tempos),
+        'min_ms': round(tempos[0], 3),
+        'p50_ms': round(percentil(tempos, 50), 3),
+        'p90_ms': round(percentil(tempos, 90), 3),
+        'p99_ms': round(percentil(tempos, 99), 3),
+        'max_ms': round(tempos[-1], 3),
+        'media_ms': round(sum(tempos) / len(tempos), 3),
+        'pico_memoria_kb': round(pico_memoria / 1024, 1),
+    }
+    medicao.update(contador.resumo())
+    if isinstance(resultado, dict):
+        medicao.update(resultado)
+    return medicao
+
+# ---------- operações ----------
+
+def _contexto(form_db, cad_db, cliente, linhas):
+    """Ids, cursores e ETags usados pelas operações"""
+    from cadDB import codificar_cursor
+    meio = cad_db.connection.execute(
+        'SELECT data_publi, id_publi FROM publicacao ORDER BY data_publi DESC, id_publi DESC LIMIT 1 OFFSET ?',
+        (linhas['publicacoes'] // 2,)
+    ).fetchone()
+    ultimo_id = form_db.connection.execute('SELECT MAX(id_resp) FROM UserRespostas').fetchone()[0] or 0
+    opcoes = [pergunta.opcoes[0].id_opcao for pergunta in form_db.obter_questionario() if pergunta.opcoes]
+    return {
+        'id_publi_viral': 1,
+        'cursor_publicacoes_meio': codificar_cursor(list(meio)) if meio else None,
+        'apos_id_10k': max(ultimo_id - 10000, 0),
+        'etag_escolas': cliente.get('/api/escolas').headers.get('ETag', ''),
+        'opcoes': opcoes,
+    }
+
+def _rota(cliente, url, metodo='GET', cabecalhos=None, corpo=None):
+    """Operação que faz a requisição e lê o corpo inteiro (inclusive respostas em streaming)"""
+    cabecalhos = dict({'Accept-Encoding': 'gzip'}, **(cabecalhos or {}))
+    def executar():
+        resposta = cliente.open(url, method=metodo, headers=cabecalhos, json=corpo() if corpo else None)
+        try:
+            dados = resposta.get_data()
+        finally:
+            resposta.close()
+        return {'status': resposta.status_code, 'bytes_resposta': len(dados)}
+    return executar
+
+def operacoes_rotas(cliente, ctx):
+    """Rotas e APIs medidas: (nome, executar); escritas ficam no fim"""
+    viral = ctx['id_publi_viral']
+    rotas = [
+        ('GET /', '/'),
+        ('GET /formulario', '/formulario'),
+        ('GET /definicao', '/definicao'),
+        ('GET /identificar', '/identificar'),
+        ('GET /resultado', '/resultado?perfil=Atuante%20na%20Causa&pontuacao=25'),
+        ('GET /estatisticas-bullying', '/estatisticas-bullying'),
+        ('GET /grafico-perfis', '/grafico-perfis'),
+        ('GET /grafico/barras.png', '/grafico/barras.png'),
+        ('GET /grafico/pizza.png', '/grafico/pizza.png'),
+        ('GET /escolas', '/escolas'),
+        ('GET /escola/1', '/escola/1'),
+        ('GET /usuarios', '/usuarios'),
+        ('GET /publicacoes', '/publicacoes'),
+        ('GET /publicacao/<viral>', f'/publicacao/{viral}'),
+        ('GET /api/escolas', '/api/escolas'),
+        ('GET /api/escolas?stream=ndjson', '/api/escolas?stream=ndjson'),
+        ('GET /api/usuarios', '/api/usuarios'),
+        ('GET /api/publicacoes', '/api/publicacoes'),
+        ('GET /api/estatisticas-bullying', '/api/estatisticas-bullying'),
+        ('GET /api/evolucao-respostas', '/api/evolucao-respostas'),
+        ('GET /api/evolucao-respostas?granularidade=hora', '/api/evolucao-respostas?granularidade=hora&limite=48'),
+        ('GET /api/comentarios/<viral>', f'/api/comentarios/{viral}'),
+        ('GET /api/escola/1/publicacoes', '/api/escola/1/publicacoes'),
+        ('GET /api/escola/1/resumo', '/api/escola/1/resumo'),
+        ('GET /api/busca?q=bullying', '/api/busca?q=bullying'),
+        ('GET /api/busca?q=bullying&tipo=comentarios', '/api/busca?q=bullying&tipo=comentarios'),
+        ('GET /api/analise/pontuacao', '/api/analise/pontuacao'),
+        ('GET /api/exportar/respostas (10k)', f"/api/exportar/respostas?apos_id={ctx['apos_id_10k']}"),
+        ('GET /api/grafico/barras', '/api/grafico/barras'),
+        ('GET /api/grafico/pizza', '/api/grafico/pizza'),
+        ('GET /api/grafico/cache', '/api/grafico/cache'),
+        ('GET /api/cache-http', '/api/cache-http'),
+        ('GET /api/compressao', '/api/compressao'),
+        ('GET /api/cache-fragmentos', '/api/cache-fragmentos'),
+        ('GET /api/gravacao/fila', '/api/gravacao/fila'),
+        ('GET /api/banco/conexoes', '/api/banco/conexoes'),
+        ('GET /api/inicializacao', '/api/inicializacao'),
+    ]
+    operacoes = [{'nome': nome, 'executar': _rota(cliente, url)} for nome, url in rotas]
+
+    if ctx['cursor_publicacoes_meio']:
+        operacoes.append({'nome': 'GET /api/publicacoes (cursor no meio)',
+                          'executar': _rota(cliente, f"/api/publicacoes?after={ctx['cursor_publicacoes_meio']}")})
+    if ctx['etag_escolas']:
+        operacoes.append({'nome': 'GET /api/escolas (If-None-Match, 304)',
+                          'executar': _rota(cliente, '/api/escolas', cabecalhos={'If-None-Match': ctx['etag_escolas']})})
+
+    # Escritas por último: invalidam caches e versões das leituras acima
+    if ctx['opcoes']:
+        operacoes.append({'nome': 'POST /salvar-resposta',
+                          'executar': _rota(cliente, '/salvar-resposta', 'POST', corpo=lambda: {'opcoes': ctx['opcoes']})})
+        operacoes.append({'nome': 'POST /salvar-respostas-lote (100)',
+                          'executar': _rota(cliente, '/salvar-respostas-lote', 'POST',
+                                            corpo=lambda: {'envios': [{'opcoes': ctx['opcoes']}] * 100})})
+    return operacoes
+
+def operacoes_metodos(form_db, cad_db, ctx, linhas, incluir_completos):
+    """Métodos de banco e análises chamados diretamente: lista de operações"""
+    from analiseRespostas import get_analise
+    from perfilGrafico import get_grafico_manager
+    viral = ctx['id_publi_viral']
+    grafico = get_grafico_manager(form_db)
+    analise = get_analise(form_db)
+
+    metodos = [
+        ('formDB.buscar_estatisticas', form_db.buscar_estatisticas, False),
+        ('formDB.buscar_estatisticas_detalhadas', form_db.buscar_estatisticas_detalhadas, False),
+        ('formDB.buscar_distribuicao_pontuacao', form_db.buscar_distribuicao_pontuacao, False),
+        ('formDB.buscar_resumo_perfis', form_db.buscar_resumo_perfis, False),
+        ('formDB.buscar_evolucao_temporal', form_db.buscar_evolucao_temporal, False),
+        ('formDB.buscar_evolucao_temporal(hora, 48)', lambda: form_db.buscar_evolucao_temporal('hora', 48), False),
+        ('formDB.obter_questionario', form_db.obter_questionario, False),
+        ('formDB.iterar_respostas (10k)', lambda: sum(1 for _ in form_db.iterar_respostas(apos_id=ctx['apos_id_10k'])), False),
+        ('formDB.buscar_todas_respostas', form_db.buscar_todas_respostas, True),
+        ('cadDB.buscar_resumo_painel', cad_db.buscar_resumo_painel, False),
+        ('cadDB.buscar_escolas', cad_db.buscar_escolas, False),
+        ('cadDB.buscar_escolas_pagina', cad_db.buscar_escolas_pagina, False),
+        ('cadDB.buscar_usuarios_pagina', cad_db.buscar_usuarios_pagina, False),
+        ('cadDB.buscar_publicacoes_pagina', cad_db.buscar_publicacoes_pagina, False),
+        ('cadDB.buscar_publicacao_por_id', lambda: cad_db.buscar_publicacao_por_id(viral), False),
+        ('cadDB.buscar_resumo_escola', lambda: cad_db.buscar_resumo_escola(1), False),
+        ('cadDB.buscar_comentarios_pagina (viral)', lambda: cad_db.buscar_comentarios_pagina(viral), False),
+        ('cadDB.buscar_texto(publicacoes)', lambda: cad_db.buscar_texto('bullying', 'publicacoes'), False),
+        ('cadDB.buscar_texto(comentarios)', lambda: cad_db.buscar_texto('bullying', 'comentarios'), False),
+        ('cadDB.buscar_usuarios', cad_db.buscar_usuarios, True),
+        ('cadDB.buscar_publicacoes', cad_db.buscar_publicacoes, True),
+        ('cadDB.buscar_publicacoes_por_escola', lambda: cad_db.buscar_publicacoes_por_escola(1), True),
+        ('cadDB.buscar_comentarios_por_publicacao (viral)', lambda: cad_db.buscar_comentarios_por_publicacao(viral), True),
+        ('analiseRespostas.estatisticas', analise.estatisticas, False),
+        ('analiseRespostas.histograma', analise.histograma, False),
+        ('analiseRespostas.medias_moveis', analise.medias_moveis, False),
+    ]
+    if ctx['cursor_publicacoes_meio']:
+        metodos.append(('cadDB.buscar_publicacoes_pagina (cursor no meio)',
+                        lambda: cad_db.buscar_publicacoes_pagina(apos=ctx['cursor_publicacoes_meio']), False))
+
+    maior_tabela = max(linhas.values())
+    operacoes = []
+    for nome, executar, completo in metodos:
+        if completo and maior_tabela > LIMITE_MATERIALIZAR and not incluir_completos:
+            operacoes.append({'nome': nome, 'pulado': f'materializa a tabela inteira (> {LIMITE_MATERIALIZAR} linhas)'})
+            continue
+        operacoes.append({'nome': nome, 'executar': executar})
+
+    # Renderização sem cache: mede o matplotlib e não só o acerto do cache
+    operacoes.append({'nome': 'perfilGrafico.gerar_grafico_perfis (sem cache)',
+                      'executar': grafico.gerar_grafico_perfis, 'preparar': grafico.limpar_cache})
+    return operacoes
+
+# ---------- execução de uma escala (processo filho) ----------
+
+def _progresso(mensagem):
+    print(mensagem, file=sys.stderr, flush=True)
+
+def _medir_todas(operacoes, dbs, args):
+    resultados = {}
+    for operacao in operacoes:
+        nome = operacao['nome']
+        if 'pulado' in operacao:
+            resultados[nome] = {'pulado': operacao['pulado']}
+            continue
+        try:
+            resultados[nome] = medir(operacao, dbs, args.repeticoes, args.tempo_maximo)
+        except Exception as e:
+            resultados[nome] = {'erro': f'{type(e).__name__}: {e}'}
+        medicao = resultados[nome]
+        if 'p50_ms' in medicao:
+            status = f" [{medicao['status']}]" if 'status' in medicao else ''
+            _progresso(f"   {nome}{status}: p50 {medicao['p50_ms']} ms, {medicao['consultas']} consulta(s)")
+        else:
+            _progresso(f"   ⚠️ {nome}: {medicao.get('erro')}")
+    return resultados
+
+def executar_escala(args):
+    """Processo filho: cria os bancos na pasta, gera os dados e mede tudo
+
+    Os bancos são abertos pelo caminho explícito e entregues a create_app();
+    nada depende do diretório atual nem dos singletons do formDB/cadDB.
+    """
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    escala = args.executar_escala
+
+    # Os módulos da aplicação registram cada operação com print; o progresso vai para stderr
+    with open(os.devnull, 'w') as nulo, contextlib.redirect_stdout(nulo):
+        import formDB
+        import cadDB
+        form_db = formDB.Database(db_name=os.path.join(args.pasta, 'form.db'))
+        cad_db = cadDB.Database(db_name=os.path.join(args.pasta, 'cad.db'))
+
+        _progresso(f"🏗️ Escala {escala}: gerando dados em {args.pasta}")
+        inicio = time.perf_counter()
+        linhas = gerar_dados(form_db, cad_db, escala, args.semente)
+        geracao = time.perf_counter() - inicio
+        _progresso(f"   {linhas} em {geracao:.1f} s")
+
+        inicio = time.perf_counter()
+        import app as aplicacao
+        aplicacao.create_app(form_db, cad_db)
+        importacao_app = (time.perf_counter() - inicio) * 1000
+        cliente = aplicacao.app.test_client()
+
+        ctx = _contexto(form_db, cad_db, cliente, linhas)
+        dbs = (form_db, cad_db)
+        metodos = _medir_todas(operacoes_metodos(form_db, cad_db, ctx, linhas, args.incluir_completos), dbs, args)
+        rotas = _medir_todas(operacoes_rotas(cliente, ctx), dbs, args)
+
+    tamanho_bancos = sum(os.path.getsize(os.path.join(args.pasta, nome))
+                         for nome in os.listdir(args.pasta) if '.db' in nome)
+    resultado = {
+        'linhas': linhas,
+        'geracao_s': round(geracao, 2),
+        'importacao_app_ms': round(importacao_app, 1),
+        'tamanho_bancos_mb': round(tamanho_bancos / 1024 / 1024, 1),
+        'rotas': rotas,
+        'metodos': metodos,
+    }
+    if resource is not None:
+        # ru_maxrss é em KB no Linux e em bytes no macOS
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        resultado['rss_max_mb'] = round(rss / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+    with open(args.resultado, 'w', encoding='utf-8') as arquivo:
+        json.dump(resultado, arquivo, ensure_ascii=False)
+    return 0
+
+# ---------- orquestração, relatório e comparação ----------
+
+def _versao_codigo():
+    """Commit atual do repositório, se disponível"""
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+def rodar(args):
+    """Roda cada escala num processo filho e junta os resultados"""
+    resultado = {
+        'formato': FORMATO_RESULTADO,
+        'data': datetime.now().isoformat(timespec='seconds'),
+        'commit': _versao_codigo(),
+        'python': platform.python_version(),
+        'sqlite': sqlite3.sqlite_version,
+        'plataforma': platform.platform(),
+        'repeticoes': args.repeticoes,
+        'escalas': {},
+    }
+    for escala in args.escalas:
+        pasta = tempfile.mkdtemp(prefix=f'benchmark_{escala}_')
+        arquivo = os.path.join(pasta, 'resultado.json')
+        comando = [sys.executable, os.path.abspath(__file__), '--executar-escala', str(escala),
+                   '--pasta', pasta, '--resultado', arquivo, '--repeticoes', str(args.repeticoes),
+                   '--tempo-maximo', str(args.tempo_maximo), '--semente', str(args.semente)]
+        if args.incluir_completos:
+            comando.append('--incluir-completos')
+        try:
+            processo = subprocess.run(comando)
+            if processo.returncode != 0 or not os.path.exists(arquivo):
+                print(f"❌ Escala {escala} falhou (código {processo.returncode})")
+                resultado['escalas'][str(escala)] = {'erro': f'processo terminou com código {processo.returncode}'}
+                continue
+            with open(arquivo, encoding='utf-8') as entrada:
+                resultado['escalas'][str(escala)] = json.load(entrada)
+        finally:
+            if args.manter_bancos:
+                print(f"📁 Bancos da escala {escala} mantidos em {pasta}")
+            else:
+                shutil.rmtree(pasta, ignore_errors=True)
+    return resultado
+
+def imprimir_resumo(resultado):
+    """Tabela com p50/p90/p99, consultas e memória de cada operação"""
+    for escala, dados in resultado['escalas'].items():
+        print("\n" + "=" * 100)
+        if 'erro' in dados:
+            print(f"ESCALA {escala}: {dados['erro']}")
+            continue
+        print(f"ESCALA {escala} - {dados['linhas']} - geração {dados['geracao_s']} s, "
+              f"bancos {dados['tamanho_bancos_mb']} MB, RSS máx. {dados.get('rss_max_mb', '?')} MB")
+        print("=" * 100)
+        print(f"{'operação':<52} {'status':>6} {'p50':>9} {'p90':>9} {'p99':>9} {'SQL':>5} {'escr.':>5} {'mem KB':>9}")
+        for grupo in ('metodos', 'rotas'):
+            for nome, medicao in dados[grupo].items():
+                if 'p50_ms' not in medicao:
+                    print(f"{nome[:52]:<52} {'-':>6} {medicao.get('pulado') or medicao.get('erro')}")
+                    continue
+                print(f"{nome[:52]:<52} {medicao.get('status', '-'):>6} {medicao['p50_ms']:>9.3f} "
+                      f"{medicao['p90_ms']:>9.3f} {medicao['p99_ms']:>9.3f} {medicao['consultas']:>5} "
+                      f"{medicao['escritas']:>5} {medicao['pico_memoria_kb']:>9.1f}")
+        falhas = [nome for nome, medicao in dados['rotas'].items() if medicao.get('status', 200) >= 400]
+        if falhas:
+            print(f"⚠️ Rotas com erro HTTP: {', '.join(falhas)}")
+
+def comparar(base, atual, limite=LIMITE_REGRESSAO):
+    """Compara o p50 e as consultas de duas execuções; retorna o número de regressões"""
+    regressoes = 0
+    for escala, dados_atual in atual['escalas'].items():
+        dados_base = base['escalas'].get(escala)
+        if not dados_base or 'erro' in dados_base or 'erro' in dados_atual:
+            continue
+        print("\n" + "=" * 100)
+        print(f"COMPARAÇÃO - ESCALA {escala} (base {base.get('commit') or base['data']} -> "
+              f"atual {atual.get('commit') or atual['data']})")
+        print("=" * 100)
+        print(f"{'operação':<52} {'p50 base':>10} {'p50 atual':>10} {'variação':>9} {'SQL':>9}")
+        for grupo in ('metodos', 'rotas'):
+            for nome, medicao in dados_atual[grupo].items():
+                anterior = dados_base[grupo].get(nome, {})
+                if 'p50_ms' not in medicao or 'p50_ms' not in anterior:
+                    continue
+                variacao = (medicao['p50_ms'] - anterior['p50_ms']) / anterior['p50_ms'] if anterior['p50_ms'] else 0.0
+                mais_consultas = (medicao['consultas'] > anterior['consultas']
+                                  or medicao['escritas'] > anterior.get('escritas', 0))
+                regressao = mais_consultas or (
+                    variacao > limite and medicao['p50_ms'] - anterior['p50_ms'] > RUIDO_MINIMO_MS
+                )
+                if regressao:
+                    regressoes += 1
+                marca = '❌' if regressao else ('✅' if variacao < -limite else '  ')
+                print(f"{nome[:52]:<52} {anterior['p50_ms']:>10.3f} {medicao['p50_ms']:>10.3f} "
+                      f"{variacao:>+8.0%} {anterior['consultas']:>4}->{medicao['consultas']:<4}{marca}")
+    if regressoes:
+        print(f"\n❌ {regressoes} operação(ões) mais lentas que o limite de {limite:.0%} ou com mais consultas")
+    else:
+        print(f"\n✅ Nenhuma regressão acima de {limite:.0%}")
+    return regressoes
+
+def _ler_json(caminho):
+    with open(caminho, encoding='utf-8') as arquivo:
+        return json.load(arquivo)
+
+def _escalas(valor):
+    return [int(escala) for escala in valor.split(',') if escala.strip()]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark das rotas e dos métodos de banco com dados sintéticos')
+    parser.add_argument('--escalas', type=_escalas, default=list(ESCALAS_PADRAO),
+                        help='número de respostas/comentários por escala, separados por vírgula')
+    parser.add_argument('--repeticoes', type=int, default=REPETICOES_PADRAO)
+    parser.add_argument('--tempo-maximo', type=float, default=TEMPO_MAXIMO_OPERACAO,
+                        help='segundos de repetições por operação')
+    parser.add_argument('--semente', type=int, default=42)
+    parser.add_argument('--incluir-completos', action='store_true',
+                        help='mede também os métodos que carregam a tabela inteira nas escalas grandes')
+    parser.add_argument('--manter-bancos', action='store_true', help='não apaga os bancos gerados')
+    parser.add_argument('-o', '--saida', help='arquivo JSON com os resultados')
+    parser.add_argument('--comparar', nargs='+', metavar='JSON',
+                        help='BASE (compara com esta execução) ou BASE ATUAL (só compara os arquivos)')
+    parser.add_argument('--limite', type=float, default=LIMITE_REGRESSAO,
+                        help='variação do p50 considerada regressão (0.25 = 25%%)')
+    parser.add_argument('--falhar-regressao', action='store_true', help='código de saída 1 se houver regressão')
+    # Uso interno: execução de uma escala no processo filho
+    parser.add_argument('--executar-escala', type=int, help=argparse.SUPPRESS)
+    parser.add_argument('--pasta', help=argparse.SUPPRESS)
+    parser.add_argument('--resultado', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.executar_escala is not None:
+        return executar_escala(args)
+
+    if args.comparar and len(args.comparar) > 2:
+        parser.error('--comparar recebe BASE ou BASE ATUAL')
+    if args.comparar and len(args.comparar) == 2:
+        regressoes = comparar(_ler_json(args.comparar[0]), _ler_json(args.comparar[1]), args.limite)
+        return 1 if regressoes and args.falhar_regressao else 0
+
+    resultado = rodar(args)
+    imprimir_resumo(resultado)
+    if args.saida:
+        with open(args.saida, 'w', encoding='utf-8') as arquivo:
+            json.dump(resultado, arquivo, indent=2, ensure_ascii=False)
+        print(f"\n💾 Resultados salvos em {args.saida}")
+
+    if args.comparar:
+        regressoes = comparar(_ler_json(args.comparar[0]), resultado, args.limite)
+        if regressoes and args.falhar_regressao:
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,112 @@
+# cacheFragmentos.py
+"""Cache de fragmentos de template ({% cache %}) com limite LRU
+
+Nos templates:
+
+    {% cache 'questionario', versao_questionario %}
+        ... trecho caro de renderizar ...
+    {% endcache %}
+
+O trecho é renderizado uma vez por combinação de chaves e reaproveitado
+enquanto elas não mudarem. As chaves devem incluir as versões dos dados
+usados pelo trecho (por exemplo, formDB.versao_cache() ou a versão do
+questionário), então uma escrita muda a chave e a versão antiga simplesmente
+deixa de ser usada até sair do cache pelo LRU. A chave inclui o template e a
+linha do bloco (e um número único por bloco compilado), então dois blocos
+com as mesmas chaves não se misturam.
+
+Limites por variáveis de ambiente:
+  CACHE_FRAGMENTOS_MAX_ITENS  (256)   - número de fragmentos
+  CACHE_FRAGMENTOS_MAX_KB     (4096)  - tamanho total do HTML guardado
+"""
+import itertools
+import os
+import threading
+from collections import OrderedDict
+from jinja2 import nodes
+from jinja2.ext import Extension
+
+CACHE_FRAGMENTOS_MAX_ITENS = int(os.environ.get('CACHE_FRAGMENTOS_MAX_ITENS', '256'))
+CACHE_FRAGMENTOS_MAX_KB = int(os.environ.get('CACHE_FRAGMENTOS_MAX_KB', '4096'))
+
+class CacheFragmentos:
+    def __init__(self, max_itens=CACHE_FRAGMENTOS_MAX_ITENS, max_bytes=CACHE_FRAGMENTOS_MAX_KB * 1024):
+        self.max_itens = max(max_itens, 1)
+        self.max_bytes = max_bytes
+        self._itens = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.metricas = {'acertos': 0, 'falhas': 0, 'despejos': 0, 'grandes_demais': 0}
+
+    def obter(self, chave):
+        """Retorna o fragmento guardado (e o marca como usado) ou None"""
+        with self._lock:
+            fragmento = self._itens.get(chave)
+            if fragmento is None:
+                self.metricas['falhas'] += 1
+                return None
+            self._itens.move_to_end(chave)
+            self.metricas['acertos'] += 1
+            return fragmento
+
+    def guardar(self, chave, fragmento):
+        """Guarda o fragmento, despejando os menos usados até caber nos limites"""
+        tamanho = len(fragmento)
+        with self._lock:
+            if tamanho > self.max_bytes:
+                self.metricas['grandes_demais'] += 1
+                return
+            anterior = self._itens.pop(chave, None)
+            if anterior is not None:
+                self._bytes -= len(anterior)
+            self._itens[chave] = fragmento
+            self._bytes += tamanho
+            while len(self._itens) > self.max_itens or self._bytes > self.max_bytes:
+                _, despejado = self._itens.popitem(last=False)
+                self._bytes -= len(despejado)
+                self.metricas['despejos'] += 1
+
+    def limpar(self):
+        with self._lock:
+            self._itens.clear()
+            self._bytes = 0
+
+    def estatisticas(self):
+        """Retorna ocupação e contadores do cache"""
+        with self._lock:
+            dados = dict(self.metricas)
+            dados.update(itens=len(self._itens), bytes=self._bytes,
+                         max_itens=self.max_itens, max_bytes=self.max_bytes)
+        consultas = dados['acertos'] + dados['falhas']
+        dados['taxa_acertos'] = round(dados['acertos'] / consultas, 4) if consultas else 0.0
+        return dados
+
+class ExtensaoCache(Extension):
+    """Tag {% cache chave1, chave2, ... %} ... {% endcache %}"""
+    tags = {'cache'}
+
+    def __init__(self, environment):
+        super().__init__(environment)
+        environment.extend(cache_fragmentos=CacheFragmentos())
+        self._blocos = itertools.count()
+
+    def parse(self, parser):
+        linha = next(parser.stream).lineno
+        chaves = [parser.parse_expression()]
+        while parser.stream.skip_if('comma'):
+            chaves.append(parser.parse_expression())
+        corpo = parser.parse_statements(['name:endcache'], drop_needle=True)
+        # O template, a linha e o número do bloco fazem parte da chave
+        local = nodes.Const(f"{parser.name}:{linha}:{next(self._blocos)}")
+        return nodes.CallBlock(
+            self.call_method('_renderizar', [local, nodes.List(chaves)]), [], [], corpo
+        ).set_lineno(linha)
+
+    def _renderizar(self, local, chaves, caller):
+        cache = self.environment.cache_fragmentos
+        chave = repr((local, chaves))
+        fragmento = cache.obter(chave)
+        if fragmento is None:
+            fragmento = caller()
+            cache.guardar(chave, fragmento)
+        return fragmento
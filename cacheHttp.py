@@ -0,0 +1,94 @@
+# cacheHttp.py
+"""GET condicional (ETag / Last-Modified) para as rotas de leitura da API
+
+O decorador get_condicional recebe "fontes de versão": funções que retornam
+(versão, horário da última alteração), como cadDB.versao_cache('escola') ou
+formDB.versao_cache(). O ETag é calculado a partir dessas versões antes de
+a rota rodar, então um If-None-Match (ou If-Modified-Since) que ainda vale
+é respondido com 304 sem consultar as tabelas nem serializar nada.
+
+As versões incluem contadores mantidos por triggers no próprio banco, então
+escritas de outros processos (outros workers, populate_user_responses.py)
+também as mudam. Eles só são relidos quando o PRAGMA data_version muda;
+sem commits novos, a fonte custa uma leitura desse PRAGMA. O ETag inclui um
+identificador da execução, então os contadores locais recomeçarem do zero
+não gera colisões.
+"""
+import hashlib
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from functools import wraps
+from flask import request, make_response, Response
+
+# Identifica esta execução do processo
+_EXECUCAO = f"{os.getpid():x}.{time.time_ns():x}"
+
+# Sempre revalidar: o cliente guarda a resposta mas pergunta se mudou
+CACHE_CONTROL = 'no-cache'
+
+_lock_metricas = threading.Lock()
+metricas = {'nao_modificadas': 0, 'completas': 0}
+
+def dia_atual():
+    """Fonte de versão para respostas que dependem da data de hoje (UTC)"""
+    hoje = int(time.time()) // 86400
+    return hoje, hoje * 86400
+
+def _calcular_etag(versoes):
+    """ETag das versões para a URL e o Accept desta requisição"""
+    chave = repr((_EXECUCAO, request.full_path, request.headers.get('Accept', ''), versoes))
+    return hashlib.blake2b(chave.encode('utf-8'), digest_size=12).hexdigest()
+
+def _nao_modificada(etag, ultima_alteracao):
+    """True se a cópia do cliente (If-None-Match ou If-Modified-Since) ainda vale"""
+    if request.if_none_match:
+        # If-None-Match tem precedência: If-Modified-Since é ignorado
+        return request.if_none_match.contains_weak(etag)
+    if request.if_modified_since:
+        return int(ultima_alteracao) <= request.if_modified_since.timestamp()
+    return False
+
+def _contar(metrica):
+    with _lock_metricas:
+        metricas[metrica] += 1
+
+def get_condicional(*fontes):
+    """Decorador: responde 304 quando as fontes de versão não mudaram desde a cópia do cliente"""
+    def decorador(view):
+        @wraps(view)
+        def rota(*args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view(*args, **kwargs)
+
+            versoes = tuple(fonte() for fonte in fontes)
+            etag = _calcular_etag(tuple(versao for versao, _ in versoes))
+            ultima_alteracao = max(alteracao for _, alteracao in versoes)
+
+            if _nao_modificada(etag, ultima_alteracao):
+                resposta = Response(status=304)
+                _contar('nao_modificadas')
+            else:
+                resposta = make_response(view(*args, **kwargs))
+                # Erros não recebem validadores: o cliente deve tentar de novo
+                if resposta.status_code != 200:
+                    return resposta
+                _contar('completas')
+
+            # Fraco: o corpo pode ser recomprimido ou gerado em pedaços diferentes
+            resposta.set_etag(etag, weak=True)
+            resposta.last_modified = datetime.fromtimestamp(int(ultima_alteracao), tz=timezone.utc)
+            resposta.headers['Cache-Control'] = CACHE_CONTROL
+            resposta.vary.add('Accept')
+            return resposta
+        return rota
+    return decorador
+
+def estatisticas():
+    """Retorna quantas respostas foram 304 e quantas foram completas"""
+    with _lock_metricas:
+        dados = dict(metricas)
+    total = dados['nao_modificadas'] + dados['completas']
+    dados['taxa_304'] = round(dados['nao_modificadas'] / total, 4) if total else 0.0
+    return dados
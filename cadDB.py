@@ -1,159 +1,568 @@
-import sqlite3
 import os
+import json
+import math
+import base64
+import re
+import threading
+import time
+from datetime import datetime, timedelta
+from conexaoDB import PoolConexoes
+
+# Paginação por cursor (keyset): cada página é uma varredura limitada do índice
+LIMITE_PADRAO_PAGINA = 50
+LIMITE_MAXIMO_PAGINA = 500
+
+# Tabelas com contagem mantida por triggers na tabela ContadoresTabelas
+TABELAS_CONTADAS = ('escola', 'usuario', 'publicacao', 'comentario')
+
+# Índices de texto completo (FTS5 com conteúdo externo), sincronizados por triggers:
+# tabela -> (tabela FTS, chave primária, colunas indexadas)
+INDICES_BUSCA = {
+    'publicacao': ('publicacao_fts', 'id_publi', ('titulo_publi', 'texto_publi')),
+    'comentario': ('comentario_fts', 'id_coment', ('texto_coment',)),
+}
+
+# Marcadores dos termos encontrados nos trechos retornados pela busca
+MARCA_INICIO_TRECHO = '«'
+MARCA_FIM_TRECHO = '»'
+
+def montar_consulta_fts(termo):
+    """Converte o texto digitado numa consulta FTS5 segura
+    
+    Cada palavra vira um termo entre aspas (todas precisam aparecer) e a
+    última também casa como prefixo, para funcionar enquanto se digita.
+    Levanta ValueError se não houver nenhuma palavra.
+    """
+    palavras = re.findall(r'\w+', termo or '')
+    if not palavras:
+        raise ValueError('Informe um termo de busca')
+    termos = [f'"{palavra}"' for palavra in palavras]
+    termos[-1] += '*'
+    return ' '.join(termos)
+
+def _normalizar_data_filtro(valor):
+    """Valida uma data AAAA-MM-DD do filtro de busca; levanta ValueError se inválida"""
+    if not valor:
+        return None
+    return datetime.strptime(valor, '%Y-%m-%d').date()
+
+# Linhas lidas por fetchmany nos métodos iterar_*
+TAMANHO_LOTE_LEITURA = 500
+
+# Por quanto tempo o resumo da página inicial fica em cache
+PAINEL_CACHE_SEGUNDOS = float(os.environ.get('PAINEL_CACHE_SEGUNDOS', '5'))
+
+def codificar_cursor(chave):
+    """Cursor opaco com a chave de ordenação (valor, id) da última linha da página"""
+    return base64.urlsafe_b64encode(json.dumps(chave).encode()).decode().rstrip('=')
+
+def decodificar_cursor(cursor):
+    """Retorna a chave (valor, id) do cursor; levanta ValueError se for inválido"""
+    try:
+        chave = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+    except Exception:
+        raise ValueError('Cursor inválido')
+    if not isinstance(chave, list) or len(chave) != 2:
+        raise ValueError('Cursor inválido')
+    valor, id_ = chave
+    # Só escalares chegam ao bind: listas, objetos, bool ou NaN viram 400, não página vazia
+    if not isinstance(id_, int) or isinstance(id_, bool):
+        raise ValueError('Cursor inválido')
+    if not isinstance(valor, (str, int, float)) or isinstance(valor, bool):
+        raise ValueError('Cursor inválido')
+    if isinstance(valor, float) and not math.isfinite(valor):
+        raise ValueError('Cursor inválido')
+    return chave
+
+def normalizar_limite(limite):
+    """Limita o tamanho da página ao intervalo permitido"""
+    try:
+        limite = int(limite)
+    except (TypeError, ValueError):
+        raise ValueError('Limite inválido')
+    return max(1, min(limite, LIMITE_MAXIMO_PAGINA))
+
+def _montar_pagina(linhas, limite, colunas_chave):
+    """Separa a página e calcula o próximo cursor (None na última página)"""
+    itens = linhas[:limite]
+    proximo = None
+    if len(linhas) > limite:
+        ultima = itens[-1]
+        proximo = codificar_cursor([ultima[coluna] for coluna in colunas_chave])
+    return {'itens': itens, 'next_cursor': proximo}
 
 class Database:
     def __init__(self, db_name='cad.db'):
         self.db_name = db_name
-        self.connection = None
+        self.pool = None
+        # Resumo da página inicial em cache: (expira_em, dados)
+        self._resumo_painel = None
+        self._lock_resumo_painel = threading.Lock()
+        # Versão e horário da última alteração de cada tabela (usados pelo
+        # cacheHttp): o contador local dos métodos de escrita e a versão de
+        # VersaoTabelas, vista por todos os processos e relida só quando o
+        # PRAGMA data_version muda
+        self._versoes = dict.fromkeys(TABELAS_CONTADAS, 0)
+        self._versoes_banco = None
+        self._versao_dados_vista = None
+        self._alteracoes = dict.fromkeys(TABELAS_CONTADAS, time.time())
+        self._lock_versoes = threading.Lock()
         self.connect()
         self.create_tables()
         self.insert_initial_data()
     
     def connect(self):
-        """Conecta ao banco de dados SQLite"""
+        """Cria o pool de conexões (uma por thread, em modo WAL)"""
         try:
-            self.connection = sqlite3.connect(self.db_name, check_same_thread=False)
-            self.connection.row_factory = sqlite3.Row
-            print("✅ Conectado ao SQLite (cadDB) com sucesso!")
+            self.pool = PoolConexoes(self.db_name)
+            print(f"✅ Conectado ao SQLite (cadDB) com sucesso! (journal: {self.pool.modo_journal})")
         except Exception as e:
             print(f"❌ Erro ao conectar ao SQLite (cadDB): {e}")
     
+    @property
+    def connection(self):
+        """Conexão da thread atual"""
+        return self.pool.conexao() if self.pool else None
+    
     def create_tables(self):
         """Cria todas as tabelas necessárias para o sistema de escolas"""
         try:
-            cursor = self.connection.cursor()
+            with self.pool.escrita() as conexao:
+                cursor = conexao.cursor()
             
-            # Tabela Escola
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS escola (
-                    id_escola INTEGER PRIMARY KEY AUTOINCREMENT,
-                    nome_escola TEXT NOT NULL,
-                    categoria_escola TEXT NOT NULL CHECK(categoria_escola IN ('publica', 'privada')),
-                    uf_escola TEXT NOT NULL,
-                    bairro_escola TEXT NOT NULL
-                )
-            ''')
+                # Tabela Escola
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS escola (
+                        id_escola INTEGER PRIMARY KEY AUTOINCREMENT,
+                        nome_escola TEXT NOT NULL,
+                        categoria_escola TEXT NOT NULL CHECK(categoria_escola IN ('publica', 'privada')),
+                        uf_escola TEXT NOT NULL,
+                        bairro_escola TEXT NOT NULL
+                    )
+                ''')
             
-            # Tabela Usuario
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS usuario (
-                    id_user INTEGER PRIMARY KEY AUTOINCREMENT,
-                    id_escola INTEGER NOT NULL,
-                    nome_user TEXT NOT NULL,
-                    username_user TEXT UNIQUE NOT NULL,
-                    email_user TEXT UNIQUE NOT NULL,
-                    criado_user TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (id_escola) REFERENCES escola(id_escola)
-                )
-            ''')
+                # Tabela Usuario
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS usuario (
+                        id_user INTEGER PRIMARY KEY AUTOINCREMENT,
+                        id_escola INTEGER NOT NULL,
+                        nome_user TEXT NOT NULL,
+                        username_user TEXT UNIQUE NOT NULL,
+                        email_user TEXT UNIQUE NOT NULL,
+                        criado_user TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                        FOREIGN KEY (id_escola) REFERENCES escola(id_escola)
+                    )
+                ''')
             
-            # Tabela Publicacao
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS publicacao (
-                    id_publi INTEGER PRIMARY KEY AUTOINCREMENT,
-                    id_user INTEGER NOT NULL,
-                    id_escola INTEGER NOT NULL,
-                    titulo_publi TEXT NOT NULL,
-                    texto_publi TEXT NOT NULL,
-                    data_publi TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    resolvido_publi BOOLEAN DEFAULT FALSE,
-                    FOREIGN KEY (id_user) REFERENCES usuario(id_user),
-                    FOREIGN KEY (id_escola) REFERENCES escola(id_escola)
-                )
-            ''')
+                # Tabela Publicacao
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS publicacao (
+                        id_publi INTEGER PRIMARY KEY AUTOINCREMENT,
+                        id_user INTEGER NOT NULL,
+                        id_escola INTEGER NOT NULL,
+                        titulo_publi TEXT NOT NULL,
+                        texto_publi TEXT NOT NULL,
+                        data_publi TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                        resolvido_publi BOOLEAN DEFAULT FALSE,
+                        total_coment_publi INTEGER NOT NULL DEFAULT 0,
+                        ultimo_coment_publi TIMESTAMP,
+                        FOREIGN KEY (id_user) REFERENCES usuario(id_user),
+                        FOREIGN KEY (id_escola) REFERENCES escola(id_escola)
+                    )
+                ''')
             
-            # Tabela Comentario
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS comentario (
-                    id_coment INTEGER PRIMARY KEY AUTOINCREMENT,
-                    id_publi INTEGER NOT NULL,
-                    id_user INTEGER NOT NULL,
-                    texto_coment TEXT NOT NULL,
-                    data_coment TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (id_publi) REFERENCES publicacao(id_publi) ON DELETE CASCADE,
-                    FOREIGN KEY (id_user) REFERENCES usuario(id_user)
+                # Tabela Comentario
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS comentario (
+                        id_coment INTEGER PRIMARY KEY AUTOINCREMENT,
+                        id_publi INTEGER NOT NULL,
+                        id_user INTEGER NOT NULL,
+                        texto_coment TEXT NOT NULL,
+                        data_coment TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                        FOREIGN KEY (id_publi) REFERENCES publicacao(id_publi) ON DELETE CASCADE,
+                        FOREIGN KEY (id_user) REFERENCES usuario(id_user)
+                    )
+                ''')
+            
+                # Banco antigo: acrescentar as colunas de comentários da publicação
+                cursor.execute("PRAGMA table_info(publicacao)")
+                colunas_publicacao = {row['name'] for row in cursor.fetchall()}
+                contagem_comentarios_existia = 'total_coment_publi' in colunas_publicacao
+                if not contagem_comentarios_existia:
+                    cursor.execute(
+                        "ALTER TABLE publicacao ADD COLUMN total_coment_publi INTEGER NOT NULL DEFAULT 0"
+                    )
+                if 'ultimo_coment_publi' not in colunas_publicacao:
+                    cursor.execute("ALTER TABLE publicacao ADD COLUMN ultimo_coment_publi TIMESTAMP")
+            
+                # Criar índices para melhor performance
+                cursor.execute('CREATE INDEX IF NOT EXISTS idx_usuario_escola ON usuario(id_escola)')
+                cursor.execute('CREATE INDEX IF NOT EXISTS idx_publicacao_usuario ON publicacao(id_user)')
+                cursor.execute('CREATE INDEX IF NOT EXISTS idx_publicacao_escola ON publicacao(id_escola)')
+                cursor.execute('CREATE INDEX IF NOT EXISTS idx_comentario_publicacao ON comentario(id_publi)')
+                cursor.execute('CREATE INDEX IF NOT EXISTS idx_comentario_usuario ON comentario(id_user)')
+            
+                # Índices para as ordenações das listagens (ver verificar_planos.py)
+                cursor.execute('CREATE INDEX IF NOT EXISTS idx_escola_nome ON escola(nome_escola)')
+                cursor.execute('CREATE INDEX IF NOT EXISTS idx_usuario_nome ON usuario(nome_user)')
+                cursor.execute('CREATE INDEX IF NOT EXISTS idx_usuario_escola_nome ON usuario(id_escola, nome_user)')
+                cursor.execute('CREATE INDEX IF NOT EXISTS idx_publicacao_data ON publicacao(data_publi)')
+                cursor.execute('CREATE INDEX IF NOT EXISTS idx_publicacao_escola_data ON publicacao(id_escola, data_publi)')
+                cursor.execute('CREATE INDEX IF NOT EXISTS idx_comentario_publicacao_data ON comentario(id_publi, data_coment)')
+            
+                # Contagem de linhas por tabela, mantida pelos triggers abaixo,
+                # para que a página inicial não precise de COUNT(*) em tabelas grandes
+                cursor.execute(
+                    "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'ContadoresTabelas'"
                 )
-            ''')
+                contadores_existiam = cursor.fetchone() is not None
+            
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS ContadoresTabelas (
+                        tabela TEXT PRIMARY KEY,
+                        total INTEGER NOT NULL DEFAULT 0
+                    )
+                ''')
+            
+                for tabela in TABELAS_CONTADAS:
+                    cursor.execute(f'''
+                        CREATE TRIGGER IF NOT EXISTS trg_contador_{tabela}_insert
+                        AFTER INSERT ON {tabela}
+                        BEGIN
+                            INSERT INTO ContadoresTabelas (tabela, total) VALUES ('{tabela}', 1)
+                            ON CONFLICT(tabela) DO UPDATE SET total = total + 1;
+                        END
+                    ''')
+                    cursor.execute(f'''
+                        CREATE TRIGGER IF NOT EXISTS trg_contador_{tabela}_delete
+                        AFTER DELETE ON {tabela}
+                        BEGIN
+                            UPDATE ContadoresTabelas SET total = total - 1 WHERE tabela = '{tabela}';
+                        END
+                    ''')
+            
+                # Tabela VersaoTabelas: contador de alterações por tabela,
+                # incrementado por triggers (ETag/Last-Modified do cacheHttp
+                # mudam também com escritas de outros processos)
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS VersaoTabelas (
+                        tabela TEXT PRIMARY KEY,
+                        versao INTEGER NOT NULL DEFAULT 0
+                    )
+                ''')
             
-            # Criar índices para melhor performance
-            cursor.execute('CREATE INDEX IF NOT EXISTS idx_usuario_escola ON usuario(id_escola)')
-            cursor.execute('CREATE INDEX IF NOT EXISTS idx_publicacao_usuario ON publicacao(id_user)')
-            cursor.execute('CREATE INDEX IF NOT EXISTS idx_publicacao_escola ON publicacao(id_escola)')
-            cursor.execute('CREATE INDEX IF NOT EXISTS idx_comentario_publicacao ON comentario(id_publi)')
-            cursor.execute('CREATE INDEX IF NOT EXISTS idx_comentario_usuario ON comentario(id_user)')
+                for tabela in TABELAS_CONTADAS:
+                    for evento in ('INSERT', 'UPDATE', 'DELETE'):
+                        cursor.execute(f'''
+                            CREATE TRIGGER IF NOT EXISTS trg_versao_{tabela}_{evento.lower()}
+                            AFTER {evento} ON {tabela}
+                            BEGIN
+                                INSERT INTO VersaoTabelas (tabela, versao) VALUES ('{tabela}', 1)
+                                ON CONFLICT(tabela) DO UPDATE SET versao = versao + 1;
+                            END
+                        ''')
             
-            self.connection.commit()
+                # Total e data do último comentário de cada publicação, mantidos
+                # na mesma transação da escrita do comentário
+                cursor.execute('''
+                    CREATE TRIGGER IF NOT EXISTS trg_comentarios_publicacao_insert
+                    AFTER INSERT ON comentario
+                    BEGIN
+                        UPDATE publicacao
+                        SET total_coment_publi = total_coment_publi + 1,
+                            ultimo_coment_publi = CASE
+                                WHEN ultimo_coment_publi IS NULL OR NEW.data_coment > ultimo_coment_publi
+                                THEN NEW.data_coment ELSE ultimo_coment_publi END
+                        WHERE id_publi = NEW.id_publi;
+                    END
+                ''')
+                cursor.execute('''
+                    CREATE TRIGGER IF NOT EXISTS trg_comentarios_publicacao_delete
+                    AFTER DELETE ON comentario
+                    BEGIN
+                        UPDATE publicacao
+                        SET total_coment_publi = total_coment_publi - 1,
+                            ultimo_coment_publi = (SELECT MAX(data_coment) FROM comentario
+                                                   WHERE id_publi = OLD.id_publi)
+                        WHERE id_publi = OLD.id_publi;
+                    END
+                ''')
+            
+                # Índices de busca textual das publicações e comentários
+                cursor.execute(
+                    "SELECT name FROM sqlite_master WHERE type = 'table' AND name IN ('publicacao_fts', 'comentario_fts')"
+                )
+                indices_busca_existentes = {row[0] for row in cursor.fetchall()}
+            
+                for tabela, (tabela_fts, chave, colunas) in INDICES_BUSCA.items():
+                    lista_colunas = ', '.join(colunas)
+                    novos = ', '.join(f'NEW.{coluna}' for coluna in colunas)
+                    antigos = ', '.join(f'OLD.{coluna}' for coluna in colunas)
+                    cursor.execute(f'''
+                        CREATE VIRTUAL TABLE IF NOT EXISTS {tabela_fts} USING fts5(
+                            {lista_colunas},
+                            content='{tabela}', content_rowid='{chave}',
+                            tokenize='unicode61 remove_diacritics 2'
+                        )
+                    ''')
+                    cursor.execute(f'''
+                        CREATE TRIGGER IF NOT EXISTS trg_busca_{tabela}_insert
+                        AFTER INSERT ON {tabela}
+                        BEGIN
+                            INSERT INTO {tabela_fts} (rowid, {lista_colunas}) VALUES (NEW.{chave}, {novos});
+                        END
+                    ''')
+                    cursor.execute(f'''
+                        CREATE TRIGGER IF NOT EXISTS trg_busca_{tabela}_delete
+                        AFTER DELETE ON {tabela}
+                        BEGIN
+                            INSERT INTO {tabela_fts} ({tabela_fts}, rowid, {lista_colunas})
+                            VALUES ('delete', OLD.{chave}, {antigos});
+                        END
+                    ''')
+                    cursor.execute(f'''
+                        CREATE TRIGGER IF NOT EXISTS trg_busca_{tabela}_update
+                        AFTER UPDATE OF {lista_colunas} ON {tabela}
+                        BEGIN
+                            INSERT INTO {tabela_fts} ({tabela_fts}, rowid, {lista_colunas})
+                            VALUES ('delete', OLD.{chave}, {antigos});
+                            INSERT INTO {tabela_fts} (rowid, {lista_colunas}) VALUES (NEW.{chave}, {novos});
+                        END
+                    ''')
+                    # Banco antigo: indexar o conteúdo que já existe
+                    if tabela_fts not in indices_busca_existentes:
+                        cursor.execute(f"INSERT INTO {tabela_fts} ({tabela_fts}) VALUES ('rebuild')")
+                        print(f"🔎 Índice de busca {tabela_fts} criado")
             print("✅ Tabelas do sistema de escolas criadas/verificadas com sucesso!")
             
+            # Banco antigo sem os contadores: calcular a partir das tabelas
+            if not contadores_existiam or not contagem_comentarios_existia:
+                self.reconstruir_contadores()
+            
         except Exception as e:
             print(f"❌ Erro ao criar tabelas do sistema de escolas: {e}")
     
     def insert_initial_data(self):
         """Insere escolas iniciais"""
         try:
-            cursor = self.connection.cursor()
+            with self.pool.escrita() as conexao:
+                cursor = conexao.cursor()
             
-            # Verificar se já existem escolas para não duplicar
-            cursor.execute("SELECT COUNT(*) FROM escola")
-            count = cursor.fetchone()[0]
-            print(f"📊 Escolas no banco: {count}")
+                # Verificar se já existem escolas para não duplicar
+                cursor.execute("SELECT COUNT(*) FROM escola")
+                count = cursor.fetchone()[0]
+                print(f"📊 Escolas no banco: {count}")
             
-            if count == 0:
-                print("📥 Inserindo escolas iniciais...")
-                
-                escolas_sp = [
-                    ('Escola Estadual Professor Doutor José Augusto Lopes Borges', 'publica', 'SP', 'Butantã'),
-                    ('Colégio Bandeirantes', 'privada', 'SP', 'Morumbi'),
-                    ('Escola Estadual Professor Carlos Alberto de Oliveira', 'publica', 'SP', 'Ipiranga'),
-                    ('Colégio Dante Alighieri', 'privada', 'SP', 'Cerqueira César'),
-                    ('Escola Municipal Professor Lourenço Filho', 'publica', 'SP', 'Tatuapé'),
-                    ('Colégio Santa Cruz', 'privada', 'SP', 'Alto de Pinheiros'),
-                    ('Escola Estadual Professor Antônio Maria Moura', 'publica', 'SP', 'Vila Mariana'),
-                    ('Colégio Vértice', 'privada', 'SP', 'Campo Belo'),
-                    ('Escola Municipal Professor Anísio Teixeira', 'publica', 'SP', 'Jardim Ângela'),
-                    ('Colégio Magno', 'privada', 'SP', 'Jardim Marajoara'),
-                    ('Fundação Escola de Comércio Álvares Penteado', 'privada', 'SP', 'Liberdade')
-                ]
+                if count == 0:
+                    print("📥 Inserindo escolas iniciais...")
                 
-                escolas_rj = [
-                    ('Colégio Santo Inácio', 'privada', 'RJ', 'Botafogo'),
-                    ('Escola Municipal Francis Hime', 'publica', 'RJ', 'Jacarepaguá'),
-                    ('Colégio pH', 'privada', 'RJ', 'Leblon'),
-                    ('Escola Estadual Orsina da Fonseca', 'publica', 'RJ', 'Tijuca'),
-                    ('Colégio Cruzeiro', 'privada', 'RJ', 'Centro'),
-                    ('Escola Municipal Pernambuco', 'publica', 'RJ', 'Higienópolis'),
-                    ('Colégio São Bento', 'privada', 'RJ', 'Centro'),
-                    ('Escola Estadual Professor Augusto Ruschi', 'publica', 'RJ', 'Tijuca'),
-                    ('Colégio Mopi', 'privada', 'RJ', 'Tijuca'),
-                    ('Escola Municipal Chile', 'publica', 'RJ', 'Copacabana')
-                ]
+                    escolas_sp = [
+                        ('Escola Estadual Professor Doutor José Augusto Lopes Borges', 'publica', 'SP', 'Butantã'),
+                        ('Colégio Bandeirantes', 'privada', 'SP', 'Morumbi'),
+                        ('Escola Estadual Professor Carlos Alberto de Oliveira', 'publica', 'SP', 'Ipiranga'),
+                        ('Colégio Dante Alighieri', 'privada', 'SP', 'Cerqueira César'),
+                        ('Escola Municipal Professor Lourenço Filho', 'publica', 'SP', 'Tatuapé'),
+                        ('Colégio Santa Cruz', 'privada', 'SP', 'Alto de Pinheiros'),
+                        ('Escola Estadual Professor Antônio Maria Moura', 'publica', 'SP', 'Vila Mariana'),
+                        ('Colégio Vértice', 'privada', 'SP', 'Campo Belo'),
+                        ('Escola Municipal Professor Anísio Teixeira', 'publica', 'SP', 'Jardim Ângela'),
+                        ('Colégio Magno', 'privada', 'SP', 'Jardim Marajoara'),
+                        ('Fundação Escola de Comércio Álvares Penteado', 'privada', 'SP', 'Liberdade')
+                    ]
                 
-                cursor.executemany(
-                    "INSERT INTO escola (nome_escola, categoria_escola, uf_escola, bairro_escola) VALUES (?, ?, ?, ?)",
-                    escolas_sp + escolas_rj
-                )
+                    escolas_rj = [
+                        ('Colégio Santo Inácio', 'privada', 'RJ', 'Botafogo'),
+                        ('Escola Municipal Francis Hime', 'publica', 'RJ', 'Jacarepaguá'),
+                        ('Colégio pH', 'privada', 'RJ', 'Leblon'),
+                        ('Escola Estadual Orsina da Fonseca', 'publica', 'RJ', 'Tijuca'),
+                        ('Colégio Cruzeiro', 'privada', 'RJ', 'Centro'),
+                        ('Escola Municipal Pernambuco', 'publica', 'RJ', 'Higienópolis'),
+                        ('Colégio São Bento', 'privada', 'RJ', 'Centro'),
+                        ('Escola Estadual Professor Augusto Ruschi', 'publica', 'RJ', 'Tijuca'),
+                        ('Colégio Mopi', 'privada', 'RJ', 'Tijuca'),
+                        ('Escola Municipal Chile', 'publica', 'RJ', 'Copacabana')
+                    ]
                 
-                self.connection.commit()
-                print("✅ Escolas iniciais inseridas com sucesso!")
-            else:
-                print("✅ Escolas já existem no banco.")
+                    cursor.executemany(
+                        "INSERT INTO escola (nome_escola, categoria_escola, uf_escola, bairro_escola) VALUES (?, ?, ?, ?)",
+                        escolas_sp + escolas_rj
+                    )
+                    print("✅ Escolas iniciais inseridas com sucesso!")
+                else:
+                    print("✅ Escolas já existem no banco.")
             
         except Exception as e:
             print(f"❌ Erro ao inserir escolas iniciais: {e}")
     
+    def reconstruir_contadores(self):
+        """Recalcula a tabela ContadoresTabelas e os totais de comentários de cada publicação"""
+        try:
+            with self.pool.escrita() as conexao:
+                cursor = conexao.cursor()
+                cursor.execute("DELETE FROM ContadoresTabelas")
+                for tabela in TABELAS_CONTADAS:
+                    cursor.execute(
+                        f"INSERT INTO ContadoresTabelas (tabela, total) SELECT '{tabela}', COUNT(*) FROM {tabela}"
+                    )
+                cursor.execute('''
+                    UPDATE publicacao
+                    SET total_coment_publi = (SELECT COUNT(*) FROM comentario c
+                                              WHERE c.id_publi = publicacao.id_publi),
+                        ultimo_coment_publi = (SELECT MAX(data_coment) FROM comentario c
+                                               WHERE c.id_publi = publicacao.id_publi)
+                ''')
+            self._registrar_alteracao('publicacao')
+            print("🔄 Contadores das tabelas reconstruídos")
+            return True
+        except Exception as e:
+            print(f"❌ Erro ao reconstruir contadores: {e}")
+            return False
+    
+    def _iterar_consulta(self, sql, params=()):
+        """Executa a consulta e gera as linhas em lotes de fetchmany
+        
+        A memória usada não depende do número de linhas. Erros durante a
+        iteração são propagados para quem estiver consumindo o gerador.
+        """
+        cursor = self.connection.cursor()
+        try:
+            cursor.execute(sql, params)
+            while True:
+                linhas = cursor.fetchmany(TAMANHO_LOTE_LEITURA)
+                if not linhas:
+                    break
+                for row in linhas:
+                    yield dict(row)
+        finally:
+            cursor.close()
+    
+    # ========== RESUMO DA PÁGINA INICIAL ==========
+    
+    def buscar_resumo_painel(self):
+        """Totais e últimas publicações para a página inicial
+        
+        Os totais vêm de ContadoresTabelas e as publicações de uma consulta
+        LIMIT 5 no índice de data, então o custo não depende do tamanho das
+        tabelas. O resultado fica em cache por PAINEL_CACHE_SEGUNDOS.
+        """
+        agora = time.monotonic()
+        cache = self._resumo_painel
+        if cache and cache[0] > agora:
+            return cache[1]
+        
+        with self._lock_resumo_painel:
+            cache = self._resumo_painel
+            if cache and cache[0] > time.monotonic():
+                return cache[1]
+            try:
+                cursor = self.connection.cursor()
+                cursor.execute(
+                    f"SELECT tabela, total FROM ContadoresTabelas WHERE tabela IN ({', '.join('?' * len(TABELAS_CONTADAS))})",
+                    TABELAS_CONTADAS
+                )
+                totais = {row['tabela']: row['total'] for row in cursor.fetchall()}
+                resumo = {
+                    'total_escolas': totais.get('escola', 0),
+                    'total_usuarios': totais.get('usuario', 0),
+                    'total_publicacoes': totais.get('publicacao', 0),
+                    'total_comentarios': totais.get('comentario', 0),
+                    'ultimas_publicacoes': self.buscar_publicacoes_pagina(5)['itens']
+                }
+                self._resumo_painel = (time.monotonic() + PAINEL_CACHE_SEGUNDOS, resumo)
+                return resumo
+            except Exception as e:
+                print(f"❌ Erro ao buscar resumo da página inicial: {e}")
+                return {
+                    'total_escolas': 0,
+                    'total_usuarios': 0,
+                    'total_publicacoes': 0,
+                    'total_comentarios': 0,
+                    'ultimas_publicacoes': []
+                }
+    
+    def _invalidar_resumo_painel(self):
+        """Descarta o resumo em cache após uma escrita deste processo"""
+        self._resumo_painel = None
+    
+    def _registrar_alteracao(self, *tabelas):
+        """Incrementa a versão das tabelas alteradas e descarta o resumo em cache"""
+        with self._lock_versoes:
+            agora = time.time()
+            for tabela in tabelas:
+                self._versoes[tabela] += 1
+                self._alteracoes[tabela] = agora
+        self._invalidar_resumo_painel()
+    
+    def versao_cache(self, *tabelas):
+        """Retorna (versões, horário da última alteração) das tabelas
+        
+        Cada versão junta o contador local à de VersaoTabelas, que os triggers
+        incrementam em escritas de qualquer processo. VersaoTabelas só é
+        relida quando o PRAGMA data_version muda; fora isso, sai da memória.
+        """
+        try:
+            dados = self.pool.versao_dados()
+        except Exception as e:
+            print(f"❌ Erro ao ler o PRAGMA data_version (cadDB): {e}")
+            dados = None
+        with self._lock_versoes:
+            if dados is None or dados != self._versao_dados_vista:
+                versoes_banco = self._ler_versoes_banco()
+                if self._versoes_banco is not None:
+                    agora = time.time()
+                    for tabela in TABELAS_CONTADAS:
+                        if versoes_banco[tabela] != self._versoes_banco[tabela]:
+                            self._alteracoes[tabela] = agora
+                self._versoes_banco = versoes_banco
+                self._versao_dados_vista = dados
+            return (
+                tuple((self._versoes[tabela], self._versoes_banco[tabela]) for tabela in tabelas),
+                max(self._alteracoes[tabela] for tabela in tabelas)
+            )
+    
+    def _ler_versoes_banco(self):
+        """Versões de VersaoTabelas; em caso de erro, valores únicos que invalidam os caches"""
+        try:
+            cursor = self.connection.cursor()
+            cursor.execute("SELECT tabela, versao FROM VersaoTabelas")
+            versoes = {row['tabela']: row['versao'] for row in cursor.fetchall()}
+            return {tabela: versoes.get(tabela, 0) for tabela in TABELAS_CONTADAS}
+        except Exception as e:
+            print(f"❌ Erro ao ler VersaoTabelas (cadDB): {e}")
+            return dict.fromkeys(TABELAS_CONTADAS, time.time_ns())
+    
     # ========== MÉTODOS PARA ESCOLAS ==========
     
+    def iterar_escolas(self):
+        """Itera todas as escolas sem carregar a lista inteira na memória"""
+        return self._iterar_consulta("SELECT * FROM escola ORDER BY nome_escola")
+    
     def buscar_escolas(self):
         """Busca todas as escolas"""
         try:
-            cursor = self.connection.cursor()
-            cursor.execute("SELECT * FROM escola ORDER BY nome_escola")
-            escolas = [dict(row) for row in cursor.fetchall()]
-            return escolas
+            return list(self.iterar_escolas())
         except Exception as e:
             print(f"❌ Erro ao buscar escolas: {e}")
             return []
     
+    def buscar_escolas_pagina(self, limite=LIMITE_PADRAO_PAGINA, apos=None):
+        """Página de escolas ordenadas por nome, a partir do cursor 'apos'"""
+        limite = normalizar_limite(limite)
+        chave = decodificar_cursor(apos) if apos else None
+        try:
+            cursor = self.connection.cursor()
+            cursor.execute(f'''
+                SELECT * FROM escola
+                {"WHERE (nome_escola, id_escola) > (?, ?)" if chave else ""}
+                ORDER BY nome_escola, id_escola
+                LIMIT ?
+            ''', (*(chave or ()), limite + 1))
+            linhas = [dict(row) for row in cursor.fetchall()]
+            return _montar_pagina(linhas, limite, ('nome_escola', 'id_escola'))
+        except Exception as e:
+            print(f"❌ Erro ao buscar página de escolas: {e}")
+            return {'itens': [], 'next_cursor': None}
+    
     def buscar_escola_por_id(self, id_escola):
         """Busca uma escola específica por ID"""
         try:
@@ -168,12 +577,13 @@ class Database:
     def criar_escola(self, nome_escola, categoria_escola, uf_escola, bairro_escola):
         """Cria uma nova escola"""
         try:
-            cursor = self.connection.cursor()
-            cursor.execute(
-                "INSERT INTO escola (nome_escola, categoria_escola, uf_escola, bairro_escola) VALUES (?, ?, ?, ?)",
-                (nome_escola, categoria_escola, uf_escola, bairro_escola)
-            )
-            self.connection.commit()
+            with self.pool.escrita() as conexao:
+                cursor = conexao.cursor()
+                cursor.execute(
+                    "INSERT INTO escola (nome_escola, categoria_escola, uf_escola, bairro_escola) VALUES (?, ?, ?, ?)",
+                    (nome_escola, categoria_escola, uf_escola, bairro_escola)
+                )
+            self._registrar_alteracao('escola')
             return cursor.lastrowid
         except Exception as e:
             print(f"❌ Erro ao criar escola: {e}")
@@ -181,20 +591,58 @@ class Database:
     
     # ========== MÉTODOS PARA USUÁRIOS ==========
     
+    def iterar_usuarios(self):
+        """Itera todos os usuários sem carregar a lista inteira na memória"""
+        return self._iterar_consulta('''
+            SELECT u.*, e.nome_escola 
+            FROM usuario u 
+            LEFT JOIN escola e ON u.id_escola = e.id_escola 
+            ORDER BY u.nome_user
+        ''')
+    
     def buscar_usuarios(self):
         """Busca todos os usuários"""
+        try:
+            return list(self.iterar_usuarios())
+        except Exception as e:
+            print(f"❌ Erro ao buscar usuários: {e}")
+            return []
+    
+    def buscar_usuarios_pagina(self, limite=LIMITE_PADRAO_PAGINA, apos=None):
+        """Página de usuários ordenados por nome, a partir do cursor 'apos'"""
+        limite = normalizar_limite(limite)
+        chave = decodificar_cursor(apos) if apos else None
+        try:
+            cursor = self.connection.cursor()
+            cursor.execute(f'''
+                SELECT u.*, e.nome_escola 
+                FROM usuario u 
+                LEFT JOIN escola e ON u.id_escola = e.id_escola 
+                {"WHERE (u.nome_user, u.id_user) > (?, ?)" if chave else ""}
+                ORDER BY u.nome_user, u.id_user
+                LIMIT ?
+            ''', (*(chave or ()), limite + 1))
+            linhas = [dict(row) for row in cursor.fetchall()]
+            return _montar_pagina(linhas, limite, ('nome_user', 'id_user'))
+        except Exception as e:
+            print(f"❌ Erro ao buscar página de usuários: {e}")
+            return {'itens': [], 'next_cursor': None}
+    
+    def buscar_usuarios_por_escola(self, id_escola):
+        """Busca os usuários de uma escola específica"""
         try:
             cursor = self.connection.cursor()
             cursor.execute('''
                 SELECT u.*, e.nome_escola 
                 FROM usuario u 
                 LEFT JOIN escola e ON u.id_escola = e.id_escola 
+                WHERE u.id_escola = ? 
                 ORDER BY u.nome_user
-            ''')
+            ''', (id_escola,))
             usuarios = [dict(row) for row in cursor.fetchall()]
             return usuarios
         except Exception as e:
-            print(f"❌ Erro ao buscar usuários: {e}")
+            print(f"❌ Erro ao buscar usuários da escola: {e}")
             return []
     
     def buscar_usuario_por_id(self, id_user):
@@ -216,12 +664,13 @@ class Database:
     def criar_usuario(self, id_escola, nome_user, username_user, email_user):
         """Cria um novo usuário"""
         try:
-            cursor = self.connection.cursor()
-            cursor.execute(
-                "INSERT INTO usuario (id_escola, nome_user, username_user, email_user) VALUES (?, ?, ?, ?)",
-                (id_escola, nome_user, username_user, email_user)
-            )
-            self.connection.commit()
+            with self.pool.escrita() as conexao:
+                cursor = conexao.cursor()
+                cursor.execute(
+                    "INSERT INTO usuario (id_escola, nome_user, username_user, email_user) VALUES (?, ?, ?, ?)",
+                    (id_escola, nome_user, username_user, email_user)
+                )
+            self._registrar_alteracao('usuario')
             return cursor.lastrowid
         except Exception as e:
             print(f"❌ Erro ao criar usuário: {e}")
@@ -229,22 +678,44 @@ class Database:
     
     # ========== MÉTODOS PARA PUBLICAÇÕES ==========
     
+    def iterar_publicacoes(self):
+        """Itera todas as publicações sem carregar a lista inteira na memória"""
+        return self._iterar_consulta('''
+            SELECT p.*, u.nome_user, e.nome_escola 
+            FROM publicacao p 
+            LEFT JOIN usuario u ON p.id_user = u.id_user 
+            LEFT JOIN escola e ON p.id_escola = e.id_escola 
+            ORDER BY p.data_publi DESC
+        ''')
+    
     def buscar_publicacoes(self):
         """Busca todas as publicações"""
+        try:
+            return list(self.iterar_publicacoes())
+        except Exception as e:
+            print(f"❌ Erro ao buscar publicações: {e}")
+            return []
+    
+    def buscar_publicacoes_pagina(self, limite=LIMITE_PADRAO_PAGINA, apos=None):
+        """Página de publicações (mais recentes primeiro), a partir do cursor 'apos'"""
+        limite = normalizar_limite(limite)
+        chave = decodificar_cursor(apos) if apos else None
         try:
             cursor = self.connection.cursor()
-            cursor.execute('''
+            cursor.execute(f'''
                 SELECT p.*, u.nome_user, e.nome_escola 
                 FROM publicacao p 
                 LEFT JOIN usuario u ON p.id_user = u.id_user 
                 LEFT JOIN escola e ON p.id_escola = e.id_escola 
-                ORDER BY p.data_publi DESC
-            ''')
-            publicacoes = [dict(row) for row in cursor.fetchall()]
-            return publicacoes
+                {"WHERE (p.data_publi, p.id_publi) < (?, ?)" if chave else ""}
+                ORDER BY p.data_publi DESC, p.id_publi DESC
+                LIMIT ?
+            ''', (*(chave or ()), limite + 1))
+            linhas = [dict(row) for row in cursor.fetchall()]
+            return _montar_pagina(linhas, limite, ('data_publi', 'id_publi'))
         except Exception as e:
-            print(f"❌ Erro ao buscar publicações: {e}")
-            return []
+            print(f"❌ Erro ao buscar página de publicações: {e}")
+            return {'itens': [], 'next_cursor': None}
     
     def buscar_publicacao_por_id(self, id_publi):
         """Busca uma publicação específica por ID"""
@@ -266,75 +737,241 @@ class Database:
     def criar_publicacao(self, id_user, id_escola, titulo_publi, texto_publi):
         """Cria uma nova publicação"""
         try:
-            cursor = self.connection.cursor()
-            cursor.execute(
-                "INSERT INTO publicacao (id_user, id_escola, titulo_publi, texto_publi) VALUES (?, ?, ?, ?)",
-                (id_user, id_escola, titulo_publi, texto_publi)
-            )
-            self.connection.commit()
+            with self.pool.escrita() as conexao:
+                cursor = conexao.cursor()
+                cursor.execute(
+                    "INSERT INTO publicacao (id_user, id_escola, titulo_publi, texto_publi) VALUES (?, ?, ?, ?)",
+                    (id_user, id_escola, titulo_publi, texto_publi)
+                )
+            self._registrar_alteracao('publicacao')
             return cursor.lastrowid
         except Exception as e:
             print(f"❌ Erro ao criar publicação: {e}")
             return None
     
+    def iterar_publicacoes_por_escola(self, id_escola):
+        """Itera as publicações de uma escola específica"""
+        return self._iterar_consulta('''
+            SELECT p.*, u.nome_user, p.total_coment_publi AS total_comentarios
+            FROM publicacao p 
+            LEFT JOIN usuario u ON p.id_user = u.id_user 
+            WHERE p.id_escola = ? 
+            ORDER BY p.data_publi DESC
+        ''', (id_escola,))
+    
     def buscar_publicacoes_por_escola(self, id_escola):
         """Busca publicações de uma escola específica"""
+        try:
+            return list(self.iterar_publicacoes_por_escola(id_escola))
+        except Exception as e:
+            print(f"❌ Erro ao buscar publicações da escola: {e}")
+            return []
+    
+    def buscar_resumo_escola(self, id_escola):
+        """Totais de uma escola (usuários, publicações, comentários) e última atividade
+        
+        Tudo calculado no SQL pelos índices por escola, então o custo é
+        proporcional ao tamanho da escola, não da rede inteira.
+        """
         try:
             cursor = self.connection.cursor()
             cursor.execute('''
-                SELECT p.*, u.nome_user 
-                FROM publicacao p 
+                SELECT
+                    (SELECT COUNT(*) FROM usuario WHERE id_escola = :id) AS total_usuarios,
+                    (SELECT COUNT(*) FROM publicacao WHERE id_escola = :id) AS total_publicacoes,
+                    (SELECT COALESCE(SUM(total_coment_publi), 0)
+                     FROM publicacao WHERE id_escola = :id) AS total_comentarios,
+                    NULLIF(MAX(
+                        COALESCE((SELECT MAX(criado_user) FROM usuario WHERE id_escola = :id), ''),
+                        COALESCE((SELECT MAX(data_publi) FROM publicacao WHERE id_escola = :id), ''),
+                        COALESCE((SELECT MAX(ultimo_coment_publi)
+                                  FROM publicacao WHERE id_escola = :id), '')
+                    ), '') AS ultima_atividade
+            ''', {'id': id_escola})
+            return dict(cursor.fetchone())
+        except Exception as e:
+            print(f"❌ Erro ao buscar resumo da escola: {e}")
+            return {
+                'total_usuarios': 0,
+                'total_publicacoes': 0,
+                'total_comentarios': 0,
+                'ultima_atividade': None
+            }
+    
+    # ========== BUSCA TEXTUAL ==========
+    
+    def buscar_texto(self, termo, tipo='publicacoes', id_escola=None, desde=None, ate=None,
+                     limite=LIMITE_PADRAO_PAGINA, apos=None):
+        """Busca publicações ou comentários pelo índice FTS5, ordenados por relevância
+        
+        tipo: 'publicacoes' ou 'comentarios'. desde/ate: datas AAAA-MM-DD
+        (inclusivas). A relevância (bm25) depende das estatísticas do corpus
+        e muda com inserções e exclusões, então não serve de chave de cursor:
+        o cursor guarda (deslocamento, maior id) da primeira página, e as
+        páginas seguintes só veem as linhas que já existiam nela. A paginação
+        da busca é de melhor esforço: exclusões ou mudanças nas estatísticas
+        entre páginas ainda podem deslocar resultados. Cada item traz um trecho com os termos entre
+        MARCA_INICIO_TRECHO e MARCA_FIM_TRECHO (texto sem escape HTML).
+        Levanta ValueError para parâmetros inválidos.
+        """
+        if tipo not in ('publicacoes', 'comentarios'):
+            raise ValueError('Tipo de busca inválido')
+        consulta = montar_consulta_fts(termo)
+        limite = normalizar_limite(limite)
+        chave = decodificar_cursor(apos) if apos else None
+        desde = _normalizar_data_filtro(desde)
+        ate = _normalizar_data_filtro(ate)
+        
+        if tipo == 'publicacoes':
+            tabela_base, coluna_id, coluna_data = 'publicacao', 'p.id_publi', 'p.data_publi'
+            relevancia = 'bm25(publicacao_fts, 2.0, 1.0)'
+            sql = f'''
+                SELECT p.id_publi, p.id_escola, p.titulo_publi, p.data_publi, p.resolvido_publi,
+                       u.nome_user, e.nome_escola,
+                       snippet(publicacao_fts, -1, ?, ?, '…', 16) AS trecho,
+                       {relevancia} AS relevancia
+                FROM publicacao_fts
+                JOIN publicacao p ON p.id_publi = publicacao_fts.rowid
                 LEFT JOIN usuario u ON p.id_user = u.id_user 
-                WHERE p.id_escola = ? 
-                ORDER BY p.data_publi DESC
-            ''', (id_escola,))
-            publicacoes = [dict(row) for row in cursor.fetchall()]
-            return publicacoes
+                LEFT JOIN escola e ON p.id_escola = e.id_escola 
+                WHERE publicacao_fts MATCH ?
+            '''
+        else:
+            tabela_base, coluna_id, coluna_data = 'comentario', 'c.id_coment', 'c.data_coment'
+            relevancia = 'bm25(comentario_fts)'
+            sql = f'''
+                SELECT c.id_coment, c.id_publi, c.data_coment, p.id_escola, p.titulo_publi,
+                       u.nome_user, e.nome_escola,
+                       snippet(comentario_fts, 0, ?, ?, '…', 16) AS trecho,
+                       {relevancia} AS relevancia
+                FROM comentario_fts
+                JOIN comentario c ON c.id_coment = comentario_fts.rowid
+                JOIN publicacao p ON c.id_publi = p.id_publi
+                LEFT JOIN usuario u ON c.id_user = u.id_user 
+                LEFT JOIN escola e ON p.id_escola = e.id_escola 
+                WHERE comentario_fts MATCH ?
+            '''
+        params = [MARCA_INICIO_TRECHO, MARCA_FIM_TRECHO, consulta]
+        
+        if id_escola is not None:
+            sql += ' AND p.id_escola = ?'
+            params.append(id_escola)
+        if desde:
+            sql += f' AND {coluna_data} >= ?'
+            params.append(desde.isoformat())
+        if ate:
+            sql += f' AND {coluna_data} < ?'
+            params.append((ate + timedelta(days=1)).isoformat())
+        if chave:
+            deslocamento, maior_id = chave
+            if not isinstance(deslocamento, int) or isinstance(deslocamento, bool) \
+                    or deslocamento < 0 or maior_id < 0:
+                raise ValueError('Cursor inválido')
+        sql += f' AND {coluna_id} <= ? ORDER BY relevancia, {coluna_id} LIMIT ? OFFSET ?'
+        
+        try:
+            cursor = self.connection.cursor()
+            if not chave:
+                # Primeira página: fixa o conjunto de linhas das páginas seguintes
+                cursor.execute(f"SELECT COALESCE(MAX(rowid), 0) FROM {tabela_base}")
+                deslocamento, maior_id = 0, cursor.fetchone()[0]
+            cursor.execute(sql, params + [maior_id, limite + 1, deslocamento])
+            linhas = [dict(row) for row in cursor.fetchall()]
+            proximo = None
+            if len(linhas) > limite:
+                proximo = codificar_cursor([deslocamento + limite, maior_id])
+            return {'itens': linhas[:limite], 'next_cursor': proximo}
         except Exception as e:
-            print(f"❌ Erro ao buscar publicações da escola: {e}")
-            return []
+            print(f"❌ Erro na busca textual: {e}")
+            return {'itens': [], 'next_cursor': None}
+    
+    def reconstruir_indices_busca(self):
+        """Reconstrói os índices FTS5 a partir das tabelas de conteúdo"""
+        try:
+            with self.pool.escrita() as conexao:
+                for tabela_fts, _, _ in INDICES_BUSCA.values():
+                    conexao.execute(f"INSERT INTO {tabela_fts} ({tabela_fts}) VALUES ('rebuild')")
+            print("🔄 Índices de busca reconstruídos")
+            return True
+        except Exception as e:
+            print(f"❌ Erro ao reconstruir índices de busca: {e}")
+            return False
     
     # ========== MÉTODOS PARA COMENTÁRIOS ==========
     
+    def iterar_comentarios_por_publicacao(self, id_publi):
+        """Itera os comentários de uma publicação específica"""
+        return self._iterar_consulta('''
+            SELECT c.*, u.nome_user 
+            FROM comentario c 
+            LEFT JOIN usuario u ON c.id_user = u.id_user 
+            WHERE c.id_publi = ? 
+            ORDER BY c.data_coment ASC, c.id_coment ASC
+        ''', (id_publi,))
+    
     def buscar_comentarios_por_publicacao(self, id_publi):
         """Busca comentários de uma publicação específica"""
+        try:
+            return list(self.iterar_comentarios_por_publicacao(id_publi))
+        except Exception as e:
+            print(f"❌ Erro ao buscar comentários: {e}")
+            return []
+    
+    def buscar_comentarios_pagina(self, id_publi, limite=LIMITE_PADRAO_PAGINA, apos=None):
+        """Página de comentários de uma publicação (mais antigos primeiro), a partir do cursor 'apos'"""
+        limite = normalizar_limite(limite)
+        chave = decodificar_cursor(apos) if apos else None
         try:
             cursor = self.connection.cursor()
-            cursor.execute('''
+            cursor.execute(f'''
                 SELECT c.*, u.nome_user 
                 FROM comentario c 
                 LEFT JOIN usuario u ON c.id_user = u.id_user 
-                WHERE c.id_publi = ? 
-                ORDER BY c.data_coment ASC
-            ''', (id_publi,))
-            comentarios = [dict(row) for row in cursor.fetchall()]
-            return comentarios
+                WHERE c.id_publi = ?
+                {"AND (c.data_coment, c.id_coment) > (?, ?)" if chave else ""}
+                ORDER BY c.data_coment ASC, c.id_coment ASC
+                LIMIT ?
+            ''', (id_publi, *(chave or ()), limite + 1))
+            linhas = [dict(row) for row in cursor.fetchall()]
+            return _montar_pagina(linhas, limite, ('data_coment', 'id_coment'))
         except Exception as e:
-            print(f"❌ Erro ao buscar comentários: {e}")
-            return []
+            print(f"❌ Erro ao buscar página de comentários: {e}")
+            return {'itens': [], 'next_cursor': None}
     
     def criar_comentario(self, id_publi, id_user, texto_coment):
-        """Cria um novo comentário"""
+        """Cria um novo comentário
+        
+        O trigger trg_comentarios_publicacao_insert atualiza total_coment_publi
+        e ultimo_coment_publi da publicação na mesma transação.
+        """
         try:
-            cursor = self.connection.cursor()
-            cursor.execute(
-                "INSERT INTO comentario (id_publi, id_user, texto_coment) VALUES (?, ?, ?)",
-                (id_publi, id_user, texto_coment)
-            )
-            self.connection.commit()
+            with self.pool.escrita() as conexao:
+                cursor = conexao.cursor()
+                cursor.execute(
+                    "INSERT INTO comentario (id_publi, id_user, texto_coment) VALUES (?, ?, ?)",
+                    (id_publi, id_user, texto_coment)
+                )
+            self._registrar_alteracao('comentario', 'publicacao')
             return cursor.lastrowid
         except Exception as e:
             print(f"❌ Erro ao criar comentário: {e}")
             return None
     
     def close(self):
-        """Fecha a conexão com o banco"""
-        if self.connection:
-            self.connection.close()
+        """Fecha as conexões com o banco"""
+        if self.pool:
+            self.pool.fechar()
             print("✅ Conexão com SQLite (cadDB) fechada.")
 
-# Instância global do banco de dados do sistema de escolas
-database = Database()
+# Instância global do banco de dados do sistema de escolas, criada na
+# primeira chamada de get_db() (importar o módulo não abre nem migra o banco)
+_database = None
+_lock_instancia = threading.Lock()
 
 def get_db():
-    return database
\ No newline at end of file
+    global _database
+    if _database is None:
+        with _lock_instancia:
+            if _database is None:
+                _database = Database()
+    return _database
\ No newline at end of file
@@ -0,0 +1,155 @@
+# compressaoRespostas.py
+"""Compressão negociada (brotli/gzip) das respostas dinâmicas (HTML, JSON, CSV)
+
+registrar_compressao(app) instala um after_request que comprime as respostas
+de tipo texto conforme o Accept-Encoding do cliente. Brotli é usado quando o
+pacote está instalado e o cliente aceita; senão, gzip.
+
+- Respostas normais só são comprimidas a partir de COMPRESSAO_MINIMO_BYTES.
+- Respostas em streaming (respostaStreaming, exportações) são comprimidas
+  pedaço a pedaço, com flush a cada pedaço, então o cliente continua
+  recebendo os dados à medida que são gerados.
+- Respostas que já têm Content-Encoding (ativos pré-comprimidos), imagens,
+  arquivos .gz e respostas com Cache-Control: no-transform passam direto.
+
+Configuração por variáveis de ambiente:
+  COMPRESSAO_ATIVA              (1)     - 0 desliga a compressão
+  COMPRESSAO_MINIMO_BYTES       (1024)  - tamanho mínimo das respostas normais
+  COMPRESSAO_NIVEL_GZIP         (6)     - 1 (rápido) a 9 (menor)
+  COMPRESSAO_QUALIDADE_BROTLI   (4)     - 0 (rápido) a 11 (menor)
+"""
+import os
+import threading
+import zlib
+from flask import request
+
+COMPRESSAO_ATIVA = os.environ.get('COMPRESSAO_ATIVA', '1') == '1'
+COMPRESSAO_MINIMO_BYTES = int(os.environ.get('COMPRESSAO_MINIMO_BYTES', '1024'))
+COMPRESSAO_NIVEL_GZIP = int(os.environ.get('COMPRESSAO_NIVEL_GZIP', '6'))
+COMPRESSAO_QUALIDADE_BROTLI = int(os.environ.get('COMPRESSAO_QUALIDADE_BROTLI', '4'))
+
+# Tipos que valem a pena comprimir (imagens PNG/JPG e gzip já são comprimidos)
+TIPOS_COMPRIMIVEIS = {
+    'application/json',
+    'application/x-ndjson',
+    'application/javascript',
+    'application/xml',
+    'image/svg+xml',
+}
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+_lock_metricas = threading.Lock()
+metricas = {
+    'comprimidas': 0,
+    'em_streaming': 0,
+    'ignoradas': 0,
+    'bytes_originais': 0,
+    'bytes_comprimidos': 0
+}
+
+def _comprimivel(mimetype):
+    return mimetype.startswith('text/') or mimetype in TIPOS_COMPRIMIVEIS
+
+def _escolher_codificacao():
+    """'br', 'gzip' ou None conforme o Accept-Encoding da requisição"""
+    if brotli is not None and request.accept_encodings['br'] > 0:
+        return 'br'
+    if request.accept_encodings['gzip'] > 0:
+        return 'gzip'
+    return None
+
+def _novo_compressor(codificacao):
+    """Retorna (comprimir(pedaço), descarregar(), finalizar()) para a codificação"""
+    if codificacao == 'br':
+        compressor = brotli.Compressor(quality=COMPRESSAO_QUALIDADE_BROTLI)
+        return compressor.process, compressor.flush, compressor.finish
+    compressor = zlib.compressobj(COMPRESSAO_NIVEL_GZIP, zlib.DEFLATED, 31)
+    return (
+        compressor.compress,
+        lambda: compressor.flush(zlib.Z_SYNC_FLUSH),
+        compressor.flush
+    )
+
+def comprimir(dados, codificacao):
+    """Comprime um corpo inteiro"""
+    comprimir_pedaco, _, finalizar = _novo_compressor(codificacao)
+    return comprimir_pedaco(dados) + finalizar()
+
+def comprimir_streaming(pedacos, codificacao):
+    """Comprime um fluxo de pedaços, descarregando o compressor a cada pedaço"""
+    comprimir_pedaco, descarregar, finalizar = _novo_compressor(codificacao)
+    for pedaco in pedacos:
+        if isinstance(pedaco, str):
+            pedaco = pedaco.encode('utf-8')
+        if not pedaco:
+            continue
+        comprimido = comprimir_pedaco(pedaco) + descarregar()
+        if comprimido:
+            yield comprimido
+    yield finalizar()
+
+def _contar(**valores):
+    with _lock_metricas:
+        for metrica, valor in valores.items():
+            metricas[metrica] += valor
+
+def comprimir_resposta(resposta):
+    """after_request: comprime a resposta se o tipo, o tamanho e o cliente permitirem"""
+    if (not COMPRESSAO_ATIVA
+            or request.method == 'HEAD'
+            or resposta.status_code != 200
+            or not _comprimivel(resposta.mimetype or '')
+            or 'Content-Encoding' in resposta.headers
+            or 'no-transform' in resposta.headers.get('Cache-Control', '')):
+        return resposta
+
+    # A resposta varia com o Accept-Encoding mesmo quando não é comprimida
+    resposta.vary.add('Accept-Encoding')
+    codificacao = _escolher_codificacao()
+    if codificacao is None:
+        return resposta
+
+    if resposta.is_streamed:
+        original = resposta.response
+        resposta.response = comprimir_streaming(original, codificacao)
+        # Fecha o iterador original (e o cursor do banco) se o cliente desconectar
+        if hasattr(original, 'close'):
+            resposta.call_on_close(original.close)
+        resposta.direct_passthrough = False
+        resposta.headers.pop('Content-Length', None)
+        _contar(em_streaming=1)
+    else:
+        dados = resposta.get_data()
+        if len(dados) < COMPRESSAO_MINIMO_BYTES:
+            _contar(ignoradas=1)
+            return resposta
+        comprimido = comprimir(dados, codificacao)
+        resposta.set_data(comprimido)
+        _contar(comprimidas=1, bytes_originais=len(dados), bytes_comprimidos=len(comprimido))
+
+    resposta.headers['Content-Encoding'] = codificacao
+    # O corpo enviado não é mais byte a byte o original: ETag forte vira fraco
+    etag, fraco = resposta.get_etag()
+    if etag and not fraco:
+        resposta.set_etag(etag, weak=True)
+    return resposta
+
+def registrar_compressao(app):
+    """Instala a compressão das respostas no app"""
+    app.after_request(comprimir_resposta)
+    print(f"✅ Compressão de respostas {'ativa' if COMPRESSAO_ATIVA else 'desativada'} "
+          f"({'brotli e gzip' if brotli is not None else 'gzip'}, mínimo {COMPRESSAO_MINIMO_BYTES} bytes)")
+
+def estatisticas():
+    """Retorna os contadores e a taxa de compressão das respostas normais"""
+    with _lock_metricas:
+        dados = dict(metricas)
+    dados['taxa_compressao'] = (
+        round(dados['bytes_comprimidos'] / dados['bytes_originais'], 4) if dados['bytes_originais'] else None
+    )
+    dados['brotli_disponivel'] = brotli is not None
+    return dados
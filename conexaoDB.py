@@ -0,0 +1,135 @@
+# conexaoDB.py
+"""Pool de conexões SQLite por thread, em modo WAL
+
+Cada thread do servidor recebe a sua própria conexão (reaproveitada de
+threads que já terminaram), então as leituras rodam em paralelo e nunca
+compartilham cursores. Em modo WAL os leitores não bloqueiam o escritor nem
+são bloqueados por ele; as escritas do processo passam por um único lock
+(escrita()), e o busy_timeout cobre escritores de outros processos.
+
+PRAGMAs configuráveis por variáveis de ambiente:
+  DB_SYNCHRONOUS      (NORMAL)  - seguro em WAL; FULL faz fsync a cada commit
+  DB_CACHE_KB         (16384)   - cache de páginas por conexão
+  DB_MMAP_MB          (256)     - leitura via memory-mapped I/O
+  DB_BUSY_TIMEOUT_MS  (5000)    - espera por locks de outros processos
+"""
+import os
+import sqlite3
+import threading
+import weakref
+from contextlib import contextmanager
+
+DB_SYNCHRONOUS = os.environ.get('DB_SYNCHRONOUS', 'NORMAL').upper()
+DB_CACHE_KB = int(os.environ.get('DB_CACHE_KB', '16384'))
+DB_MMAP_MB = int(os.environ.get('DB_MMAP_MB', '256'))
+DB_BUSY_TIMEOUT_MS = int(os.environ.get('DB_BUSY_TIMEOUT_MS', '5000'))
+
+MODOS_SYNCHRONOUS = ('OFF', 'NORMAL', 'FULL', 'EXTRA')
+
+class PoolConexoes:
+    def __init__(self, db_name):
+        self.db_name = db_name
+        self._local = threading.local()
+        # Conexão -> referência fraca da thread dona
+        self._donos = {}
+        self._lock = threading.Lock()
+        # Um escritor por vez dentro do processo (reentrante para escritas aninhadas)
+        self._lock_escrita = threading.RLock()
+        # Conexão só de leitura para o PRAGMA data_version: como nunca grava,
+        # enxerga os commits de todas as outras conexões
+        self._monitor = None
+        self._lock_monitor = threading.Lock()
+        self.metricas = {'abertas': 0, 'reutilizadas': 0, 'escritas': 0}
+
+        conexao = self.conexao()
+        self.modo_journal = conexao.execute("PRAGMA journal_mode=WAL").fetchone()[0]
+
+    def _abrir(self):
+        """Abre uma conexão nova com os PRAGMAs de desempenho"""
+        conexao = sqlite3.connect(self.db_name, check_same_thread=False, timeout=DB_BUSY_TIMEOUT_MS / 1000)
+        conexao.row_factory = sqlite3.Row
+        synchronous = DB_SYNCHRONOUS if DB_SYNCHRONOUS in MODOS_SYNCHRONOUS else 'NORMAL'
+        conexao.execute(f"PRAGMA synchronous={synchronous}")
+        conexao.execute(f"PRAGMA cache_size={-DB_CACHE_KB}")
+        conexao.execute(f"PRAGMA mmap_size={DB_MMAP_MB * 1024 * 1024}")
+        conexao.execute(f"PRAGMA busy_timeout={DB_BUSY_TIMEOUT_MS}")
+        conexao.execute("PRAGMA temp_store=MEMORY")
+        return conexao
+
+    def conexao(self):
+        """Retorna a conexão da thread atual (criada ou reaproveitada sob demanda)"""
+        conexao = getattr(self._local, 'conexao', None)
+        if conexao is not None:
+            return conexao
+
+        thread = threading.current_thread()
+        with self._lock:
+            # Reaproveita a conexão de uma thread que já terminou
+            for livre, dono in self._donos.items():
+                dono_thread = dono()
+                if dono_thread is None or not dono_thread.is_alive():
+                    conexao = livre
+                    self.metricas['reutilizadas'] += 1
+                    break
+            if conexao is None:
+                conexao = self._abrir()
+                self.metricas['abertas'] += 1
+            self._donos[conexao] = weakref.ref(thread)
+
+        # A thread anterior pode ter morrido no meio de uma transação
+        if conexao.in_transaction:
+            conexao.rollback()
+        self._local.conexao = conexao
+        return conexao
+
+    @contextmanager
+    def escrita(self):
+        """Transação de escrita: um escritor por vez, commit no fim ou rollback em erro"""
+        with self._lock_escrita:
+            conexao = self.conexao()
+            profundidade = getattr(self._local, 'profundidade', 0)
+            self._local.profundidade = profundidade + 1
+            try:
+                yield conexao
+                if profundidade == 0:
+                    conexao.commit()
+                    self.metricas['escritas'] += 1
+            except Exception:
+                if profundidade == 0:
+                    conexao.rollback()
+                raise
+            finally:
+                self._local.profundidade = profundidade
+
+    def versao_dados(self):
+        """PRAGMA data_version visto de fora: muda a cada commit de qualquer conexão"""
+        with self._lock_monitor:
+            if self._monitor is None:
+                self._monitor = self._abrir()
+            return self._monitor.execute("PRAGMA data_version").fetchone()[0]
+
+    def estatisticas(self):
+        """Retorna o número de conexões e os contadores do pool"""
+        with self._lock:
+            metricas = dict(self.metricas)
+            donos = list(self._donos.values())
+        metricas['conexoes'] = len(donos)
+        metricas['em_uso'] = sum(1 for dono in donos if dono() is not None and dono().is_alive())
+        metricas['modo_journal'] = self.modo_journal
+        return metricas
+
+    def fechar(self):
+        """Fecha todas as conexões do pool"""
+        with self._lock:
+            conexoes = list(self._donos)
+            self._donos.clear()
+        with self._lock_monitor:
+            if self._monitor is not None:
+                conexoes.append(self._monitor)
+                self._monitor = None
+        for conexao in conexoes:
+            try:
+                conexao.close()
+            except Exception as e:
+                print(f"❌ Erro ao fechar conexão: {e}")
+        self._local = threading.local()
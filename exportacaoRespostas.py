@@ -0,0 +1,186 @@
+# exportacaoRespostas.py
+"""Exportação em streaming das respostas do questionário (UserRespostas)
+
+Gera CSV ou NDJSON direto do cursor (formDB.iterar_respostas), com gzip
+opcional, filtro de datas e retomada pelo último id_resp exportado, em
+memória constante. Usado pela rota /api/exportar/respostas e pela linha de
+comando:
+
+    python exportacaoRespostas.py --formato csv --gzip -o respostas.csv.gz
+    python exportacaoRespostas.py --desde 2025-03-01 --ate 2025-03-31 --apos-id 120000
+"""
+import csv
+import io
+import json
+import os
+import sqlite3
+import sys
+import zlib
+from datetime import datetime, timedelta
+from urllib.request import pathname2url
+
+COLUNAS_EXPORTACAO = ('id_resp', 'data_resp', 'somaTotal_resp', 'perfil_resp')
+FORMATOS_EXPORTACAO = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson'
+}
+
+# Linhas agrupadas em cada pedaço gerado
+LINHAS_POR_PEDACO = 1000
+NIVEL_GZIP = 6
+
+def intervalo_datas(desde=None, ate=None):
+    """Converte datas AAAA-MM-DD (inclusivas) nos limites de data_resp
+
+    Retorna (desde, ate_exclusivo) como texto; levanta ValueError se inválidas.
+    """
+    inicio = datetime.strptime(desde, '%Y-%m-%d').strftime('%Y-%m-%d') if desde else None
+    fim = None
+    if ate:
+        fim = (datetime.strptime(ate, '%Y-%m-%d') + timedelta(days=1)).strftime('%Y-%m-%d')
+    return inicio, fim
+
+def gerar_csv(linhas):
+    """Gera o CSV (com cabeçalho) em pedaços de texto"""
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer, lineterminator='\n')
+    escritor.writerow(COLUNAS_EXPORTACAO)
+    contador = 0
+    for linha in linhas:
+        escritor.writerow([linha[coluna] for coluna in COLUNAS_EXPORTACAO])
+        contador += 1
+        if contador % LINHAS_POR_PEDACO == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+def gerar_ndjson(linhas):
+    """Gera NDJSON (um objeto por linha) em pedaços de texto"""
+    pedaco = []
+    for linha in linhas:
+        pedaco.append(json.dumps({coluna: linha[coluna] for coluna in COLUNAS_EXPORTACAO}, ensure_ascii=False))
+        if len(pedaco) >= LINHAS_POR_PEDACO:
+            yield '\n'.join(pedaco) + '\n'
+            pedaco = []
+    if pedaco:
+        yield '\n'.join(pedaco) + '\n'
+
+def comprimir_gzip(pedacos, nivel=NIVEL_GZIP):
+    """Comprime um fluxo de bytes no formato gzip, pedaço a pedaço"""
+    compressor = zlib.compressobj(nivel, zlib.DEFLATED, 31)
+    for pedaco in pedacos:
+        comprimido = compressor.compress(pedaco)
+        if comprimido:
+            yield comprimido
+    yield compressor.flush()
+
+def _acompanhar(linhas, progresso):
+    """Registra no dicionário progresso o total de linhas e o último id_resp lido"""
+    for linha in linhas:
+        progresso['linhas'] += 1
+        progresso['ultimo_id'] = linha['id_resp']
+        yield linha
+
+def gerar_exportacao(db, formato='csv', desde=None, ate=None, apos_id=0, gzip=False, progresso=None):
+    """Gera a exportação como um fluxo de bytes
+
+    desde/ate: datas AAAA-MM-DD inclusivas. Se progresso (dict) for
+    informado, recebe 'linhas' e 'ultimo_id'. Levanta ValueError para
+    parâmetros inválidos (antes de começar a gerar).
+    """
+    if formato not in FORMATOS_EXPORTACAO:
+        raise ValueError(f"Formato de exportação inválido: {formato}")
+    inicio, fim = intervalo_datas(desde, ate)
+    try:
+        apos_id = int(apos_id or 0)
+    except (TypeError, ValueError):
+        raise ValueError('apos_id deve ser um número inteiro')
+
+    linhas = db.iterar_respostas(desde=inicio, ate=fim, apos_id=apos_id)
+    if progresso is not None:
+        progresso.update(linhas=0, ultimo_id=apos_id)
+        linhas = _acompanhar(linhas, progresso)
+    texto = gerar_csv(linhas) if formato == 'csv' else gerar_ndjson(linhas)
+    pedacos = (pedaco.encode('utf-8') for pedaco in texto if pedaco)
+    return comprimir_gzip(pedacos) if gzip else pedacos
+
+class BancoSomenteLeitura:
+    """form.db aberto só para leitura, para a exportação pela linha de comando
+
+    Ao contrário de formDB.Database, não cria tabelas, triggers nem
+    agregados: exportar um backup ou uma cópia não altera o arquivo.
+    """
+    def __init__(self, caminho):
+        self.connection = sqlite3.connect(f"file:{pathname2url(os.path.abspath(caminho))}?mode=ro", uri=True)
+        self.connection.row_factory = sqlite3.Row
+
+    def iterar_respostas(self, desde=None, ate=None, apos_id=0):
+        from formDB import iterar_respostas
+        return iterar_respostas(self.connection, desde, ate, apos_id)
+
+    def close(self):
+        self.connection.close()
+
+def nome_arquivo(formato, gzip=False):
+    """Nome sugerido para o arquivo exportado"""
+    nome = f"respostas_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{formato}"
+    return nome + '.gz' if gzip else nome
+
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(description='Exporta UserRespostas em CSV ou NDJSON')
+    parser.add_argument('--formato', choices=sorted(FORMATOS_EXPORTACAO), default='csv')
+    parser.add_argument('--desde', help='data inicial AAAA-MM-DD (inclusiva)')
+    parser.add_argument('--ate', help='data final AAAA-MM-DD (inclusiva)')
+    parser.add_argument('--apos-id', type=int, default=0, help='retoma após este id_resp')
+    parser.add_argument('--gzip', action='store_true', help='comprime a saída com gzip')
+    parser.add_argument('-o', '--saida', help='arquivo de saída (padrão: saída padrão)')
+    parser.add_argument('--banco', default='form.db', help='arquivo do banco (padrão: form.db)')
+    args = parser.parse_args(argv)
+
+    # Exportação offline: não cria um banco vazio se o caminho estiver errado
+    if not os.path.exists(args.banco):
+        print(f"❌ Banco não encontrado: {args.banco}", file=sys.stderr)
+        return 2
+
+    try:
+        db = BancoSomenteLeitura(args.banco)
+    except sqlite3.Error as e:
+        print(f"❌ Não foi possível abrir o banco {args.banco}: {e}", file=sys.stderr)
+        return 2
+
+    progresso = {}
+    pedacos = None
+    try:
+        pedacos = gerar_exportacao(db, args.formato, args.desde, args.ate, args.apos_id,
+                                   args.gzip, progresso=progresso)
+        saida = open(args.saida, 'wb') if args.saida else sys.stdout.buffer
+        try:
+            for pedaco in pedacos:
+                saida.write(pedaco)
+        finally:
+            if args.saida:
+                saida.close()
+    except ValueError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 2
+    except BrokenPipeError:
+        # Saída fechada antes do fim (por exemplo, | head)
+        return 1
+    except KeyboardInterrupt:
+        print(f"⚠️ Exportação interrompida; para retomar use --apos-id com o último "
+              f"id_resp gravado no arquivo (lidos até {progresso.get('ultimo_id')})", file=sys.stderr)
+        return 130
+    finally:
+        # Fecha o cursor da exportação antes da conexão
+        if pedacos is not None:
+            pedacos.close()
+        db.close()
+
+    print(f"✅ {progresso['linhas']} respostas exportadas (último id_resp: {progresso['ultimo_id']})",
+          file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
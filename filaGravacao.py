@@ -0,0 +1,233 @@
+# filaGravacao.py
+"""Gravação em segundo plano (write-behind) das respostas do questionário
+
+As rotas colocam cada resultado numa fila limitada em memória; uma thread
+gravadora dedicada esvazia a fila e grava em grupos (a cada N respostas ou
+M milissegundos) com formDB.salvar_respostas_lote, ou seja, um único commit
+por grupo em vez de um por requisição.
+
+Modos (variável FORM_GRAVACAO_MODO):
+  direto      - sem fila, cada requisição faz o próprio commit (padrão)
+  grupo       - a requisição espera o commit do grupo em que entrou; a
+                resposta só é confirmada depois de gravada no disco, e uma
+                recusa por tempo esgotado cancela o envio (não é gravado depois)
+  assincrono  - a requisição retorna assim que a resposta entra na fila; o
+                que estiver na fila se perde se o processo morrer sem encerrar
+
+Em qualquer modo a fila é esvaziada no encerramento do processo.
+"""
+import os
+import atexit
+import queue
+import threading
+import time
+
+MODOS_GRAVACAO = ('direto', 'grupo', 'assincrono')
+
+FORM_GRAVACAO_MODO = os.environ.get('FORM_GRAVACAO_MODO', 'direto')
+FORM_GRAVACAO_MAX_FILA = int(os.environ.get('FORM_GRAVACAO_MAX_FILA', '10000'))
+FORM_GRAVACAO_LOTE = int(os.environ.get('FORM_GRAVACAO_LOTE', '200'))
+FORM_GRAVACAO_INTERVALO_MS = float(os.environ.get('FORM_GRAVACAO_INTERVALO_MS', '5'))
+FORM_GRAVACAO_TIMEOUT = float(os.environ.get('FORM_GRAVACAO_TIMEOUT', '5'))
+
+_FIM = object()  # Sinaliza o encerramento para a thread gravadora
+
+# Estados de um envio: a gravadora só grava os pendentes, e quem desiste de
+# esperar só cancela os que a gravadora ainda não pegou
+PENDENTE, GRAVANDO, CANCELADO = 'pendente', 'gravando', 'cancelado'
+
+class _Envio:
+    """Uma resposta aguardando gravação"""
+    __slots__ = ('registro', 'gravado', 'sucesso', 'estado')
+
+    def __init__(self, registro, esperar):
+        self.registro = registro
+        self.gravado = threading.Event() if esperar else None
+        self.sucesso = False
+        self.estado = PENDENTE
+
+class FilaGravacao:
+    def __init__(self, db, modo='grupo', max_fila=FORM_GRAVACAO_MAX_FILA,
+                 tamanho_lote=FORM_GRAVACAO_LOTE, intervalo_ms=FORM_GRAVACAO_INTERVALO_MS,
+                 timeout=FORM_GRAVACAO_TIMEOUT):
+        if modo not in ('grupo', 'assincrono'):
+            raise ValueError(f"Modo de gravação inválido para a fila: {modo}")
+        self.db = db
+        self.modo = modo
+        self.max_fila = max_fila
+        self.tamanho_lote = max(tamanho_lote, 1)
+        self.intervalo = max(intervalo_ms, 0) / 1000
+        self.timeout = timeout
+
+        self._fila = queue.Queue(maxsize=max(max_fila, 1))
+        self._encerrada = False
+        # Protege o teste de _encerrada junto com o put; quem encontra a fila
+        # cheia espera em _vaga (sem segurar o lock) até a gravadora tirar um grupo
+        self._lock_fila = threading.Lock()
+        self._vaga = threading.Condition(self._lock_fila)
+        self._lock_estados = threading.Lock()
+        self._lock_metricas = threading.Lock()
+        self.metricas = {
+            'enfileirados': 0,
+            'gravados': 0,
+            'falhas': 0,
+            'rejeitados': 0,
+            'cancelados': 0,
+            'commits': 0,
+            'maior_lote': 0,
+            'ultimo_lote': 0,
+            'maior_fila': 0,
+            'tempo_commit_total': 0.0
+        }
+
+        self._gravadora = threading.Thread(target=self._executar, name='gravadora-respostas', daemon=True)
+        self._gravadora.start()
+        print(f"✅ Fila de gravação iniciada (modo {modo}, lote {self.tamanho_lote}, {intervalo_ms:.0f} ms)")
+
+    def salvar_resposta(self, soma_total, perfil):
+        """Coloca a resposta na fila; retorna True se foi aceita (e gravada, no modo grupo)
+
+        No modo grupo, False significa que a resposta não foi nem será gravada:
+        se o tempo esgota antes de a gravadora pegar o envio, ele é cancelado;
+        se ela já pegou, a requisição espera o commit terminar.
+        """
+        # O horário é o da submissão, não o do commit do grupo
+        data_resp = time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime())
+        envio = _Envio((soma_total, perfil, data_resp), esperar=self.modo == 'grupo')
+
+        # O teste e o put sob o mesmo lock do encerrar: nada entra na fila depois
+        # do _FIM. O put não bloqueia com o lock; a espera por vaga é no _vaga,
+        # contra um único prazo, para que cada requisição espere no máximo um timeout
+        prazo = time.monotonic() + self.timeout
+        with self._vaga:
+            while True:
+                encerrada = self._encerrada
+                if encerrada:
+                    break
+                try:
+                    self._fila.put_nowait(envio)
+                    break
+                except queue.Full:
+                    restante = prazo - time.monotonic()
+                    if restante <= 0:
+                        self._contar('rejeitados')
+                        print("❌ Fila de gravação cheia, resposta rejeitada")
+                        return False
+                    self._vaga.wait(restante)
+        if encerrada:
+            return self.db.salvar_resposta_usuario(soma_total, perfil)
+
+        with self._lock_metricas:
+            self.metricas['enfileirados'] += 1
+            self.metricas['maior_fila'] = max(self.metricas['maior_fila'], self._fila.qsize())
+
+        if envio.gravado is None:
+            return True
+        if not envio.gravado.wait(self.timeout):
+            with self._lock_estados:
+                cancelado = envio.estado == PENDENTE
+                if cancelado:
+                    envio.estado = CANCELADO
+            if cancelado:
+                self._contar('cancelados')
+                print("❌ Tempo esgotado aguardando a gravação da resposta (envio cancelado)")
+                return False
+            # Já está num commit em andamento: o resultado é o desse commit
+            envio.gravado.wait()
+        return envio.sucesso
+
+    def _executar(self):
+        """Laço da thread gravadora: junta um grupo e grava num único commit"""
+        while True:
+            primeiro = self._fila.get()
+            if primeiro is _FIM:
+                return
+
+            grupo = [primeiro]
+            encerrar = False
+            prazo = time.monotonic() + self.intervalo
+            while len(grupo) < self.tamanho_lote:
+                restante = prazo - time.monotonic()
+                try:
+                    envio = self._fila.get(timeout=restante) if restante > 0 else self._fila.get_nowait()
+                except queue.Empty:
+                    break
+                if envio is _FIM:
+                    encerrar = True
+                    break
+                grupo.append(envio)
+
+            # Abriu vaga na fila: acorda quem está esperando para enfileirar
+            with self._vaga:
+                self._vaga.notify_all()
+            self._gravar(grupo)
+            if encerrar:
+                return
+
+    def _gravar(self, grupo):
+        with self._lock_estados:
+            grupo = [envio for envio in grupo if envio.estado == PENDENTE]
+            for envio in grupo:
+                envio.estado = GRAVANDO
+        if not grupo:
+            return
+
+        inicio = time.perf_counter()
+        sucesso = self.db.salvar_respostas_lote([envio.registro for envio in grupo])
+        duracao = time.perf_counter() - inicio
+
+        with self._lock_metricas:
+            self.metricas['gravados' if sucesso else 'falhas'] += len(grupo)
+            self.metricas['commits'] += 1
+            self.metricas['ultimo_lote'] = len(grupo)
+            self.metricas['maior_lote'] = max(self.metricas['maior_lote'], len(grupo))
+            self.metricas['tempo_commit_total'] += duracao
+
+        for envio in grupo:
+            envio.sucesso = sucesso
+            if envio.gravado is not None:
+                envio.gravado.set()
+
+    def _contar(self, metrica):
+        with self._lock_metricas:
+            self.metricas[metrica] += 1
+
+    def estatisticas(self):
+        """Retorna a profundidade da fila e os contadores de gravação"""
+        with self._lock_metricas:
+            metricas = dict(self.metricas)
+        metricas['fila_atual'] = self._fila.qsize()
+        metricas['lote_medio'] = round(metricas['gravados'] / metricas['commits'], 2) if metricas['commits'] else 0.0
+        metricas['tempo_commit_medio'] = (
+            metricas['tempo_commit_total'] / metricas['commits'] if metricas['commits'] else 0.0
+        )
+        metricas['modo'] = self.modo
+        metricas['max_fila'] = self.max_fila
+        metricas['tamanho_lote'] = self.tamanho_lote
+        metricas['intervalo_ms'] = self.intervalo * 1000
+        return metricas
+
+    def encerrar(self):
+        """Grava o que restar na fila e para a thread gravadora"""
+        with self._vaga:
+            if self._encerrada:
+                return
+            self._encerrada = True
+            pendentes = self._fila.qsize()
+            self._vaga.notify_all()
+        # Fora do lock (a gravadora o usa para avisar das vagas); com _encerrada
+        # marcada sob o lock, nenhum put acontece depois deste
+        self._fila.put(_FIM)
+        self._gravadora.join()
+        print(f"✅ Fila de gravação encerrada ({pendentes} respostas pendentes gravadas)")
+
+def criar_fila_gravacao(db, modo=FORM_GRAVACAO_MODO):
+    """Cria a fila conforme o modo configurado; retorna None no modo direto"""
+    if modo not in MODOS_GRAVACAO:
+        print(f"⚠️ FORM_GRAVACAO_MODO inválido ({modo}), usando gravação direta")
+        return None
+    if modo == 'direto':
+        return None
+    fila = FilaGravacao(db, modo=modo)
+    atexit.register(fila.encerrar)
+    return fila
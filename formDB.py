@@ -1,226 +1,609 @@
 # formDB.py
-import sqlite3
 import os
+import threading
+import time
+from collections import namedtuple
+from conexaoDB import PoolConexoes
+
+# Índices gerenciados pelo create_tables: (nome, definição).
+# Índices com os prefixos abaixo que não estiverem na lista são removidos
+# (idx_estatisticas_total, de versões anteriores, sai assim dos bancos existentes).
+# O verificar_planos.py confere que as consultas analíticas usam estes índices.
+PREFIXOS_INDICES_GERENCIADOS = ('idx_respostas_', 'idx_estatisticas_')
+INDICES_GERENCIADOS = [
+    # Listagem por data (buscar_todas_respostas) - cobre todas as colunas
+    ('idx_respostas_data', 'UserRespostas(data_resp, somaTotal_resp, perfil_resp)'),
+    # Distribuição de pontuação e MIN/MAX gerais
+    ('idx_respostas_pontuacao', 'UserRespostas(somaTotal_resp, perfil_resp)'),
+    # MIN/MAX por perfil
+    ('idx_respostas_perfil', 'UserRespostas(perfil_resp, somaTotal_resp)')
+]
+
+# Estrutura imutável do questionário (snapshot em cache)
+Pergunta = namedtuple('Pergunta', ['id_perg', 'texto_perg', 'ordem_perg', 'opcoes'])
+Opcao = namedtuple('Opcao', ['id_opcao', 'id_pergunta', 'texto_opcao', 'pontuacao'])
+
+# Granularidades da tabela RespostasPeriodo: nome -> formato strftime do período
+GRANULARIDADES_PERIODO = {
+    'dia': '%Y-%m-%d',
+    'hora': '%Y-%m-%d %H:00'
+}
+
+# Tabelas do questionário cujas alterações invalidam o snapshot
+TABELAS_QUESTIONARIO = ('Perguntas', 'Resposta')
+
+# Linha de VersaoTabelas incrementada só por UPDATE/DELETE em UserRespostas
+# (inserções não contam): a geração das reescritas das respostas
+VERSAO_REESCRITA_RESPOSTAS = 'UserRespostas'
+
+def iterar_respostas(conexao, desde=None, ate=None, apos_id=0, tamanho_lote=1000):
+    """Itera UserRespostas da conexão em ordem de id_resp, lendo o cursor com fetchmany
+    
+    Só lê: serve também para conexões somente leitura (exportação de cópias
+    do banco). desde/ate filtram data_resp (ate exclusivo); apos_id retoma
+    a partir do último id_resp recebido. A conexão deve usar sqlite3.Row.
+    """
+    sql = "SELECT id_resp, data_resp, somaTotal_resp, perfil_resp FROM UserRespostas WHERE id_resp > ?"
+    params = [apos_id or 0]
+    if desde:
+        sql += " AND data_resp >= ?"
+        params.append(desde)
+    if ate:
+        sql += " AND data_resp < ?"
+        params.append(ate)
+    sql += " ORDER BY id_resp"
+    
+    cursor = conexao.cursor()
+    try:
+        cursor.execute(sql, params)
+        while True:
+            linhas = cursor.fetchmany(tamanho_lote)
+            if not linhas:
+                break
+            for row in linhas:
+                yield dict(row)
+    finally:
+        cursor.close()
 
 class Database:
     def __init__(self, db_name='form.db'):
         self.db_name = db_name
-        self.connection = None
+        self.pool = None
+        # Versão local dos dados de UserRespostas (incrementada a cada escrita)
+        self.versao_respostas = 0
+        self.alteracao_respostas = time.time()
+        self._lock_versao = threading.Lock()
+        # Versão vista por todos os processos (MAX(id_resp), geração das
+        # reescritas) e o PRAGMA data_version em que ela foi lida
+        self._versao_compartilhada = None
+        self._versao_dados_vista = None
+        # Snapshot do questionário: (versão das tabelas, tupla de Pergunta)
+        self._questionario = None
+        self._lock_questionario = threading.Lock()
         self.connect()
         self.create_tables()
         self.insert_initial_data()
     
     def connect(self):
-        """Conecta ao banco de dados SQLite"""
+        """Cria o pool de conexões (uma por thread, em modo WAL)"""
         try:
-            self.connection = sqlite3.connect(self.db_name, check_same_thread=False)
-            self.connection.row_factory = sqlite3.Row
-            print("✅ Conectado ao SQLite com sucesso!")
+            self.pool = PoolConexoes(self.db_name)
+            print(f"✅ Conectado ao SQLite com sucesso! (journal: {self.pool.modo_journal})")
         except Exception as e:
             print(f"❌ Erro ao conectar ao SQLite: {e}")
     
+    @property
+    def connection(self):
+        """Conexão da thread atual"""
+        return self.pool.conexao() if self.pool else None
+    
     def create_tables(self):
         """Cria todas as tabelas necessárias"""
         try:
-            cursor = self.connection.cursor()
+            with self.pool.escrita() as conexao:
+                cursor = conexao.cursor()
             
-            # Tabela Perguntas
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS Perguntas (
-                    id_perg INTEGER PRIMARY KEY AUTOINCREMENT,
-                    texto_perg TEXT NOT NULL,
-                    ordem_perg INTEGER NOT NULL
-                )
-            ''')
+                # Tabela Perguntas
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS Perguntas (
+                        id_perg INTEGER PRIMARY KEY AUTOINCREMENT,
+                        texto_perg TEXT NOT NULL,
+                        ordem_perg INTEGER NOT NULL
+                    )
+                ''')
             
-            # Tabela UserRespostas
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS UserRespostas (
-                    id_resp INTEGER PRIMARY KEY AUTOINCREMENT,
-                    data_resp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    somaTotal_resp INTEGER NOT NULL,
-                    perfil_resp TEXT NOT NULL
+                # Tabela UserRespostas
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS UserRespostas (
+                        id_resp INTEGER PRIMARY KEY AUTOINCREMENT,
+                        data_resp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                        somaTotal_resp INTEGER NOT NULL,
+                        perfil_resp TEXT NOT NULL
+                    )
+                ''')
+            
+                # Tabela Resposta
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS Resposta (
+                        id_opcao INTEGER PRIMARY KEY AUTOINCREMENT,
+                        id_pergunta INTEGER,
+                        texto_opcao TEXT NOT NULL,
+                        pontuacao INTEGER NOT NULL,
+                        FOREIGN KEY (id_pergunta) REFERENCES Perguntas(id_perg)
+                    )
+                ''')
+            
+                # Tabela agregada EstatisticasPerfil (contagem e soma por perfil),
+                # mantida pelos triggers abaixo na mesma transação das escritas
+                cursor.execute(
+                    "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'EstatisticasPerfil'"
                 )
-            ''')
+                agregado_existia = cursor.fetchone() is not None
             
-            # Tabela Resposta
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS Resposta (
-                    id_opcao INTEGER PRIMARY KEY AUTOINCREMENT,
-                    id_pergunta INTEGER,
-                    texto_opcao TEXT NOT NULL,
-                    pontuacao INTEGER NOT NULL,
-                    FOREIGN KEY (id_pergunta) REFERENCES Perguntas(id_perg)
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS EstatisticasPerfil (
+                        perfil_resp TEXT PRIMARY KEY,
+                        total INTEGER NOT NULL DEFAULT 0,
+                        soma_pontuacao INTEGER NOT NULL DEFAULT 0
+                    )
+                ''')
+            
+                cursor.execute('''
+                    CREATE TRIGGER IF NOT EXISTS trg_estatisticas_perfil_insert
+                    AFTER INSERT ON UserRespostas
+                    BEGIN
+                        INSERT INTO EstatisticasPerfil (perfil_resp, total, soma_pontuacao)
+                        VALUES (NEW.perfil_resp, 1, NEW.somaTotal_resp)
+                        ON CONFLICT(perfil_resp) DO UPDATE SET
+                            total = total + 1,
+                            soma_pontuacao = soma_pontuacao + excluded.soma_pontuacao;
+                    END
+                ''')
+            
+                cursor.execute('''
+                    CREATE TRIGGER IF NOT EXISTS trg_estatisticas_perfil_delete
+                    AFTER DELETE ON UserRespostas
+                    BEGIN
+                        UPDATE EstatisticasPerfil
+                        SET total = total - 1,
+                            soma_pontuacao = soma_pontuacao - OLD.somaTotal_resp
+                        WHERE perfil_resp = OLD.perfil_resp;
+                    END
+                ''')
+            
+                cursor.execute('''
+                    CREATE TRIGGER IF NOT EXISTS trg_estatisticas_perfil_update
+                    AFTER UPDATE OF somaTotal_resp, perfil_resp ON UserRespostas
+                    BEGIN
+                        UPDATE EstatisticasPerfil
+                        SET total = total - 1,
+                            soma_pontuacao = soma_pontuacao - OLD.somaTotal_resp
+                        WHERE perfil_resp = OLD.perfil_resp;
+                        INSERT INTO EstatisticasPerfil (perfil_resp, total, soma_pontuacao)
+                        VALUES (NEW.perfil_resp, 1, NEW.somaTotal_resp)
+                        ON CONFLICT(perfil_resp) DO UPDATE SET
+                            total = total + 1,
+                            soma_pontuacao = soma_pontuacao + excluded.soma_pontuacao;
+                    END
+                ''')
+            
+                # Tabela agregada RespostasPeriodo (contagem e soma por período
+                # de dia/hora e perfil), mantida pelos triggers abaixo; alimenta
+                # a timeline e a evolução temporal sem agrupar UserRespostas
+                cursor.execute(
+                    "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'RespostasPeriodo'"
                 )
-            ''')
+                periodos_existiam = cursor.fetchone() is not None
+            
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS RespostasPeriodo (
+                        granularidade TEXT NOT NULL,
+                        periodo TEXT NOT NULL,
+                        perfil_resp TEXT NOT NULL,
+                        total INTEGER NOT NULL DEFAULT 0,
+                        soma_pontuacao INTEGER NOT NULL DEFAULT 0,
+                        PRIMARY KEY (granularidade, periodo, perfil_resp)
+                    ) WITHOUT ROWID
+                ''')
+            
+                incrementos = ''.join(f'''
+                        INSERT INTO RespostasPeriodo (granularidade, periodo, perfil_resp, total, soma_pontuacao)
+                        VALUES ('{granularidade}', strftime('{formato}', NEW.data_resp), NEW.perfil_resp, 1, NEW.somaTotal_resp)
+                        ON CONFLICT(granularidade, periodo, perfil_resp) DO UPDATE SET
+                            total = total + 1,
+                            soma_pontuacao = soma_pontuacao + excluded.soma_pontuacao;'''
+                    for granularidade, formato in GRANULARIDADES_PERIODO.items())
+                decrementos = ''.join(f'''
+                        UPDATE RespostasPeriodo
+                        SET total = total - 1,
+                            soma_pontuacao = soma_pontuacao - OLD.somaTotal_resp
+                        WHERE granularidade = '{granularidade}'
+                          AND periodo = strftime('{formato}', OLD.data_resp)
+                          AND perfil_resp = OLD.perfil_resp;'''
+                    for granularidade, formato in GRANULARIDADES_PERIODO.items())
+            
+                cursor.execute(f'''
+                    CREATE TRIGGER IF NOT EXISTS trg_respostas_periodo_insert
+                    AFTER INSERT ON UserRespostas
+                    BEGIN{incrementos}
+                    END
+                ''')
+                cursor.execute(f'''
+                    CREATE TRIGGER IF NOT EXISTS trg_respostas_periodo_delete
+                    AFTER DELETE ON UserRespostas
+                    BEGIN{decrementos}
+                    END
+                ''')
+                cursor.execute(f'''
+                    CREATE TRIGGER IF NOT EXISTS trg_respostas_periodo_update
+                    AFTER UPDATE OF data_resp, somaTotal_resp, perfil_resp ON UserRespostas
+                    BEGIN{decrementos}{incrementos}
+                    END
+                ''')
+            
+                # Tabela VersaoTabelas: contador de alterações por tabela,
+                # incrementado por triggers (usado para invalidar caches)
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS VersaoTabelas (
+                        tabela TEXT PRIMARY KEY,
+                        versao INTEGER NOT NULL DEFAULT 0
+                    )
+                ''')
+            
+                for tabela in TABELAS_QUESTIONARIO:
+                    for evento in ('INSERT', 'UPDATE', 'DELETE'):
+                        cursor.execute(f'''
+                            CREATE TRIGGER IF NOT EXISTS trg_versao_{tabela.lower()}_{evento.lower()}
+                            AFTER {evento} ON {tabela}
+                            BEGIN
+                                INSERT INTO VersaoTabelas (tabela, versao) VALUES ('{tabela}', 1)
+                                ON CONFLICT(tabela) DO UPDATE SET versao = versao + 1;
+                            END
+                        ''')
             
-            self.connection.commit()
+                for evento in ('UPDATE', 'DELETE'):
+                    cursor.execute(f'''
+                        CREATE TRIGGER IF NOT EXISTS trg_versao_userrespostas_{evento.lower()}
+                        AFTER {evento} ON UserRespostas
+                        BEGIN
+                            INSERT INTO VersaoTabelas (tabela, versao) VALUES ('{VERSAO_REESCRITA_RESPOSTAS}', 1)
+                            ON CONFLICT(tabela) DO UPDATE SET versao = versao + 1;
+                        END
+                    ''')
+            
+                self._sincronizar_indices(cursor)
             print("✅ Tabelas criadas/verificadas com sucesso!")
             
+            # Banco antigo sem a tabela agregada: calcular a partir das respostas
+            if not agregado_existia:
+                self.reconstruir_estatisticas()
+            if not periodos_existiam:
+                self.reconstruir_periodos()
+            
         except Exception as e:
             print(f"❌ Erro ao criar tabelas: {e}")
     
+    def _sincronizar_indices(self, cursor):
+        """Cria os índices gerenciados e remove os que saíram da lista"""
+        nomes = {nome for nome, _ in INDICES_GERENCIADOS}
+        
+        cursor.execute("SELECT name FROM sqlite_master WHERE type = 'index' AND sql IS NOT NULL")
+        for (nome,) in cursor.fetchall():
+            if nome.startswith(PREFIXOS_INDICES_GERENCIADOS) and nome not in nomes:
+                cursor.execute(f"DROP INDEX IF EXISTS {nome}")
+                print(f"🗑️ Índice obsoleto removido: {nome}")
+        
+        for nome, definicao in INDICES_GERENCIADOS:
+            cursor.execute(f"CREATE INDEX IF NOT EXISTS {nome} ON {definicao}")
+    
     def insert_initial_data(self):
         """Insere perguntas e respostas iniciais"""
         try:
-            cursor = self.connection.cursor()
+            with self.pool.escrita() as conexao:
+                cursor = conexao.cursor()
             
-            # Verificar se já existem perguntas para não duplicar
-            cursor.execute("SELECT COUNT(*) FROM Perguntas")
-            count = cursor.fetchone()[0]
-            print(f"📊 Perguntas no banco: {count}")
+                # Verificar se já existem perguntas para não duplicar
+                cursor.execute("SELECT COUNT(*) FROM Perguntas")
+                count = cursor.fetchone()[0]
+                print(f"📊 Perguntas no banco: {count}")
             
-            if count == 0:
-                print("📥 Inserindo dados iniciais...")
+                if count == 0:
+                    print("📥 Inserindo dados iniciais...")
                 
-                # Inserir perguntas
-                perguntas = [
-                    ('Você já sofreu bullying?', 1),
-                    ('Você já presenciou alguém sofrendo bullying?', 2),
-                    ('Como você reage ao ver uma situação de bullying?', 3),
-                    ('Você já praticou bullying?', 4),
-                    ('Na sua escola/trabalho, há ações contra bullying?', 5),
-                    ('Você acha que o bullying pode causar traumas duradouros?', 6),
-                    ('Se alguém próximo fizesse bullying, você interviria?', 7),
-                    ('Você já foi excluído de grupos ou atividades?', 8),
-                    ('Como você descreve o ambiente onde vive/trabalha/estuda?', 9),
-                    ('Você busca aprender sobre empatia e respeito?', 10)
-                ]
+                    # Inserir perguntas
+                    perguntas = [
+                        ('Você já sofreu bullying?', 1),
+                        ('Você já presenciou alguém sofrendo bullying?', 2),
+                        ('Como você reage ao ver uma situação de bullying?', 3),
+                        ('Você já praticou bullying?', 4),
+                        ('Na sua escola/trabalho, há ações contra bullying?', 5),
+                        ('Você acha que o bullying pode causar traumas duradouros?', 6),
+                        ('Se alguém próximo fizesse bullying, você interviria?', 7),
+                        ('Você já foi excluído de grupos ou atividades?', 8),
+                        ('Como você descreve o ambiente onde vive/trabalha/estuda?', 9),
+                        ('Você busca aprender sobre empatia e respeito?', 10)
+                    ]
                 
-                cursor.executemany(
-                    "INSERT INTO Perguntas (texto_perg, ordem_perg) VALUES (?, ?)",
-                    perguntas
-                )
+                    cursor.executemany(
+                        "INSERT INTO Perguntas (texto_perg, ordem_perg) VALUES (?, ?)",
+                        perguntas
+                    )
                 
-                # Inserir opções de resposta
-                opcoes_resposta = [
-                    # Pergunta 1
-                    (1, 'Nunca', 1),
-                    (1, 'Ocasionalmente, mas não me afetou profundamente', 2),
-                    (1, 'Sim, e isso impactou minha autoestima ou saúde mental', 3),
+                    # Inserir opções de resposta
+                    opcoes_resposta = [
+                        # Pergunta 1
+                        (1, 'Nunca', 1),
+                        (1, 'Ocasionalmente, mas não me afetou profundamente', 2),
+                        (1, 'Sim, e isso impactou minha autoestima ou saúde mental', 3),
                     
-                    # Pergunta 2
-                    (2, 'Nunca', 1),
-                    (2, 'Sim, e tentei intervir ou ajudar', 3),
-                    (2, 'Sim, mas não soube como agir', 2),
+                        # Pergunta 2
+                        (2, 'Nunca', 1),
+                        (2, 'Sim, e tentei intervir ou ajudar', 3),
+                        (2, 'Sim, mas não soube como agir', 2),
                     
-                    # Pergunta 3
-                    (3, 'Ignoro ou evito me envolver', 1),
-                    (3, 'Busco ajuda de um adulto ou autoridade', 3),
-                    (3, 'Defendo a vítima diretamente', 2),
+                        # Pergunta 3
+                        (3, 'Ignoro ou evito me envolver', 1),
+                        (3, 'Busco ajuda de um adulto ou autoridade', 3),
+                        (3, 'Defendo a vítima diretamente', 2),
                     
-                    # Pergunta 4
-                    (4, 'Nunca', 3),
-                    (4, 'Já participei indiretamente (como risadas)', 2),
-                    (4, 'Sim, mas me arrependo hoje', 1),
+                        # Pergunta 4
+                        (4, 'Nunca', 3),
+                        (4, 'Já participei indiretamente (como risadas)', 2),
+                        (4, 'Sim, mas me arrependo hoje', 1),
                     
-                    # Pergunta 5
-                    (5, 'Sim, e são eficazes', 3),
-                    (5, 'Existem, mas não são divulgadas', 2),
-                    (5, 'Não há iniciativas', 1),
+                        # Pergunta 5
+                        (5, 'Sim, e são eficazes', 3),
+                        (5, 'Existem, mas não são divulgadas', 2),
+                        (5, 'Não há iniciativas', 1),
                     
-                    # Pergunta 6
-                    (6, 'Sim, e é um problema grave', 3),
-                    (6, 'Depende da situação', 2),
-                    (6, 'Não, é algo passageiro', 1),
+                        # Pergunta 6
+                        (6, 'Sim, e é um problema grave', 3),
+                        (6, 'Depende da situação', 2),
+                        (6, 'Não, é algo passageiro', 1),
                     
-                    # Pergunta 7
-                    (7, 'Sim, diretamente', 3),
-                    (7, 'Conversaria em privado', 2),
-                    (7, 'Não me envolveria', 1),
+                        # Pergunta 7
+                        (7, 'Sim, diretamente', 3),
+                        (7, 'Conversaria em privado', 2),
+                        (7, 'Não me envolveria', 1),
                     
-                    # Pergunta 8
-                    (8, 'Nunca', 1),
-                    (8, 'Ocasionalmente', 2),
-                    (8, 'Frequentemente', 3),
+                        # Pergunta 8
+                        (8, 'Nunca', 1),
+                        (8, 'Ocasionalmente', 2),
+                        (8, 'Frequentemente', 3),
                     
-                    # Pergunta 9
-                    (9, 'Respeitoso e inclusivo', 3),
-                    (9, 'Há conflitos, mas são raros', 2),
-                    (9, 'Hostil e competitivo', 1),
+                        # Pergunta 9
+                        (9, 'Respeitoso e inclusivo', 3),
+                        (9, 'Há conflitos, mas são raros', 2),
+                        (9, 'Hostil e competitivo', 1),
                     
-                    # Pergunta 10
-                    (10, 'Sim, constantemente', 3),
-                    (10, 'Às vezes, quando necessário', 2),
-                    (10, 'Não vejo necessidade', 1)
-                ]
+                        # Pergunta 10
+                        (10, 'Sim, constantemente', 3),
+                        (10, 'Às vezes, quando necessário', 2),
+                        (10, 'Não vejo necessidade', 1)
+                    ]
                 
-                cursor.executemany(
-                    "INSERT INTO Resposta (id_pergunta, texto_opcao, pontuacao) VALUES (?, ?, ?)",
-                    opcoes_resposta
-                )
-                
-                self.connection.commit()
-                print("✅ Dados iniciais inseridos com sucesso!")
-            else:
-                print("✅ Dados já existem no banco.")
+                    cursor.executemany(
+                        "INSERT INTO Resposta (id_pergunta, texto_opcao, pontuacao) VALUES (?, ?, ?)",
+                        opcoes_resposta
+                    )
+                    print("✅ Dados iniciais inseridos com sucesso!")
+                else:
+                    print("✅ Dados já existem no banco.")
             
         except Exception as e:
             print(f"❌ Erro ao inserir dados iniciais: {e}")
     
     def buscar_perguntas(self):
-        """Busca todas as perguntas com suas opções"""
+        """Busca todas as perguntas com suas opções (uma única consulta)"""
         try:
             cursor = self.connection.cursor()
+            cursor.execute('''
+                SELECT 
+                    p.id_perg, p.texto_perg, p.ordem_perg,
+                    r.id_opcao, r.id_pergunta, r.texto_opcao, r.pontuacao
+                FROM Perguntas p 
+                LEFT JOIN Resposta r ON r.id_pergunta = p.id_perg
+                ORDER BY p.ordem_perg, p.id_perg, r.id_opcao
+            ''')
             
-            # Buscar perguntas ordenadas
-            cursor.execute("SELECT * FROM Perguntas ORDER BY ordem_perg")
             perguntas = []
             for row in cursor.fetchall():
-                pergunta = dict(row)
-                perguntas.append(pergunta)
-            
-            print(f"📋 Encontradas {len(perguntas)} perguntas")
-            
-            # Para cada pergunta, buscar suas opções
-            for pergunta in perguntas:
-                cursor.execute(
-                    "SELECT * FROM Resposta WHERE id_pergunta = ? ORDER BY id_opcao",
-                    (pergunta['id_perg'],)
-                )
-                opcoes = []
-                for row in cursor.fetchall():
-                    opcoes.append(dict(row))
-                pergunta['opcoes'] = opcoes
-                print(f"  📝 Pergunta {pergunta['id_perg']}: {len(opcoes)} opções")
+                if not perguntas or perguntas[-1]['id_perg'] != row['id_perg']:
+                    perguntas.append({
+                        'id_perg': row['id_perg'],
+                        'texto_perg': row['texto_perg'],
+                        'ordem_perg': row['ordem_perg'],
+                        'opcoes': []
+                    })
+                if row['id_opcao'] is not None:
+                    perguntas[-1]['opcoes'].append({
+                        'id_opcao': row['id_opcao'],
+                        'id_pergunta': row['id_pergunta'],
+                        'texto_opcao': row['texto_opcao'],
+                        'pontuacao': row['pontuacao']
+                    })
             
             return perguntas
         except Exception as e:
             print(f"❌ Erro ao buscar perguntas: {e}")
             return []
     
+    def obter_versao_tabelas(self, tabelas):
+        """Retorna a tupla de versões (VersaoTabelas) das tabelas informadas"""
+        cursor = self.connection.cursor()
+        marcadores = ', '.join('?' for _ in tabelas)
+        cursor.execute(
+            f"SELECT tabela, versao FROM VersaoTabelas WHERE tabela IN ({marcadores})",
+            tuple(tabelas)
+        )
+        versoes = {row['tabela']: row['versao'] for row in cursor.fetchall()}
+        return tuple(versoes.get(tabela, 0) for tabela in tabelas)
+    
+    def obter_geracao_respostas(self):
+        """Quantas vezes linhas de UserRespostas foram alteradas ou excluídas
+        
+        Inserções não mudam a geração; caches que só acrescentam linhas novas
+        (como a análise vetorizada) recarregam tudo quando ela muda.
+        """
+        return self.obter_versao_tabelas((VERSAO_REESCRITA_RESPOSTAS,))[0]
+    
+    def obter_questionario(self):
+        """Retorna o snapshot imutável do questionário (tupla de Pergunta)
+        
+        O snapshot é montado uma vez e reaproveitado até que Perguntas ou
+        Resposta sejam alteradas (detectado pela tabela VersaoTabelas).
+        """
+        return self.obter_questionario_versionado()[1]
+    
+    def obter_questionario_versionado(self):
+        """Retorna (versão das tabelas, snapshot do questionário)
+        
+        A versão serve de chave para caches derivados do questionário, como
+        o fragmento de template do formulário. Em caso de erro, (None, ()).
+        """
+        try:
+            versao = self.obter_versao_tabelas(TABELAS_QUESTIONARIO)
+        except Exception as e:
+            print(f"❌ Erro ao verificar versão do questionário: {e}")
+            return None, tuple()
+        
+        cache = self._questionario
+        if cache is not None and cache[0] == versao:
+            return cache
+        
+        with self._lock_questionario:
+            cache = self._questionario
+            if cache is not None and cache[0] == versao:
+                return cache
+            
+            perguntas = self.buscar_perguntas()
+            questionario = tuple(
+                Pergunta(
+                    id_perg=p['id_perg'],
+                    texto_perg=p['texto_perg'],
+                    ordem_perg=p['ordem_perg'],
+                    opcoes=tuple(Opcao(**opcao) for opcao in p['opcoes'])
+                )
+                for p in perguntas
+            )
+            if questionario:
+                self._questionario = (versao, questionario)
+                print(f"📋 Questionário carregado: {len(questionario)} perguntas")
+            return versao, questionario
+    
     def salvar_resposta_usuario(self, soma_total, perfil):
         """Salva o resultado do questionário do usuário"""
         try:
-            cursor = self.connection.cursor()
-            cursor.execute(
-                "INSERT INTO UserRespostas (somaTotal_resp, perfil_resp) VALUES (?, ?)",
-                (soma_total, perfil)
-            )
-            self.connection.commit()
+            with self.pool.escrita() as conexao:
+                cursor = conexao.cursor()
+                cursor.execute(
+                    "INSERT INTO UserRespostas (somaTotal_resp, perfil_resp) VALUES (?, ?)",
+                    (soma_total, perfil)
+                )
+            self._incrementar_versao_respostas()
             print(f"💾 Resposta salva: {soma_total} pontos - {perfil}")
             return True
         except Exception as e:
             print(f"❌ Erro ao salvar resposta do usuário: {e}")
             return False
     
+    def salvar_respostas_lote(self, registros):
+        """Salva vários resultados numa única transação
+        
+        registros: lista de (soma_total, perfil, data_resp), com data_resp
+        None para usar o horário atual. Retorna True se todos foram salvos.
+        """
+        if not registros:
+            return True
+        try:
+            with self.pool.escrita() as conexao:
+                cursor = conexao.cursor()
+                cursor.executemany(
+                    "INSERT INTO UserRespostas (data_resp, somaTotal_resp, perfil_resp) "
+                    "VALUES (COALESCE(?, CURRENT_TIMESTAMP), ?, ?)",
+                    [(data_resp, soma_total, perfil) for soma_total, perfil, data_resp in registros]
+                )
+            self._incrementar_versao_respostas()
+            print(f"💾 Lote salvo: {len(registros)} respostas")
+            return True
+        except Exception as e:
+            print(f"❌ Erro ao salvar lote de respostas: {e}")
+            return False
+    
+    def _incrementar_versao_respostas(self):
+        """Marca que os dados de UserRespostas mudaram"""
+        with self._lock_versao:
+            self.versao_respostas += 1
+            self.alteracao_respostas = time.time()
+    
+    def versao_cache(self):
+        """Retorna (versão, horário da última alteração) de UserRespostas
+        
+        A versão junta o contador local a uma versão que todos os processos
+        enxergam: MAX(id_resp) (inserções) e a geração das reescritas
+        (UPDATE/DELETE, via VersaoTabelas). Essa parte só é relida do banco
+        quando o PRAGMA data_version muda, isto é, depois de um commit de
+        qualquer conexão; enquanto isso, a resposta sai da memória.
+        """
+        try:
+            dados = self.pool.versao_dados()
+        except Exception as e:
+            print(f"❌ Erro ao ler o PRAGMA data_version: {e}")
+            dados = None
+        with self._lock_versao:
+            if dados is None or dados != self._versao_dados_vista:
+                compartilhada = self._ler_versao_compartilhada()
+                if self._versao_compartilhada is not None and compartilhada != self._versao_compartilhada:
+                    self.alteracao_respostas = time.time()
+                self._versao_compartilhada = compartilhada
+                self._versao_dados_vista = dados
+            return (self.versao_respostas,) + self._versao_compartilhada, self.alteracao_respostas
+    
+    def _ler_versao_compartilhada(self):
+        """(MAX(id_resp), geração das reescritas); em caso de erro, um valor único que invalida os caches"""
+        try:
+            cursor = self.connection.cursor()
+            cursor.execute('''
+                SELECT (SELECT MAX(id_resp) FROM UserRespostas),
+                       (SELECT versao FROM VersaoTabelas WHERE tabela = ?)
+            ''', (VERSAO_REESCRITA_RESPOSTAS,))
+            maior_id, geracao = cursor.fetchone()
+            return (maior_id or 0, geracao or 0)
+        except Exception as e:
+            print(f"❌ Erro ao ler a versão das respostas: {e}")
+            return (None, time.time_ns())
+    
+    def obter_versao_respostas(self):
+        """Retorna a versão atual dos dados de respostas
+        
+        Combina o contador local (escritas feitas por esta instância) com o
+        PRAGMA data_version lido na conexão monitora do pool, que muda quando
+        qualquer outra conexão (outra thread ou, por exemplo,
+        populate_user_responses.py) grava no arquivo do banco.
+        Retorna None se a versão não puder ser determinada.
+        """
+        try:
+            return (self.versao_respostas, self.pool.versao_dados())
+        except Exception as e:
+            print(f"❌ Erro ao obter versão dos dados: {e}")
+            return None
+    
     def buscar_estatisticas(self):
         """Busca estatísticas das respostas dos usuários"""
         try:
             cursor = self.connection.cursor()
             
-            # Contagem por perfil
+            # Contagem por perfil (tabela agregada, independe do nº de respostas)
             cursor.execute('''
-                SELECT perfil_resp, COUNT(*) as total 
-                FROM UserRespostas 
-                GROUP BY perfil_resp
+                SELECT perfil_resp, total 
+                FROM EstatisticasPerfil 
+                WHERE total > 0
                 ORDER BY total DESC
             ''')
             estatisticas = [dict(row) for row in cursor.fetchall()]
             
             # Total de respostas
-            cursor.execute("SELECT COUNT(*) as total FROM UserRespostas")
-            total_geral = cursor.fetchone()[0]
+            total_geral = sum(perfil['total'] for perfil in estatisticas)
             
             return {
                 'perfis': estatisticas,
@@ -230,6 +613,60 @@ class Database:
             print(f"❌ Erro ao buscar estatísticas: {e}")
             return {'perfis': [], 'total_geral': 0}
     
+    def reconstruir_estatisticas(self):
+        """Recalcula a tabela EstatisticasPerfil a partir de UserRespostas"""
+        try:
+            with self.pool.escrita() as conexao:
+                cursor = conexao.cursor()
+                cursor.execute("DELETE FROM EstatisticasPerfil")
+                cursor.execute('''
+                    INSERT INTO EstatisticasPerfil (perfil_resp, total, soma_pontuacao)
+                    SELECT perfil_resp, COUNT(*), SUM(somaTotal_resp)
+                    FROM UserRespostas
+                    GROUP BY perfil_resp
+                ''')
+            self._incrementar_versao_respostas()
+            print(f"🔄 Estatísticas por perfil reconstruídas ({cursor.rowcount} perfis)")
+            return True
+        except Exception as e:
+            print(f"❌ Erro ao reconstruir estatísticas: {e}")
+            return False
+    
+    def reconstruir_periodos(self):
+        """Recalcula a tabela RespostasPeriodo (dia e hora) a partir de UserRespostas"""
+        try:
+            with self.pool.escrita() as conexao:
+                cursor = conexao.cursor()
+                cursor.execute("DELETE FROM RespostasPeriodo")
+                for granularidade, formato in GRANULARIDADES_PERIODO.items():
+                    cursor.execute('''
+                        INSERT INTO RespostasPeriodo (granularidade, periodo, perfil_resp, total, soma_pontuacao)
+                        SELECT ?, strftime(?, data_resp) as periodo, perfil_resp, COUNT(*), SUM(somaTotal_resp)
+                        FROM UserRespostas
+                        GROUP BY periodo, perfil_resp
+                    ''', (granularidade, formato))
+                cursor.execute("SELECT COUNT(*) FROM RespostasPeriodo")
+                linhas = cursor.fetchone()[0]
+            self._incrementar_versao_respostas()
+            print(f"🔄 Respostas por período reconstruídas ({linhas} linhas)")
+            return True
+        except Exception as e:
+            print(f"❌ Erro ao reconstruir respostas por período: {e}")
+            return False
+    
+    def _buscar_periodos(self, cursor, sql, params):
+        """Agrupa as linhas (periodo, perfil_resp, total, soma_pontuacao) por período, na ordem recebida"""
+        periodos = []
+        atual = None
+        for row in cursor.execute(sql, params):
+            if atual is None or atual['periodo'] != row['periodo']:
+                atual = {'periodo': row['periodo'], 'total': 0, 'soma_pontuacao': 0, 'perfis': {}}
+                periodos.append(atual)
+            atual['total'] += row['total']
+            atual['soma_pontuacao'] += row['soma_pontuacao']
+            atual['perfis'][row['perfil_resp']] = row['total']
+        return periodos
+    
     def buscar_todas_respostas(self):
         """Busca todas as respostas dos usuários para análise detalhada"""
         try:
@@ -249,14 +686,16 @@ class Database:
         """Busca a distribuição das pontuações totais"""
         try:
             cursor = self.connection.cursor()
+            # Agrupa por um dos índices de (pontuação, perfil); o ORDER BY só
+            # ordena os grupos, no máximo algumas dezenas de linhas
             cursor.execute('''
                 SELECT 
                     somaTotal_resp,
                     COUNT(*) as quantidade,
                     perfil_resp
-                FROM UserRespostas 
+                FROM UserRespostas
                 GROUP BY somaTotal_resp, perfil_resp
-                ORDER BY somaTotal_resp
+                ORDER BY somaTotal_resp, perfil_resp
             ''')
             distribuicao = [dict(row) for row in cursor.fetchall()]
             return distribuicao
@@ -269,42 +708,51 @@ class Database:
         try:
             cursor = self.connection.cursor()
             
-            # Estatísticas básicas
+            # Estatísticas básicas (totais e média vêm da tabela agregada)
             cursor.execute('''
                 SELECT 
-                    COUNT(*) as total_respostas,
-                    AVG(somaTotal_resp) as media_pontuacao,
-                    MIN(somaTotal_resp) as minima_pontuacao,
-                    MAX(somaTotal_resp) as maxima_pontuacao
-                FROM UserRespostas
+                    COALESCE(SUM(total), 0) as total_respostas,
+                    SUM(soma_pontuacao) * 1.0 / NULLIF(SUM(total), 0) as media_pontuacao
+                FROM EstatisticasPerfil
             ''')
             stats_gerais = dict(cursor.fetchone())
-            
-            # Estatísticas por perfil
+            # Subconsultas separadas: MIN e MAX juntos forçam uma varredura
             cursor.execute('''
                 SELECT 
-                    perfil_resp,
-                    COUNT(*) as total,
-                    AVG(somaTotal_resp) as media_pontuacao,
-                    MIN(somaTotal_resp) as minima_pontuacao,
-                    MAX(somaTotal_resp) as maxima_pontuacao
-                FROM UserRespostas 
-                GROUP BY perfil_resp
-                ORDER BY total DESC
+                    (SELECT MIN(somaTotal_resp) FROM UserRespostas) as minima_pontuacao,
+                    (SELECT MAX(somaTotal_resp) FROM UserRespostas) as maxima_pontuacao
             ''')
-            stats_perfis = [dict(row) for row in cursor.fetchall()]
+            stats_gerais.update(dict(cursor.fetchone()))
             
-            # Distribuição temporal (últimos 30 dias)
+            # Estatísticas por perfil
             cursor.execute('''
                 SELECT 
-                    DATE(data_resp) as data,
-                    COUNT(*) as respostas_dia
-                FROM UserRespostas 
-                WHERE data_resp >= date('now', '-30 days')
-                GROUP BY DATE(data_resp)
-                ORDER BY data DESC
+                    e.perfil_resp,
+                    e.total,
+                    e.soma_pontuacao * 1.0 / e.total as media_pontuacao,
+                    (SELECT MIN(somaTotal_resp) FROM UserRespostas u
+                     WHERE u.perfil_resp = e.perfil_resp) as minima_pontuacao,
+                    (SELECT MAX(somaTotal_resp) FROM UserRespostas u
+                     WHERE u.perfil_resp = e.perfil_resp) as maxima_pontuacao
+                FROM EstatisticasPerfil e 
+                WHERE e.total > 0
+                ORDER BY e.total DESC
             ''')
-            timeline = [dict(row) for row in cursor.fetchall()]
+            stats_perfis = [dict(row) for row in cursor.fetchall()]
+            
+            # Distribuição temporal (últimos 30 dias), da tabela RespostasPeriodo
+            periodos = self._buscar_periodos(cursor, '''
+                SELECT periodo, perfil_resp, total, soma_pontuacao
+                FROM RespostasPeriodo
+                WHERE granularidade = 'dia'
+                  AND periodo >= date('now', '-30 days')
+                  AND total > 0
+                ORDER BY periodo DESC, perfil_resp DESC
+            ''', ())
+            timeline = [
+                {'data': periodo['periodo'], 'respostas_dia': periodo['total'], 'perfis': periodo['perfis']}
+                for periodo in periodos
+            ]
             
             return {
                 'geral': stats_gerais,
@@ -323,10 +771,14 @@ class Database:
     def limpar_respostas(self):
         """Limpa todas as respostas dos usuários (para testes)"""
         try:
-            cursor = self.connection.cursor()
-            cursor.execute("DELETE FROM UserRespostas")
-            cursor.execute("DELETE FROM sqlite_sequence WHERE name='UserRespostas'")
-            self.connection.commit()
+            with self.pool.escrita() as conexao:
+                cursor = conexao.cursor()
+                cursor.execute("DELETE FROM UserRespostas")
+                cursor.execute("DELETE FROM sqlite_sequence WHERE name='UserRespostas'")
+                # Os triggers já zeraram os contadores; remove as linhas vazias
+                cursor.execute("DELETE FROM EstatisticasPerfil")
+                cursor.execute("DELETE FROM RespostasPeriodo")
+            self._incrementar_versao_respostas()
             print("🗑️ Todas as respostas foram limpas")
             return True
         except Exception as e:
@@ -338,8 +790,11 @@ class Database:
         try:
             dados = {}
             
-            # Perguntas e opções
-            dados['perguntas'] = self.buscar_perguntas()
+            # Perguntas e opções (do snapshot em cache)
+            dados['perguntas'] = [
+                dict(pergunta._asdict(), opcoes=[opcao._asdict() for opcao in pergunta.opcoes])
+                for pergunta in self.obter_questionario()
+            ]
             
             # Respostas dos usuários
             dados['respostas_usuarios'] = self.buscar_todas_respostas()
@@ -357,6 +812,15 @@ class Database:
             print(f"❌ Erro ao exportar dados: {e}")
             return None
     
+    def iterar_respostas(self, desde=None, ate=None, apos_id=0, tamanho_lote=1000):
+        """Itera UserRespostas em ordem de id_resp, lendo o cursor com fetchmany
+        
+        desde/ate filtram data_resp (ate exclusivo). apos_id retoma uma
+        exportação interrompida a partir do último id_resp recebido. A
+        memória usada não depende do número de linhas.
+        """
+        yield from iterar_respostas(self.connection, desde, ate, apos_id, tamanho_lote)
+    
     def buscar_resumo_perfis(self):
         """Busca um resumo simplificado dos perfis para gráficos rápidos"""
         try:
@@ -365,10 +829,10 @@ class Database:
             cursor.execute('''
                 SELECT 
                     perfil_resp as perfil,
-                    COUNT(*) as quantidade,
-                    ROUND(COUNT(*) * 100.0 / (SELECT COUNT(*) FROM UserRespostas), 2) as percentual
-                FROM UserRespostas 
-                GROUP BY perfil_resp
+                    total as quantidade,
+                    ROUND(total * 100.0 / (SELECT SUM(total) FROM EstatisticasPerfil), 2) as percentual
+                FROM EstatisticasPerfil 
+                WHERE total > 0
                 ORDER BY quantidade DESC
             ''')
             
@@ -379,57 +843,74 @@ class Database:
             print(f"❌ Erro ao buscar resumo de perfis: {e}")
             return []
     
-    def buscar_evolucao_temporal(self):
-        """Busca a evolução temporal das respostas"""
+    def buscar_evolucao_temporal(self, granularidade='dia', limite=30):
+        """Busca a evolução temporal das respostas (últimos 'limite' dias ou horas com respostas)
+        
+        Lê a tabela RespostasPeriodo: o custo depende do número de períodos,
+        não do número de respostas. Levanta ValueError para granularidade inválida.
+        """
+        if granularidade not in GRANULARIDADES_PERIODO:
+            raise ValueError(f"Granularidade inválida: {granularidade}")
         try:
             cursor = self.connection.cursor()
             
-            cursor.execute('''
-                SELECT 
-                    DATE(data_resp) as data,
-                    COUNT(*) as total_respostas,
-                    AVG(somaTotal_resp) as media_pontuacao,
-                    GROUP_CONCAT(perfil_resp) as perfis
-                FROM UserRespostas 
-                GROUP BY DATE(data_resp)
-                ORDER BY data DESC
-                LIMIT 30
-            ''')
-            
-            evolucao = []
-            for row in cursor.fetchall():
-                data_row = dict(row)
-                # Processar perfis para contar ocorrências
-                if data_row['perfis']:
-                    perfis_list = data_row['perfis'].split(',')
-                    contagem_perfis = {}
-                    for perfil in perfis_list:
-                        contagem_perfis[perfil] = contagem_perfis.get(perfil, 0) + 1
-                    data_row['distribuicao_perfis'] = contagem_perfis
-                
-                evolucao.append(data_row)
+            periodos = self._buscar_periodos(cursor, '''
+                WITH ultimos AS (
+                    SELECT DISTINCT periodo
+                    FROM RespostasPeriodo
+                    WHERE granularidade = ? AND total > 0
+                    ORDER BY periodo DESC
+                    LIMIT ?
+                )
+                SELECT periodo, perfil_resp, total, soma_pontuacao
+                FROM RespostasPeriodo
+                WHERE granularidade = ?
+                  AND periodo >= (SELECT MIN(periodo) FROM ultimos)
+                  AND total > 0
+                ORDER BY periodo DESC, perfil_resp DESC
+            ''', (granularidade, int(limite), granularidade))
             
-            return evolucao
+            return [{
+                'data': periodo['periodo'],
+                'total_respostas': periodo['total'],
+                'media_pontuacao': periodo['soma_pontuacao'] / periodo['total'],
+                'distribuicao_perfis': periodo['perfis']
+            } for periodo in periodos]
             
         except Exception as e:
             print(f"❌ Erro ao buscar evolução temporal: {e}")
             return []
     
     def close(self):
-        """Fecha a conexão com o banco"""
-        if self.connection:
-            self.connection.close()
+        """Fecha as conexões com o banco"""
+        if self.pool:
+            self.pool.fechar()
             print("✅ Conexão com SQLite fechada.")
 
-# Instância global do banco de dados
-database = Database()
+# Instância global do banco de dados, criada na primeira chamada de get_db()
+# (importar o módulo não abre nem migra o banco)
+_database = None
+_lock_instancia = threading.Lock()
 
 def get_db():
     """Retorna a instância do banco de dados"""
-    return database
+    global _database
+    if _database is None:
+        with _lock_instancia:
+            if _database is None:
+                _database = Database()
+    return _database
 
 # Teste básico se executado diretamente
+# Uso: python formDB.py [reconstruir-estatisticas]
 if __name__ == "__main__":
+    import sys
+    
+    if len(sys.argv) > 1 and sys.argv[1] == 'reconstruir-estatisticas':
+        db = get_db()
+        sucesso = db.reconstruir_estatisticas() and db.reconstruir_periodos()
+        sys.exit(0 if sucesso else 1)
+    
     db = Database()
     
     print("\n" + "="*50)
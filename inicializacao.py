@@ -0,0 +1,61 @@
+# inicializacao.py
+"""Relatório de tempo de inicialização da aplicação
+
+Mede o tempo de importação de cada módulo carregado pelo app.py, etapas
+carregadas sob demanda (como o gerenciador de gráficos) e o tempo até a
+primeira resposta, para que regressões no cold start fiquem visíveis.
+"""
+import threading
+import time
+from contextlib import contextmanager
+
+class RelatorioInicializacao:
+    def __init__(self):
+        self.inicio = time.perf_counter()
+        self.modulos = {}
+        self.sob_demanda = {}
+        self.app_pronto = None
+        self.primeira_resposta = None
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def medir(self, nome, sob_demanda=False):
+        """Mede o tempo de um bloco (normalmente um import)"""
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            duracao = time.perf_counter() - inicio
+            destino = self.sob_demanda if sob_demanda else self.modulos
+            with self._lock:
+                destino[nome] = round(duracao * 1000, 2)
+
+    def marcar_app_pronto(self):
+        """Marca o fim da carga do módulo da aplicação"""
+        self.app_pronto = time.perf_counter() - self.inicio
+        print(f"🚀 Aplicação carregada em {self.app_pronto * 1000:.1f} ms")
+        for nome, ms in sorted(self.modulos.items(), key=lambda item: item[1], reverse=True):
+            print(f"   {nome}: {ms} ms")
+
+    def registrar_resposta(self, rota):
+        """Registra o tempo até a primeira resposta (chamado a cada requisição)"""
+        if self.primeira_resposta is not None:
+            return
+        with self._lock:
+            if self.primeira_resposta is None:
+                duracao = time.perf_counter() - self.inicio
+                self.primeira_resposta = {'rota': rota, 'ms': round(duracao * 1000, 2)}
+                print(f"⏱️ Primeira resposta ({rota}) em {duracao * 1000:.1f} ms após o início")
+
+    def relatorio(self):
+        """Retorna o relatório em formato de dicionário"""
+        with self._lock:
+            return {
+                'importacao_ms': dict(self.modulos),
+                'sob_demanda_ms': dict(self.sob_demanda),
+                'app_pronto_ms': round(self.app_pronto * 1000, 2) if self.app_pronto is not None else None,
+                'primeira_resposta': self.primeira_resposta
+            }
+
+# Instância global
+relatorio_inicializacao = RelatorioInicializacao()
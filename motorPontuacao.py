@@ -0,0 +1,228 @@
+# motorPontuacao.py
+"""Motor de pontuação do questionário
+
+Recebe os IDs das opções escolhidas (Resposta.id_opcao), resolve os pontos
+por uma tabela opção→pontos pré-calculada a partir do snapshot do questionário
+e classifica a soma numa tabela de faixas ordenada. pontuar_lote() pontua
+milhares de envios de uma vez (vetorizado com NumPy quando disponível), para
+uso em envios em lote, importações e backfills.
+
+O NumPy é opcional e só é importado no primeiro lote, para não pesar na
+inicialização da aplicação.
+"""
+import bisect
+from collections import namedtuple
+
+# Faixas de pontuação ordenadas: (mínimo, máximo, perfil, descrição)
+FAIXAS_PERFIL = (
+    (10, 16, 'Alheio à Problemática',
+     'Você talvez não tenha vivenciado ou percebido o bullying de forma próxima. É importante se informar mais sobre o tema para ajudar a criar ambientes mais seguros.'),
+    (17, 23, 'Consciente mas Cauteloso',
+     'Você reconhece o bullying como um problema, mas pode hesitar em agir. Sua experiência é moderada, e há potencial para se tornar um aliado ativo.'),
+    (24, 30, 'Atuante na Causa',
+     'Você já vivenciou ou testemunhou bullying e tem uma postura proativa contra isso. Sua empatia e engajamento são fundamentais para mudanças.'),
+)
+
+PERFIL_FORA_DA_FAIXA = 'Fora da faixa'
+DESCRICAO_FORA_DA_FAIXA = 'Sua pontuação está fora da faixa esperada. Por favor, revise suas respostas.'
+
+_LIMITES_INFERIORES = [faixa[0] for faixa in FAIXAS_PERFIL]
+
+ERRO_QUESTIONARIO_INDISPONIVEL = 'Questionário indisponível'
+
+ResultadoPontuacao = namedtuple('ResultadoPontuacao', ['pontuacao', 'perfil', 'descricao', 'erro'])
+
+_np = None
+
+def _numpy():
+    """Importa o NumPy sob demanda; retorna None se não estiver instalado"""
+    global _np
+    if _np is None:
+        try:
+            import numpy
+            _np = numpy
+        except ImportError:  # Sem NumPy o lote é pontuado em Python puro
+            _np = False
+    return _np or None
+
+def classificar(soma_total):
+    """Retorna (perfil, descricao) para uma soma de pontos"""
+    indice = bisect.bisect_right(_LIMITES_INFERIORES, soma_total) - 1
+    if indice >= 0:
+        minimo, maximo, perfil, descricao = FAIXAS_PERFIL[indice]
+        if soma_total <= maximo:
+            return perfil, descricao
+    return PERFIL_FORA_DA_FAIXA, DESCRICAO_FORA_DA_FAIXA
+
+def _resultado(soma_total):
+    perfil, descricao = classificar(soma_total)
+    return ResultadoPontuacao(soma_total, perfil, descricao, None)
+
+def _erro(mensagem):
+    return ResultadoPontuacao(None, None, None, mensagem)
+
+def _converter_id(valor):
+    """int para IDs inteiros ou strings só de dígitos; None para o resto (floats, bools, ...)"""
+    if isinstance(valor, bool):
+        return None
+    if isinstance(valor, int):
+        return valor
+    if isinstance(valor, str) and valor.isascii() and valor.isdigit():
+        return int(valor)
+    return None
+
+def _somente_inteiros(lote):
+    """True se todos os envios são listas só de int (sem bool), prontas para o caminho NumPy"""
+    return all(
+        isinstance(envio, (list, tuple)) and all(type(id_opcao) is int for id_opcao in envio)
+        for envio in lote
+    )
+
+class MotorPontuacao:
+    def __init__(self, questionario):
+        """Pré-calcula as tabelas a partir do snapshot (tupla de Pergunta)"""
+        self.questionario = questionario
+        self.pontos_por_opcao = {}
+        self.pergunta_por_opcao = {}
+        for pergunta in questionario:
+            for opcao in pergunta.opcoes:
+                self.pontos_por_opcao[opcao.id_opcao] = opcao.pontuacao
+                self.pergunta_por_opcao[opcao.id_opcao] = pergunta.id_perg
+        self.ids_perguntas = sorted(pergunta.id_perg for pergunta in questionario)
+        self.total_perguntas = len(self.ids_perguntas)
+        self._tabelas_np = None
+
+    @property
+    def disponivel(self):
+        """False se o snapshot do questionário está vazio (erro no banco ou tabelas vazias)"""
+        return self.total_perguntas > 0
+
+    def opcoes_por_pontuacoes(self, pontuacoes):
+        """Converte o envio antigo (pontos de cada pergunta, na ordem do questionário) em IDs de opção
+
+        Cada valor precisa ser a pontuação de uma opção da pergunta
+        correspondente; levanta ValueError caso contrário.
+        """
+        if not isinstance(pontuacoes, (list, tuple)):
+            raise ValueError('As respostas devem ser uma lista de pontuações')
+        if len(pontuacoes) != self.total_perguntas:
+            raise ValueError(f'Esperadas {self.total_perguntas} respostas, recebidas {len(pontuacoes)}')
+        ids_opcoes = []
+        for pergunta, valor in zip(self.questionario, pontuacoes):
+            pontos = _converter_id(valor)
+            opcao = next((o for o in pergunta.opcoes if o.pontuacao == pontos), None)
+            if pontos is None or opcao is None:
+                raise ValueError('Opção de resposta inexistente')
+            ids_opcoes.append(opcao.id_opcao)
+        return ids_opcoes
+
+    def _obter_tabelas_np(self, np):
+        """Tabelas NumPy indexadas por id_opcao (-1 = opção inexistente)"""
+        if self._tabelas_np is None:
+            tamanho = max(self.pontos_por_opcao, default=0) + 1
+            pontos = np.full(tamanho, -1, dtype=np.int64)
+            perguntas = np.full(tamanho, -1, dtype=np.int64)
+            for id_opcao, valor in self.pontos_por_opcao.items():
+                pontos[id_opcao] = valor
+                perguntas[id_opcao] = self.pergunta_por_opcao[id_opcao]
+            self._tabelas_np = {
+                'pontos': pontos,
+                'perguntas': perguntas,
+                'ids_perguntas': np.array(self.ids_perguntas, dtype=np.int64),
+                'limites': np.array(_LIMITES_INFERIORES, dtype=np.int64),
+                'maximos': np.array([faixa[1] for faixa in FAIXAS_PERFIL], dtype=np.int64)
+            }
+        return self._tabelas_np
+
+    def pontuar(self, ids_opcoes):
+        """Pontua um envio; levanta ValueError se as opções forem inválidas"""
+        resultado = self._pontuar_um(ids_opcoes)
+        if resultado.erro:
+            raise ValueError(resultado.erro)
+        return resultado
+
+    def pontuar_lote(self, lote):
+        """Pontua uma lista de envios (cada um uma lista de id_opcao)
+
+        Retorna um ResultadoPontuacao por envio, na mesma ordem; envios
+        inválidos vêm com o campo erro preenchido em vez de levantar exceção.
+        """
+        if not lote:
+            return []
+        np = _numpy()
+        # asarray(int64) truncaria floats e aceitaria bools: só listas de int vão para o NumPy
+        if np is not None and self.disponivel and _somente_inteiros(lote):
+            try:
+                matriz = np.asarray(lote, dtype=np.int64)
+            except (TypeError, ValueError, OverflowError):
+                matriz = None  # Envios de tamanhos diferentes ou IDs fora do int64
+            if matriz is not None and matriz.ndim == 2 and matriz.shape[1] == self.total_perguntas:
+                return self._pontuar_matriz(np, matriz)
+        return [self._pontuar_um(ids_opcoes) for ids_opcoes in lote]
+
+    def _pontuar_matriz(self, np, matriz):
+        """Caminho vetorizado: uma linha por envio, uma coluna por pergunta"""
+        tabelas = self._obter_tabelas_np(np)
+        fora_da_tabela = (matriz < 0) | (matriz >= len(tabelas['pontos']))
+        indices = np.where(fora_da_tabela, 0, matriz)
+        pontos = tabelas['pontos'][indices]
+        perguntas = tabelas['perguntas'][indices]
+
+        opcao_invalida = (fora_da_tabela | (pontos < 0)).any(axis=1)
+        # Cada pergunta respondida exatamente uma vez
+        cobertura_ok = (np.sort(perguntas, axis=1) == tabelas['ids_perguntas']).all(axis=1)
+        somas = np.where(pontos < 0, 0, pontos).sum(axis=1)
+
+        faixas = np.searchsorted(tabelas['limites'], somas, side='right') - 1
+        na_faixa = (faixas >= 0) & (somas <= tabelas['maximos'][np.clip(faixas, 0, None)])
+
+        resultados = []
+        for soma, faixa, invalida, cobertura, dentro in zip(
+                somas.tolist(), faixas.tolist(), opcao_invalida.tolist(),
+                cobertura_ok.tolist(), na_faixa.tolist()):
+            if invalida:
+                resultados.append(_erro('Opção de resposta inexistente'))
+            elif not cobertura:
+                resultados.append(_erro('Cada pergunta deve ter exatamente uma resposta'))
+            elif dentro:
+                _, _, perfil, descricao = FAIXAS_PERFIL[faixa]
+                resultados.append(ResultadoPontuacao(soma, perfil, descricao, None))
+            else:
+                resultados.append(ResultadoPontuacao(soma, PERFIL_FORA_DA_FAIXA, DESCRICAO_FORA_DA_FAIXA, None))
+        return resultados
+
+    def _pontuar_um(self, ids_opcoes):
+        """Caminho escalar (também usado como fallback sem NumPy)"""
+        if not self.disponivel:
+            return _erro(ERRO_QUESTIONARIO_INDISPONIVEL)
+        if not isinstance(ids_opcoes, (list, tuple)):
+            return _erro('As opções devem ser uma lista de IDs')
+        if len(ids_opcoes) != self.total_perguntas:
+            return _erro(f'Esperadas {self.total_perguntas} respostas, recebidas {len(ids_opcoes)}')
+
+        soma_total = 0
+        perguntas = []
+        for id_opcao in ids_opcoes:
+            id_opcao = _converter_id(id_opcao)
+            if id_opcao not in self.pontos_por_opcao:
+                return _erro('Opção de resposta inexistente')
+            soma_total += self.pontos_por_opcao[id_opcao]
+            perguntas.append(self.pergunta_por_opcao[id_opcao])
+
+        if sorted(perguntas) != self.ids_perguntas:
+            return _erro('Cada pergunta deve ter exatamente uma resposta')
+
+        return _resultado(soma_total)
+
+# Motor global, reconstruído quando o snapshot do questionário muda
+_motor = None
+
+def obter_motor(db):
+    """Retorna o motor de pontuação para o questionário atual do banco"""
+    global _motor
+    questionario = db.obter_questionario()
+    motor = _motor
+    if motor is None or motor.questionario is not questionario:
+        motor = MotorPontuacao(questionario)
+        _motor = motor
+    return motor
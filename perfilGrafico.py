@@ -1,175 +1,295 @@
 # perfilGrafico.py
-import matplotlib
-matplotlib.use('Agg')  # Usar backend não-interativo
-import matplotlib.pyplot as plt
-import io
+import os
+import atexit
 import base64
+import hashlib
+import threading
+import time
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, CancelledError, TimeoutError as FuturoTimeout
+from concurrent.futures.process import BrokenProcessPool
+import renderizadorGrafico
 from formDB import get_db
 
+# Tipos de gráfico disponíveis (ver renderizadorGrafico.RENDERIZADORES)
+TIPOS_GRAFICO = ('barras', 'pizza')
+
+# Configuração do pool de renderização (0 workers = renderiza na própria thread)
+GRAFICO_MAX_WORKERS = int(os.environ.get('GRAFICO_MAX_WORKERS', '2'))
+GRAFICO_MAX_FILA = int(os.environ.get('GRAFICO_MAX_FILA', '8'))
+GRAFICO_TIMEOUT = float(os.environ.get('GRAFICO_TIMEOUT', '15'))
+
+class GraficoIndisponivel(Exception):
+    """Fila de renderização cheia ou tempo limite esgotado"""
+
 class GraficoPerfil:
-    def __init__(self):
-        self.db = get_db()
-    
+    def __init__(self, db=None, max_workers=GRAFICO_MAX_WORKERS, max_fila=GRAFICO_MAX_FILA,
+                 timeout=GRAFICO_TIMEOUT):
+        self.db = db if db is not None else get_db()
+        self.max_workers = max_workers
+        self.max_fila = max_fila
+        self.timeout = timeout
+
+        # Cache dos gráficos renderizados: tipo -> {'versao', 'png', 'etag', 'data_url'}
+        self._cache = {}
+        self._lock_cache = threading.Lock()
+        # Um lock por tipo: requisições simultâneas do mesmo gráfico esperam
+        # a mesma renderização em vez de disparar várias
+        self._locks_tipo = {tipo: threading.Lock() for tipo in TIPOS_GRAFICO}
+
+        # Pool de processos criado sob demanda
+        self._pool = None
+        self._lock_pool = threading.Lock()
+        self._vagas_fila = threading.BoundedSemaphore(max(max_fila, 1))
+
+        self._lock_metricas = threading.Lock()
+        self.metricas_cache = {
+            'hits': 0,
+            'misses': 0,
+            'renders': 0,
+            'tempo_render_total': 0.0,
+            'tempo_render_ultimo': 0.0,
+            'fila_atual': 0,
+            'rejeitados': 0,
+            'timeouts': 0
+        }
+
     def gerar_grafico_perfis(self):
         """Gera um gráfico de barras com a distribuição dos perfis"""
+        entrada = self._obter_grafico('barras')
+        return entrada['data_url'] if entrada else None
+
+    def gerar_grafico_pizza(self):
+        """Gera um gráfico de pizza com a distribuição dos perfis"""
+        entrada = self._obter_grafico('pizza')
+        return entrada['data_url'] if entrada else None
+
+    def obter_grafico_png(self, tipo):
+        """Retorna (bytes_png, etag) do gráfico ou None se não puder ser gerado"""
+        if tipo not in self._locks_tipo:
+            raise ValueError(f"Tipo de gráfico desconhecido: {tipo}")
+        entrada = self._obter_grafico(tipo)
+        if not entrada:
+            return None
+        return entrada['png'], entrada['etag']
+
+    def _obter_grafico(self, tipo):
+        """Retorna o gráfico do cache ou renderiza se os dados mudaram"""
+        entrada = self._buscar_cache(tipo, self.db.obter_versao_respostas())
+        if entrada:
+            return entrada
+
+        # Um único prazo para a espera do lock e a renderização: a requisição
+        # espera no máximo um GRAFICO_TIMEOUT no total
+        prazo = time.monotonic() + self.timeout
+        lock_tipo = self._locks_tipo[tipo]
+        if not lock_tipo.acquire(timeout=self.timeout):
+            self._contar('timeouts')
+            raise GraficoIndisponivel(f"Tempo esgotado aguardando o gráfico {tipo}")
+
         try:
-            # Buscar estatísticas do banco
-            stats = self.db.buscar_estatisticas()
-            perfis = stats.get('perfis', [])
-            
-            if not perfis:
-                # Retorna uma imagem placeholder se não houver dados
-                return self._gerar_placeholder()
-            
-            # Preparar dados para o gráfico
-            nomes_perfis = []
-            quantidades = []
-            cores = []
-            
-            # Definir cores para cada perfil
-            cores_perfis = {
-                'Alheio à Problemática': '#FF6B6B',
-                'Consciente mas Cauteloso': '#4ECDC4', 
-                'Atuante na Causa': '#45B7D1',
-                'Fora da faixa': '#96CEB4'
-            }
-            
-            for perfil_data in perfis:
-                perfil = perfil_data['perfil_resp']
-                quantidade = perfil_data['total']
-                
-                nomes_perfis.append(perfil)
-                quantidades.append(quantidade)
-                cores.append(cores_perfis.get(perfil, '#999999'))
-            
-            # Criar o gráfico
-            plt.figure(figsize=(12, 8))
-            bars = plt.bar(nomes_perfis, quantidades, color=cores, alpha=0.8, edgecolor='white', linewidth=2)
-            
-            # Personalizar o gráfico
-            plt.title('Distribuição de Perfis - Questionário Anti-Bullying', 
-                     fontsize=16, fontweight='bold', pad=20, color='#2d3748')
-            plt.xlabel('Perfis', fontsize=12, fontweight='bold', color='#2d3748')
-            plt.ylabel('Quantidade de Pessoas', fontsize=12, fontweight='bold', color='#2d3748')
-            
-            # Adicionar valores nas barras
-            for bar, quantidade in zip(bars, quantidades):
-                plt.text(bar.get_x() + bar.get_width()/2, bar.get_height() + 0.1,
-                        f'{quantidade}', ha='center', va='bottom', fontweight='bold', fontsize=11)
-            
-            # Estilizar o gráfico
-            plt.grid(axis='y', alpha=0.3, linestyle='--')
-            plt.gca().set_facecolor('#f8f9fa')
-            plt.gcf().patch.set_facecolor('white')
-            
-            # Remover bordas
-            for spine in plt.gca().spines.values():
-                spine.set_visible(False)
-            
-            # Rotacionar labels do eixo X se necessário
-            plt.xticks(rotation=15, ha='right')
-            plt.tight_layout()
-            
-            # Converter para base64
-            img = io.BytesIO()
-            plt.savefig(img, format='png', dpi=100, bbox_inches='tight')
-            img.seek(0)
-            graph_url = base64.b64encode(img.getvalue()).decode()
-            plt.close()
-            
-            return f"data:image/png;base64,{graph_url}"
-            
-        except Exception as e:
-            print(f"❌ Erro ao gerar gráfico: {e}")
-            return self._gerar_placeholder()
-    
+            # Outra thread pode ter renderizado enquanto esperávamos o lock
+            versao = self.db.obter_versao_respostas()
+            entrada = self._buscar_cache(tipo, versao)
+            if entrada:
+                return entrada
+
+            self._contar('misses')
+
+            try:
+                perfis = self._carregar_perfis()
+                inicio = time.perf_counter()
+                png = self._renderizar(tipo, perfis, prazo)
+                duracao = time.perf_counter() - inicio
+            except GraficoIndisponivel:
+                raise
+            except Exception as e:
+                print(f"❌ Erro ao gerar gráfico ({tipo}): {e}")
+                png = self._gerar_placeholder()
+                return self._montar_entrada(None, png) if png else None
+
+            with self._lock_metricas:
+                self.metricas_cache['renders'] += 1
+                self.metricas_cache['tempo_render_total'] += duracao
+                self.metricas_cache['tempo_render_ultimo'] = duracao
+
+            entrada = self._montar_entrada(versao, png)
+            if versao is not None:
+                with self._lock_cache:
+                    self._cache[tipo] = entrada
+
+            return entrada
+        finally:
+            lock_tipo.release()
+
+    def _buscar_cache(self, tipo, versao):
+        """Retorna a entrada do cache se ainda corresponder à versão dos dados"""
+        if versao is None:
+            return None
+        with self._lock_cache:
+            entrada = self._cache.get(tipo)
+        if entrada and entrada['versao'] == versao:
+            self._contar('hits')
+            return entrada
+        return None
+
+    def _carregar_perfis(self):
+        """Busca a contagem por perfil como lista de (perfil, quantidade)"""
+        stats = self.db.buscar_estatisticas()
+        return [(p['perfil_resp'], p['total']) for p in stats.get('perfis', [])]
+
+    def _renderizar(self, tipo, perfis, prazo):
+        """Renderiza o gráfico no pool de processos (ou na thread atual) até o prazo (monotonic)"""
+        if self.max_workers <= 0:
+            return renderizadorGrafico.renderizar(tipo, perfis)
+
+        if not self._vagas_fila.acquire(blocking=False):
+            self._contar('rejeitados')
+            raise GraficoIndisponivel("Fila de renderização de gráficos cheia")
+
+        try:
+            pool = self._obter_pool()
+            futuro = pool.submit(renderizadorGrafico.renderizar, tipo, perfis)
+        except Exception:
+            self._vagas_fila.release()
+            raise
+
+        self._contar('fila_atual')
+        # A vaga só é liberada quando o worker termina, mesmo após um timeout
+        futuro.add_done_callback(self._liberar_vaga)
+
+        try:
+            return futuro.result(timeout=max(prazo - time.monotonic(), 0))
+        except FuturoTimeout:
+            # cancel() não para uma renderização já em andamento: o worker
+            # travado seguraria a vaga, então o pool é descartado e recriado
+            if not futuro.cancel():
+                self._descartar_pool(pool)
+            self._contar('timeouts')
+            raise GraficoIndisponivel(f"Tempo esgotado renderizando o gráfico {tipo}")
+        except (BrokenProcessPool, CancelledError):
+            print("❌ Pool de renderização quebrado, será recriado")
+            self._descartar_pool(pool)
+            raise GraficoIndisponivel("Pool de renderização indisponível")
+
+    def _descartar_pool(self, pool):
+        """Encerra o pool (matando os workers) e faz a próxima renderização criar outro"""
+        with self._lock_pool:
+            # Outra requisição pode já ter trocado o pool
+            if self._pool is pool:
+                self._pool = None
+        # Com os processos encerrados, os futuros pendentes falham e liberam as vagas
+        encerrar_workers = getattr(pool, 'terminate_workers', None)
+        if encerrar_workers is not None:
+            encerrar_workers()
+        else:
+            for processo in list((getattr(pool, '_processes', None) or {}).values()):
+                processo.terminate()
+            pool.shutdown(wait=False, cancel_futures=True)
+        print("♻️ Pool de renderização descartado")
+
+    def _liberar_vaga(self, futuro):
+        with self._lock_metricas:
+            self.metricas_cache['fila_atual'] -= 1
+        self._vagas_fila.release()
+
+    def _obter_pool(self):
+        """Cria o pool de processos na primeira renderização"""
+        with self._lock_pool:
+            if self._pool is None:
+                # 'spawn' evita herdar locks de threads do servidor via fork
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context('spawn')
+                )
+                print(f"✅ Pool de renderização iniciado com {self.max_workers} processos")
+            return self._pool
+
+    def _contar(self, metrica):
+        with self._lock_metricas:
+            self.metricas_cache[metrica] += 1
+
+    def _montar_entrada(self, versao, png):
+        """Monta a entrada do cache com PNG, ETag forte e data URL"""
+        return {
+            'versao': versao,
+            'png': png,
+            'etag': hashlib.sha256(png).hexdigest(),
+            'data_url': f"data:image/png;base64,{base64.b64encode(png).decode()}"
+        }
+
     def _gerar_placeholder(self):
-        """Gera um gráfico placeholder quando não há dados"""
+        """Gera um gráfico placeholder (PNG) quando não há dados"""
         try:
-            plt.figure(figsize=(10, 6))
-            plt.text(0.5, 0.5, 'Aguardando dados...\nRealize o questionário para ver as estatísticas', 
-                    ha='center', va='center', transform=plt.gca().transAxes, 
-                    fontsize=14, style='italic', color='gray')
-            plt.gca().set_facecolor('#f8f9fa')
-            plt.gcf().patch.set_facecolor('white')
-            
-            # Remover eixos
-            plt.axis('off')
-            
-            img = io.BytesIO()
-            plt.savefig(img, format='png', dpi=100, bbox_inches='tight')
-            img.seek(0)
-            graph_url = base64.b64encode(img.getvalue()).decode()
-            plt.close()
-            
-            return f"data:image/png;base64,{graph_url}"
-            
+            return renderizadorGrafico.renderizar_placeholder()
         except Exception as e:
             print(f"❌ Erro ao gerar placeholder: {e}")
             return None
-    
-    def gerar_grafico_pizza(self):
-        """Gera um gráfico de pizza com a distribuição dos perfis"""
+
+    def estatisticas_cache(self):
+        """Retorna os contadores do cache e do pool de gráficos"""
+        with self._lock_metricas:
+            metricas = dict(self.metricas_cache)
+        with self._lock_cache:
+            metricas['graficos_em_cache'] = sorted(self._cache.keys())
+
+        total = metricas['hits'] + metricas['misses']
+        metricas['taxa_acerto'] = round(metricas['hits'] / total, 4) if total else 0.0
+        metricas['tempo_render_medio'] = (
+            metricas['tempo_render_total'] / metricas['renders'] if metricas['renders'] else 0.0
+        )
+        metricas['max_workers'] = self.max_workers
+        metricas['max_fila'] = self.max_fila
+        return metricas
+
+    def limpar_cache(self):
+        """Descarta todos os gráficos em cache"""
+        with self._lock_cache:
+            self._cache.clear()
+
+    def aquecer(self):
+        """Carrega o matplotlib (ou inicia os workers do pool) antes do primeiro gráfico"""
+        inicio = time.perf_counter()
         try:
-            stats = self.db.buscar_estatisticas()
-            perfis = stats.get('perfis', [])
-            
-            if not perfis:
-                return self._gerar_placeholder()
-            
-            # Preparar dados
-            labels = []
-            sizes = []
-            colors = []
-            
-            cores_perfis = {
-                'Alheio à Problemática': '#FF6B6B',
-                'Consciente mas Cauteloso': '#4ECDC4',
-                'Atuante na Causa': '#45B7D1',
-                'Fora da faixa': '#96CEB4'
-            }
-            
-            for perfil_data in perfis:
-                perfil = perfil_data['perfil_resp']
-                quantidade = perfil_data['total']
-                
-                labels.append(f"{perfil}\n({quantidade})")
-                sizes.append(quantidade)
-                colors.append(cores_perfis.get(perfil, '#999999'))
-            
-            # Criar gráfico de pizza
-            plt.figure(figsize=(10, 8))
-            wedges, texts, autotexts = plt.pie(sizes, labels=labels, colors=colors, autopct='%1.1f%%',
-                                              startangle=90, textprops={'fontsize': 10})
-            
-            # Estilizar
-            plt.title('Distribuição de Perfis - Questionário Anti-Bullying', 
-                     fontsize=16, fontweight='bold', pad=20, color='#2d3748')
-            
-            # Melhorar aparência dos textos
-            for autotext in autotexts:
-                autotext.set_color('white')
-                autotext.set_fontweight('bold')
-                autotext.set_fontsize(9)
-            
-            for text in texts:
-                text.set_fontsize(10)
-            
-            plt.axis('equal')
-            plt.tight_layout()
-            
-            # Converter para base64
-            img = io.BytesIO()
-            plt.savefig(img, format='png', dpi=100, bbox_inches='tight')
-            img.seek(0)
-            graph_url = base64.b64encode(img.getvalue()).decode()
-            plt.close()
-            
-            return f"data:image/png;base64,{graph_url}"
-            
+            if self.max_workers <= 0:
+                renderizadorGrafico.aquecer()
+            else:
+                pool = self._obter_pool()
+                futuros = [pool.submit(renderizadorGrafico.aquecer) for _ in range(self.max_workers)]
+                for futuro in futuros:
+                    futuro.result(timeout=self.timeout)
+            print(f"🔥 Gráficos aquecidos em {time.perf_counter() - inicio:.2f}s")
+            return True
         except Exception as e:
-            print(f"❌ Erro ao gerar gráfico de pizza: {e}")
-            return self._gerar_placeholder()
+            print(f"❌ Erro ao aquecer gráficos: {e}")
+            return False
+
+    def encerrar(self):
+        """Encerra o pool de renderização"""
+        with self._lock_pool:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
+
+# Instância global, criada na primeira requisição de gráfico
+_grafico_manager = None
+_lock_instancia = threading.Lock()
+
+def get_grafico_manager(db=None):
+    """Retorna a instância global do gerenciador de gráficos
+
+    'db' só é usado na criação da instância; por padrão, o singleton do formDB.
+    """
+    global _grafico_manager
+    if _grafico_manager is None:
+        with _lock_instancia:
+            if _grafico_manager is None:
+                _grafico_manager = GraficoPerfil(db)
+                atexit.register(_grafico_manager.encerrar)
+    return _grafico_manager
 
-# Instância global
-grafico_manager = GraficoPerfil()
\ No newline at end of file
+def __getattr__(nome):
+    # Compatibilidade: perfilGrafico.grafico_manager continua disponível
+    if nome == 'grafico_manager':
+        return get_grafico_manager()
+    raise AttributeError(f"module {__name__!r} has no attribute {nome!r}")
@@ -2,6 +2,7 @@
 import sqlite3
 import random
 from datetime import datetime, timedelta
+from motorPontuacao import FAIXAS_PERFIL
 
 def populate_user_responses():
     """Popula a tabela UserRespostas com 20 registros de exemplo"""
@@ -10,12 +11,8 @@ def populate_user_responses():
     conn = sqlite3.connect('form.db')
     cursor = conn.cursor()
     
-    # Perfis possíveis e suas faixas de pontuação
-    perfis = {
-        'Alheio à Problemática': (10, 16),
-        'Consciente mas Cauteloso': (17, 23),
-        'Atuante na Causa': (24, 30)
-    }
+    # Perfis possíveis e suas faixas de pontuação (mesma tabela do motor de pontuação)
+    perfis = {perfil: (minimo, maximo) for minimo, maximo, perfil, _ in FAIXAS_PERFIL}
     
     # Distribuição desejada dos perfis (aproximadamente)
     distribuicao = {
@@ -0,0 +1,138 @@
+# renderizadorGrafico.py
+"""Desenho dos gráficos de perfis com objetos Figure explícitos
+
+Não usa o estado global do pyplot nem acessa o banco: recebe os dados prontos
+e devolve os bytes do PNG. Por isso pode rodar em qualquer thread ou nos
+processos do pool de renderização do perfilGrafico.
+
+O matplotlib só é importado na primeira renderização, então importar este
+módulo é barato (o processo web não carrega o matplotlib quando os gráficos
+são desenhados pelo pool).
+"""
+import io
+
+# Cores de cada perfil
+CORES_PERFIS = {
+    'Alheio à Problemática': '#FF6B6B',
+    'Consciente mas Cauteloso': '#4ECDC4',
+    'Atuante na Causa': '#45B7D1',
+    'Fora da faixa': '#96CEB4'
+}
+
+def _nova_figura(figsize):
+    """Cria uma Figure explícita (importa o matplotlib sob demanda)"""
+    from matplotlib.figure import Figure
+    return Figure(figsize=figsize)
+
+def _figura_para_png(fig):
+    """Rasteriza a figura em PNG"""
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    FigureCanvasAgg(fig)
+    img = io.BytesIO()
+    fig.savefig(img, format='png', dpi=100, bbox_inches='tight')
+    return img.getvalue()
+
+def renderizar_barras(perfis):
+    """Gráfico de barras a partir de uma lista de (perfil, quantidade)"""
+    if not perfis:
+        return renderizar_placeholder()
+
+    nomes_perfis = [perfil for perfil, _ in perfis]
+    quantidades = [quantidade for _, quantidade in perfis]
+    cores = [CORES_PERFIS.get(perfil, '#999999') for perfil in nomes_perfis]
+
+    # Criar o gráfico
+    fig = _nova_figura((12, 8))
+    ax = fig.add_subplot()
+    bars = ax.bar(nomes_perfis, quantidades, color=cores, alpha=0.8, edgecolor='white', linewidth=2)
+
+    # Personalizar o gráfico
+    ax.set_title('Distribuição de Perfis - Questionário Anti-Bullying',
+                 fontsize=16, fontweight='bold', pad=20, color='#2d3748')
+    ax.set_xlabel('Perfis', fontsize=12, fontweight='bold', color='#2d3748')
+    ax.set_ylabel('Quantidade de Pessoas', fontsize=12, fontweight='bold', color='#2d3748')
+
+    # Adicionar valores nas barras
+    for bar, quantidade in zip(bars, quantidades):
+        ax.text(bar.get_x() + bar.get_width()/2, bar.get_height() + 0.1,
+                f'{quantidade}', ha='center', va='bottom', fontweight='bold', fontsize=11)
+
+    # Estilizar o gráfico
+    ax.grid(axis='y', alpha=0.3, linestyle='--')
+    ax.set_facecolor('#f8f9fa')
+    fig.patch.set_facecolor('white')
+
+    # Remover bordas
+    for spine in ax.spines.values():
+        spine.set_visible(False)
+
+    # Rotacionar labels do eixo X se necessário
+    for label in ax.get_xticklabels():
+        label.set_rotation(15)
+        label.set_horizontalalignment('right')
+    fig.tight_layout()
+
+    return _figura_para_png(fig)
+
+def renderizar_pizza(perfis):
+    """Gráfico de pizza a partir de uma lista de (perfil, quantidade)"""
+    if not perfis:
+        return renderizar_placeholder()
+
+    labels = [f"{perfil}\n({quantidade})" for perfil, quantidade in perfis]
+    sizes = [quantidade for _, quantidade in perfis]
+    colors = [CORES_PERFIS.get(perfil, '#999999') for perfil, _ in perfis]
+
+    # Criar gráfico de pizza
+    fig = _nova_figura((10, 8))
+    ax = fig.add_subplot()
+    wedges, texts, autotexts = ax.pie(sizes, labels=labels, colors=colors, autopct='%1.1f%%',
+                                      startangle=90, textprops={'fontsize': 10})
+
+    # Estilizar
+    ax.set_title('Distribuição de Perfis - Questionário Anti-Bullying',
+                 fontsize=16, fontweight='bold', pad=20, color='#2d3748')
+
+    # Melhorar aparência dos textos
+    for autotext in autotexts:
+        autotext.set_color('white')
+        autotext.set_fontweight('bold')
+        autotext.set_fontsize(9)
+
+    for text in texts:
+        text.set_fontsize(10)
+
+    ax.axis('equal')
+    fig.tight_layout()
+
+    return _figura_para_png(fig)
+
+def renderizar_placeholder():
+    """Gráfico placeholder quando não há dados"""
+    fig = _nova_figura((10, 6))
+    ax = fig.add_subplot()
+    ax.text(0.5, 0.5, 'Aguardando dados...\nRealize o questionário para ver as estatísticas',
+            ha='center', va='center', transform=ax.transAxes,
+            fontsize=14, style='italic', color='gray')
+    ax.set_facecolor('#f8f9fa')
+    fig.patch.set_facecolor('white')
+
+    # Remover eixos
+    ax.axis('off')
+
+    return _figura_para_png(fig)
+
+RENDERIZADORES = {
+    'barras': renderizar_barras,
+    'pizza': renderizar_pizza
+}
+
+def aquecer():
+    """Carrega o matplotlib no processo atual (usado no aquecimento do pool)"""
+    import matplotlib.figure
+    import matplotlib.backends.backend_agg
+    return True
+
+def renderizar(tipo, perfis):
+    """Ponto de entrada usado pelo pool de processos"""
+    return RENDERIZADORES[tipo](perfis)
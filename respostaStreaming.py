@@ -0,0 +1,85 @@
+# respostaStreaming.py
+"""Respostas em streaming para as listagens da API
+
+Recebe um iterador de linhas (os métodos iterar_* do cadDB, que leem o
+cursor com fetchmany) e envia um array JSON ou NDJSON (uma linha JSON por
+registro) em pedaços, sem montar a lista nem a string inteira na memória.
+
+O cliente escolhe o formato com ?stream=json, ?stream=ndjson ou com o
+cabeçalho Accept: application/x-ndjson.
+"""
+from itertools import chain
+from flask import Response, current_app
+
+FORMATOS_STREAMING = {
+    'json': 'application/json',
+    'ndjson': 'application/x-ndjson'
+}
+
+# Registros agrupados em cada pedaço enviado ao cliente
+LINHAS_POR_PEDACO = 200
+
+def formato_pedido(request):
+    """Formato de streaming pedido na requisição, ou None para a resposta normal
+
+    Levanta ValueError se ?stream tiver um formato desconhecido.
+    """
+    formato = request.args.get('stream')
+    if formato is None:
+        if request.accept_mimetypes.best == FORMATOS_STREAMING['ndjson']:
+            return 'ndjson'
+        return None
+    if formato not in FORMATOS_STREAMING:
+        raise ValueError(f"Formato de streaming inválido: {formato}")
+    return formato
+
+def _pedacos(linhas, dumps, separador):
+    """Agrupa as linhas serializadas em pedaços de LINHAS_POR_PEDACO"""
+    pedaco = []
+    for linha in linhas:
+        pedaco.append(dumps(linha))
+        if len(pedaco) >= LINHAS_POR_PEDACO:
+            yield separador.join(pedaco)
+            pedaco = []
+    if pedaco:
+        yield separador.join(pedaco)
+
+def gerar_json_array(linhas, dumps):
+    """Gera um array JSON em fragmentos"""
+    yield '['
+    primeiro = True
+    for pedaco in _pedacos(linhas, dumps, ','):
+        yield pedaco if primeiro else ',' + pedaco
+        primeiro = False
+    yield ']'
+
+def gerar_ndjson(linhas, dumps):
+    """Gera NDJSON: um objeto JSON por linha"""
+    for pedaco in _pedacos(linhas, dumps, '\n'):
+        yield pedaco + '\n'
+
+def _registrar_erros(gerador):
+    """Loga erros que acontecem depois que o status 200 já foi enviado"""
+    try:
+        yield from gerador
+    except Exception as e:
+        print(f"❌ Erro durante o streaming da resposta: {e}")
+        raise
+
+def resposta_streaming(linhas, formato):
+    """Monta a Response em streaming para o iterador de linhas
+
+    O primeiro fragmento é gerado antes de retornar, então erros na
+    execução da consulta ainda viram uma resposta de erro normal.
+    """
+    dumps = current_app.json.dumps
+    if formato == 'ndjson':
+        gerador = gerar_ndjson(linhas, dumps)
+    else:
+        gerador = gerar_json_array(linhas, dumps)
+
+    primeiro = next(gerador, '')
+    if formato != 'ndjson':
+        # '[' sai sem tocar no cursor; antecipa também o primeiro pedaço de dados
+        primeiro += next(gerador, '')
+    return Response(_registrar_erros(chain([primeiro], gerador)), mimetype=FORMATOS_STREAMING[formato])
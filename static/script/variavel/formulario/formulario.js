@@ -65,7 +65,7 @@ document.addEventListener('DOMContentLoaded', function() {
         const algumSelecionado = Array.from(radios).some(radio => radio.checked);
         
         if (algumSelecionado) {
-            // Salvar a resposta
+            // Salvar a resposta (ID da opção; a pontuação é calculada no servidor)
             const radioSelecionado = perguntaAtualElement.querySelector('input[type="radio"]:checked');
             respostas[perguntaId] = parseInt(radioSelecionado.value);
             console.log(`💾 Salva resposta para pergunta ${perguntaId}: ${respostas[perguntaId]}`);
@@ -130,7 +130,7 @@ document.addEventListener('DOMContentLoaded', function() {
             return;
         }
 
-        console.log('📤 Enviando respostas:', respostasArray);
+        console.log('📤 Enviando opções:', respostasArray);
 
         // Desabilitar o botão de envio
         btnEnviar.disabled = true;
@@ -142,7 +142,7 @@ document.addEventListener('DOMContentLoaded', function() {
             headers: {
                 'Content-Type': 'application/json',
             },
-            body: JSON.stringify({respostas: respostasArray})
+            body: JSON.stringify({opcoes: respostasArray})
         })
         .then(response => {
             if (!response.ok) {
@@ -0,0 +1,171 @@
+# verificar_planos.py
+"""Verifica com EXPLAIN QUERY PLAN que as consultas analíticas usam índices
+
+Executa os métodos de leitura de formDB e cadDB contra bancos temporários,
+captura cada SELECT executado e falha se algum plano fizer varredura completa
+de tabela (SCAN sem índice) ou ordenação em B-tree temporária. As exceções
+são explícitas, por método e linha do plano, em EXCECOES. Só os bancos
+temporários são abertos; o form.db e o cad.db da pasta atual não são tocados.
+
+Uso: python verificar_planos.py   (código de saída 1 se algum plano falhar)
+"""
+import os
+import shutil
+import sys
+import tempfile
+import formDB
+import cadDB
+
+# Métodos analíticos verificados: (nome, argumentos)
+METODOS_FORMDB = [
+    ('buscar_estatisticas', ()),
+    ('buscar_todas_respostas', ()),
+    ('buscar_distribuicao_pontuacao', ()),
+    ('buscar_estatisticas_detalhadas', ()),
+    ('buscar_resumo_perfis', ()),
+    ('buscar_evolucao_temporal', ()),
+    ('buscar_evolucao_temporal', ('hora', 48)),
+    ('iterar_respostas', ('2024-01-01', '2030-01-01', 0)),
+]
+
+METODOS_CADDB = [
+    ('buscar_resumo_painel', ()),
+    ('buscar_escolas', ()),
+    ('buscar_escola_por_id', (1,)),
+    ('buscar_escolas_pagina', (10, cadDB.codificar_cursor(['A', 1]))),
+    ('buscar_usuarios', ()),
+    ('buscar_usuarios_pagina', (10, cadDB.codificar_cursor(['A', 1]))),
+    ('buscar_usuario_por_id', (1,)),
+    ('buscar_publicacoes', ()),
+    ('buscar_publicacoes_pagina', (10, cadDB.codificar_cursor(['2024-01-01 00:00:00', 1]))),
+    ('buscar_publicacao_por_id', (1,)),
+    ('buscar_publicacoes_por_escola', (1,)),
+    ('buscar_usuarios_por_escola', (1,)),
+    ('buscar_resumo_escola', (1,)),
+    ('buscar_comentarios_por_publicacao', (1,)),
+    ('buscar_comentarios_pagina', (1, 10, cadDB.codificar_cursor(['2024-01-01 00:00:00', 1]))),
+    ('buscar_texto', ('título', 'publicacoes', 1, '2024-01-01', '2030-12-31')),
+    ('buscar_texto', ('comentário', 'comentarios', 1, '2024-01-01', '2030-12-31')),
+]
+
+# Linhas de plano aceitas em métodos específicos: {método: {detalhe: motivo}}.
+# Qualquer outro SCAN sem índice ou B-tree temporária é falha.
+_TABELA_AGREGADA = 'EstatisticasPerfil tem uma linha por perfil'
+_ORDENA_AGREGADA = 'ordena as poucas linhas da tabela agregada'
+EXCECOES = {
+    'buscar_estatisticas': {
+        'SCAN EstatisticasPerfil': _TABELA_AGREGADA,
+        'USE TEMP B-TREE FOR ORDER BY': _ORDENA_AGREGADA,
+    },
+    'buscar_estatisticas_detalhadas': {
+        'SCAN EstatisticasPerfil': _TABELA_AGREGADA,
+        'SCAN e': _TABELA_AGREGADA,
+        'USE TEMP B-TREE FOR ORDER BY': _ORDENA_AGREGADA,
+    },
+    'buscar_resumo_perfis': {
+        'SCAN EstatisticasPerfil': _TABELA_AGREGADA,
+        'USE TEMP B-TREE FOR ORDER BY': _ORDENA_AGREGADA,
+    },
+    'buscar_distribuicao_pontuacao': {
+        'USE TEMP B-TREE FOR ORDER BY': 'ordena só os grupos (pontuação x perfil), não as respostas',
+    },
+    'buscar_texto': {
+        'USE TEMP B-TREE FOR ORDER BY': 'ordena por relevância só os documentos encontrados no FTS5',
+    },
+}
+
+# Formas de SCAN que percorrem um índice
+_SCAN_COM_INDICE = ('USING INDEX ', 'USING COVERING INDEX ', 'VIRTUAL TABLE INDEX ')
+
+def problemas_do_plano(plano, excecoes=None):
+    """Retorna as linhas do plano que indicam varredura completa ou sort temporário"""
+    excecoes = excecoes or {}
+    # Subconsultas e CTEs calculadas no próprio plano: percorrer o resultado
+    # delas não é varredura de tabela (a leitura da tabela aparece no plano filho)
+    intermediarios = {
+        linha[3].split(' ', 1)[1] for linha in plano
+        if linha[3].startswith(('CO-ROUTINE ', 'MATERIALIZE '))
+    }
+    problemas = []
+    for linha in plano:
+        detalhe = linha[3]
+        if detalhe in excecoes:
+            continue
+        if detalhe.startswith('USE TEMP B-TREE'):
+            problemas.append(detalhe)
+        elif detalhe.startswith('SCAN '):
+            alvo, _, modo = detalhe[len('SCAN '):].partition(' ')
+            if alvo == 'CONSTANT' or alvo in intermediarios or modo.startswith(_SCAN_COM_INDICE):
+                continue
+            problemas.append(detalhe)
+    return problemas
+
+def capturar_consultas(db, metodo, args):
+    """Executa o método e retorna os SELECTs que ele enviou ao SQLite"""
+    consultas = []
+    db.connection.set_trace_callback(consultas.append)
+    try:
+        resultado = getattr(db, metodo)(*args)
+        if metodo.startswith('iterar_'):
+            list(resultado)  # Geradores só executam a consulta quando consumidos
+    finally:
+        db.connection.set_trace_callback(None)
+    return [sql for sql in consultas if sql.lstrip().upper().startswith(('SELECT', 'WITH'))]
+
+def verificar(db, metodos):
+    """Verifica os planos de todos os métodos; retorna o número de falhas"""
+    falhas = 0
+    for metodo, args in metodos:
+        consultas = capturar_consultas(db, metodo, args)
+        if not consultas:
+            print(f"⚠️ {metodo}: nenhuma consulta capturada")
+            continue
+
+        for sql in consultas:
+            plano = db.connection.execute(f"EXPLAIN QUERY PLAN {sql}").fetchall()
+            problemas = problemas_do_plano(plano, EXCECOES.get(metodo))
+            resumo = ' '.join(sql.split())[:80]
+            if problemas:
+                falhas += 1
+                print(f"❌ {metodo}: {resumo}")
+                for problema in problemas:
+                    print(f"     {problema}")
+            else:
+                print(f"✅ {metodo}: {resumo}")
+    return falhas
+
+def main():
+    pasta = tempfile.mkdtemp(prefix='verificar_planos_')
+    try:
+        form_db = formDB.Database(db_name=os.path.join(pasta, 'form.db'))
+        cad_db = cadDB.Database(db_name=os.path.join(pasta, 'cad.db'))
+
+        # Alguns dados para que todos os caminhos dos métodos sejam executados
+        form_db.salvar_resposta_usuario(20, 'Consciente mas Cauteloso')
+        id_user = cad_db.criar_usuario(1, 'Teste', 'teste', 'teste@example.com')
+        id_publi = cad_db.criar_publicacao(id_user, 1, 'Título', 'Texto')
+        cad_db.criar_comentario(id_publi, id_user, 'Comentário')
+
+        print("\n" + "=" * 60)
+        print("PLANOS DE CONSULTA - formDB")
+        print("=" * 60)
+        falhas = verificar(form_db, METODOS_FORMDB)
+
+        print("\n" + "=" * 60)
+        print("PLANOS DE CONSULTA - cadDB")
+        print("=" * 60)
+        falhas += verificar(cad_db, METODOS_CADDB)
+
+        form_db.close()
+        cad_db.close()
+    finally:
+        shutil.rmtree(pasta, ignore_errors=True)
+
+    if falhas:
+        print(f"\n❌ {falhas} consulta(s) sem uso de índice")
+        return 1
+    print("\n✅ Todas as consultas analíticas usam índices")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())